@@ -0,0 +1,368 @@
+"""Бенчмарк эндпоинтов API на заполненной базе.
+
+Каждый сценарий - запрос к одному маршруту от имени одной роли. Запрос
+повторяется несколько раз через тестовый клиент в том же процессе, для
+него считаются перцентили задержки, число SQL-запросов и пиковая память
+по tracemalloc. Регрессией считается рост числа запросов, медианы
+задержки или памяти; p95 и p99 только выводятся. Пишущие запросы
+выполняются в транзакции, которая откатывается, чтобы данные не
+менялись от повтора к повтору.
+
+Отдельно замеряется скорость кодирования страниц произведений, отзывов
+и комментариев в JSON разными рендерерами.
+"""
+import io
+import platform
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from api.renderers import FastJSONRenderer
+from api.serializers import (
+    CommentSerializer,
+    ReviewSerializer,
+    TitleSerializer
+)
+from api.urls import router
+from reviews.generation import generate, make_plan
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.models import User
+from users.tokens import RoleAccessToken, make_confirmation_code
+
+BATCH_SIZE = 1000
+ENCODE_PAGE_SIZE = 100
+ENCODE_RENDERERS = (JSONRenderer, FastJSONRenderer)
+# абсолютный запас, внутри которого рост считается шумом
+LATENCY_SLACK_MS = 5
+MEMORY_SLACK_KB = 64
+TOKEN_ROUTE = 'users.views.CreateTokenView'
+
+Volumes = namedtuple(
+    'Volumes', 'users genres categories titles reviews comments'
+)
+# reviews - всего отзывов, comments - в среднем на отзыв, как у
+# generate_data
+DEFAULT_VOLUMES = Volumes(
+    users=200, genres=20, categories=5, titles=500, reviews=2500,
+    comments=1.5
+)
+ZIPF_EXPONENT = 1.1
+
+# settings - переопределения настроек, чтобы сравнить два пути одного
+# маршрута на одних данных
+Scenario = namedtuple(
+    'Scenario', 'name route method path role data settings'
+)
+Scenario.__new__.__defaults__ = (None, None)
+
+Seeded = namedtuple(
+    'Seeded', 'admin writer title review comment author genres category'
+)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def seed_database(volumes, seed=0):
+    """Детерминированно заполняет пустую базу генератором данных.
+
+    Данные те же, что у generate_data: отзывы распределены по Ципфу,
+    сценарии с отзывами идут к самому популярному произведению.
+    """
+
+    plan = make_plan(
+        seed, volumes.users, volumes.genres, volumes.categories,
+        volumes.titles, volumes.reviews, volumes.comments,
+        ZIPF_EXPONENT, BATCH_SIZE
+    )
+    for _ in generate(plan):
+        pass
+    admin = User.objects.create(
+        username='bench-admin', email='admin@yamdb.fake', role='admin'
+    )
+    writer = User.objects.create(
+        username='bench-writer', email='writer@yamdb.fake'
+    )
+    # bulk_create не отправляет сигналов, документы собираются так же,
+    # как после загрузки данных
+    call_command('build_title_documents', stdout=io.StringIO())
+
+    title = Title.objects.order_by('-rating_count', 'pk').first()
+    review = title.title_reviews.order_by('pk').first()
+    comment = Comment.objects.create(
+        review=review, author=writer, text='Комментарий для бенчмарка'
+    )
+    genres = tuple(
+        Genre.objects.order_by('pk').values_list('slug', flat=True)[:2]
+    )
+    category = Category.objects.order_by('pk').values_list(
+        'slug', flat=True
+    ).first()
+    return Seeded(
+        admin, writer, title, review, comment, review.author, genres,
+        category
+    )
+
+
+def build_scenarios(seeded):
+    title_url = f'/api/v1/titles/{seeded.title.pk}/'
+    review_url = f'{title_url}reviews/{seeded.review.pk}/'
+    comment_url = f'{review_url}comments/{seeded.comment.pk}/'
+    genre, other_genre = seeded.genres
+    new_title = {
+        'name': 'Новое произведение', 'year': 2000, 'description': 'd',
+        'genre': [genre], 'category': seeded.category,
+    }
+    return [
+        Scenario('GET api-root', 'api-root', 'get', '/api/v1/', 'anonymous'),
+        Scenario(
+            'POST signup', 'signup-list', 'post', '/api/v1/auth/signup/',
+            'anonymous', {'username': 'newbie', 'email': 'newbie@yamdb.fake'}
+        ),
+        Scenario(
+            'POST token', TOKEN_ROUTE, 'post', '/api/v1/auth/token/',
+            'anonymous', {
+                'username': seeded.writer.username,
+                'confirmation_code': make_confirmation_code(seeded.writer),
+            }
+        ),
+        Scenario('GET users', 'users-list', 'get', '/api/v1/users/', 'admin'),
+        Scenario('GET users/me', 'users-me', 'get', '/api/v1/users/me/',
+                 'user'),
+        Scenario(
+            'GET users/<username>', 'users-detail', 'get',
+            f'/api/v1/users/{seeded.writer.username}/', 'admin'
+        ),
+        Scenario('GET users/username', 'users-username', 'get',
+                 '/api/v1/users/username/', 'admin'),
+        Scenario('GET categories', 'categories-list', 'get',
+                 '/api/v1/categories/', 'anonymous'),
+        Scenario(
+            'POST categories', 'categories-list', 'post',
+            '/api/v1/categories/', 'admin', {'name': 'Новая', 'slug': 'new'}
+        ),
+        Scenario('DELETE categories/<slug>', 'categories-detail', 'delete',
+                 f'/api/v1/categories/{seeded.category}/', 'admin'),
+        Scenario('GET genres', 'genres-list', 'get', '/api/v1/genres/',
+                 'anonymous'),
+        Scenario('DELETE genres/<slug>', 'genres-detail', 'delete',
+                 f'/api/v1/genres/{genre}/', 'admin'),
+        Scenario('GET titles', 'titles-list', 'get', '/api/v1/titles/',
+                 'anonymous'),
+        Scenario('GET titles?genre', 'titles-list', 'get',
+                 f'/api/v1/titles/?genre={genre}', 'anonymous'),
+        Scenario('GET titles?ordering', 'titles-list', 'get',
+                 '/api/v1/titles/?ordering=-rating', 'anonymous'),
+        Scenario('GET titles?genre=a,b', 'titles-list', 'get',
+                 f'/api/v1/titles/?genre={genre},{other_genre}&genre_mode=all',
+                 'anonymous'),
+        Scenario('GET titles?q', 'titles-list', 'get',
+                 '/api/v1/titles/?q=драма', 'anonymous'),
+        Scenario('GET titles?cursor', 'titles-list', 'get',
+                 '/api/v1/titles/?pagination=cursor', 'anonymous'),
+        Scenario('GET titles?fields', 'titles-list', 'get',
+                 '/api/v1/titles/?fields=id,name,year', 'anonymous'),
+        Scenario('GET titles?limit=100', 'titles-list', 'get',
+                 '/api/v1/titles/?limit=100', 'anonymous'),
+        Scenario('GET titles?limit=100 (DRF)', 'titles-list', 'get',
+                 '/api/v1/titles/?limit=100', 'anonymous',
+                 settings={'TITLE_DOCUMENTS_ENABLED': False}),
+        Scenario('POST titles', 'titles-list', 'post', '/api/v1/titles/',
+                 'admin', new_title),
+        Scenario('GET titles/export', 'titles-export', 'get',
+                 '/api/v1/titles/export/', 'admin'),
+        Scenario('GET titles/<id>', 'titles-detail', 'get', title_url,
+                 'anonymous'),
+        Scenario('PATCH titles/<id>', 'titles-detail', 'patch', title_url,
+                 'admin', {'description': 'Новое описание'}),
+        Scenario('GET reviews', 'reviews-list', 'get',
+                 f'{title_url}reviews/', 'anonymous'),
+        Scenario(
+            'POST reviews', 'reviews-list', 'post', f'{title_url}reviews/',
+            'user', {'text': 'Отзыв', 'score': 7}
+        ),
+        Scenario('GET reviews/<id>', 'reviews-detail', 'get', review_url,
+                 'anonymous'),
+        Scenario('PATCH reviews/<id>', 'reviews-detail', 'patch', review_url,
+                 'author', {'score': 3}),
+        Scenario('GET comments', 'comments-list', 'get',
+                 f'{review_url}comments/', 'anonymous'),
+        Scenario('POST comments', 'comments-list', 'post',
+                 f'{review_url}comments/', 'user', {'text': 'Комментарий'}),
+        Scenario('GET comments/<id>', 'comments-detail', 'get', comment_url,
+                 'anonymous'),
+    ]
+
+
+def uncovered_routes(scenarios):
+    """Маршруты api/urls.py, для которых нет ни одного сценария."""
+
+    routes = {url.name for url in router.urls} | {TOKEN_ROUTE}
+    return sorted(routes - {scenario.route for scenario in scenarios})
+
+
+def make_clients(seeded):
+    clients = {'anonymous': APIClient()}
+    for role, user in (
+        ('user', seeded.writer),
+        ('admin', seeded.admin),
+        ('author', seeded.author),
+    ):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {RoleAccessToken.for_user(user)}'
+        )
+        clients[role] = client
+    return clients
+
+
+def perform(client, scenario):
+    """Один запрос сценария, пишущие откатываются после ответа."""
+
+    with transaction.atomic():
+        response = getattr(client, scenario.method)(
+            scenario.path, scenario.data, format='json'
+        )
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        if scenario.method != 'get':
+            transaction.set_rollback(True)
+    return response
+
+
+def measure(client, scenario, iterations):
+    perform(client, scenario)
+    timings = []
+    queries = []
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = perform(client, scenario)
+            timings.append(time.perf_counter() - started)
+        queries.append(len(captured))
+        if response.status_code >= 400:
+            raise RuntimeError(
+                f'{scenario.name}: ответ {response.status_code}'
+            )
+    tracemalloc.start()
+    try:
+        perform(client, scenario)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'p50_ms': round(percentile(timings, 0.5) * 1000, 3),
+        'p95_ms': round(percentile(timings, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(timings, 0.99) * 1000, 3),
+        'queries': max(queries),
+        'memory_kb': round(peak / 1024, 1),
+    }
+
+
+def run_benchmark(scenarios, clients, iterations):
+    results = {}
+    for scenario in scenarios:
+        with override_settings(**(scenario.settings or {})):
+            results[scenario.name] = measure(
+                clients[scenario.role], scenario, iterations
+            )
+    return results
+
+
+def encode_payloads(page_size=ENCODE_PAGE_SIZE):
+    """Страницы произведений, отзывов и комментариев после сериализаторов."""
+
+    titles = Title.objects.select_related('category').prefetch_related(
+        'genre'
+    ).order_by('pk')[:page_size]
+    reviews = Review.objects.select_related('author').order_by(
+        'pk'
+    )[:page_size]
+    comments = Comment.objects.select_related('author').order_by(
+        'pk'
+    )[:page_size]
+    return {
+        'titles': TitleSerializer(titles, many=True).data,
+        'reviews': ReviewSerializer(reviews, many=True).data,
+        'comments': CommentSerializer(comments, many=True).data,
+    }
+
+
+def encode_throughput(payloads, iterations, renderers=ENCODE_RENDERERS):
+    """Страниц и мегабайт в секунду для каждого рендерера и страницы."""
+
+    results = {}
+    for name, data in payloads.items():
+        for renderer_class in renderers:
+            renderer = renderer_class()
+            size = len(renderer.render(data))
+            started = time.perf_counter()
+            for _ in range(iterations):
+                renderer.render(data)
+            elapsed = time.perf_counter() - started
+            results[f'{name} {renderer_class.__name__}'] = {
+                'pages_per_s': round(iterations / elapsed, 1),
+                'mb_per_s': round(size * iterations / elapsed / 2 ** 20, 2),
+            }
+    return results
+
+
+def get_runtime():
+    """Среда, от которой зависят замеры памяти."""
+
+    return {
+        'implementation': platform.python_implementation(),
+        'python': '{}.{}'.format(*sys.version_info[:2]),
+        'vendor': connection.vendor,
+    }
+
+
+def compare(results, baseline, latency_threshold, memory_threshold):
+    """Регрессии относительно базовой линии списком строк.
+
+    Число запросов не зависит от машины и не должно расти вовсе. Задержка
+    сравнивается по медиане: хвостовые перцентили на сотне повторов
+    определяются единичными паузами сборщика мусора и планировщика.
+    Медиана и память не должны превышать порогов; небольшой абсолютный
+    запас гасит шум на малых значениях. memory_threshold=None отключает
+    сравнение памяти: размеры объектов зависят от версии Python.
+    """
+
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result['queries'] > base['queries']:
+            regressions.append(
+                f'{name}: SQL-запросов {result["queries"]} '
+                f'вместо {base["queries"]}'
+            )
+        limit = max(base['p50_ms'] * (1 + latency_threshold),
+                    base['p50_ms'] + LATENCY_SLACK_MS)
+        if result['p50_ms'] > limit:
+            regressions.append(
+                f'{name}: медиана {result["p50_ms"]} мс, '
+                f'базовая {base["p50_ms"]} мс'
+            )
+        if memory_threshold is None:
+            continue
+        limit = max(base['memory_kb'] * (1 + memory_threshold),
+                    base['memory_kb'] + MEMORY_SLACK_KB)
+        if result['memory_kb'] > limit:
+            regressions.append(
+                f'{name}: память {result["memory_kb"]} КБ, '
+                f'базовая {base["memory_kb"]} КБ'
+            )
+    return regressions
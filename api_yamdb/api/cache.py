@@ -0,0 +1,180 @@
+"""Кэш ответов читающих эндпоинтов с инвалидацией по версиям ресурсов.
+
+Ключ ответа включает путь, строку запроса, роль пользователя и текущие
+версии ресурсов, от которых зависит эндпоинт. Версии хранятся в базе
+(api.models.ResourceVersion). Любая запись в модель увеличивает версию ее
+ресурсов, и старые ключи просто перестают запрашиваться, а затем
+вытесняются по TTL или LRU бэкенда.
+
+Сжатые тела этих ответов хранятся в том же кэше (api/compression.py).
+"""
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from api.conditional import set_validators
+from api.metrics import CACHE_REQUESTS
+from api.models import ResourceVersion
+
+RESPONSE_KEY = 'api:response:{}'
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def get_stats():
+    """Счетчики попаданий и промахов текущего процесса."""
+
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+    CACHE_REQUESTS.labels(name).inc()
+
+
+def get_versions(resources):
+    """Текущие версии ресурсов, одним запросом к базе.
+
+    Версии общие для всех процессов, поэтому кэш ответов может
+    оставаться локальным: запись в одном воркере меняет ключи во всех.
+    """
+
+    versions = dict(
+        ResourceVersion.objects.filter(
+            resource__in=resources
+        ).values_list('resource', 'version')
+    )
+    missing = [resource for resource in resources if resource not in versions]
+    if missing:
+        # начинаем с метки времени, чтобы не совпасть с ключами,
+        # оставшимися в кэше от прежней базы
+        start = int(time.time() * 1000)
+        ResourceVersion.objects.bulk_create(
+            [ResourceVersion(resource=resource, version=start)
+             for resource in missing],
+            ignore_conflicts=True
+        )
+        versions.update(
+            ResourceVersion.objects.filter(
+                resource__in=missing
+            ).values_list('resource', 'version')
+        )
+    return [versions[resource] for resource in resources]
+
+
+def bump_versions(resources):
+    """Увеличивает версии ресурсов после фиксации транзакции."""
+
+    def bump():
+        # ресурс без строки еще не кэшировался: get_versions создаст ее
+        ResourceVersion.objects.filter(resource__in=resources).update(
+            version=F('version') + 1
+        )
+
+    transaction.on_commit(bump)
+
+
+def get_role(user):
+    if not user.is_authenticated:
+        return 'anonymous'
+    if user.is_admin:
+        return 'admin'
+    return user.role or 'user'
+
+
+class CachedListMixin:
+    """Кэширует успешные ответы list.
+
+    cache_resources - ресурсы, от которых зависит ответ эндпоинта.
+    """
+
+    cache_resources = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def get_cache_key(self, request):
+        versions = get_versions(self.cache_resources)
+        raw = '|'.join((
+            request.path,
+            request.META.get('QUERY_STRING', ''),
+            get_role(request.user),
+            # JSON и браузерный API строятся по-разному
+            request.accepted_renderer.format,
+            ','.join(str(version) for version in versions),
+        ))
+        return RESPONSE_KEY.format(hashlib.sha1(raw.encode()).hexdigest())
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if not settings.API_CACHE_ENABLED:
+            return handler(request, *args, **kwargs)
+        cache = get_cache()
+        key = self.get_cache_key(request)
+        cached = cache.get(key)
+        if cached is not None:
+            _count('hits')
+            data, etag, last_modified = cached
+            response = Response(data)
+            if etag is not None:
+                set_validators(response, etag, last_modified)
+                response = get_conditional_response(
+                    request,
+                    etag=etag,
+                    last_modified=last_modified,
+                    response=response
+                )
+            response['X-Cache'] = 'HIT'
+            self.share_compression(request, response, key)
+            return response
+        _count('misses')
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, (
+                response.data,
+                response.get('ETag'),
+                parse_http_date_safe(response.get('Last-Modified')),
+            ))
+            self.share_compression(request, response, key)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def share_compression(self, request, response, key):
+        """Разрешает сжимать тело ответа один раз на ключ кэша.
+
+        Браузерный API выводит имя пользователя и CSRF-токен, а отступы
+        из Accept меняют байты JSON, поэтому такие ответы сжимаются
+        каждый раз.
+        """
+
+        renderer = request.accepted_renderer
+        if (
+            isinstance(renderer, JSONRenderer)
+            and request.accepted_media_type == renderer.media_type
+        ):
+            response.compression_key = key
+
+
+class CachedListRetrieveMixin(CachedListMixin):
+    """Кэширует успешные ответы list и retrieve."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
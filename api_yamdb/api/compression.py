@@ -0,0 +1,148 @@
+"""Сжатие ответов gzip и, если установлен brotli, br.
+
+Кодировка выбирается по Accept-Encoding, при равных весах br сжимает
+сильнее и выигрывает. Ответы меньше COMPRESSION_MIN_SIZE и уже сжатые
+не трогаются, потоковые сжимаются по частям.
+
+Ответ из кэша API (api/cache.py) несет ключ кэша в compression_key:
+сжатое тело кладется в тот же кэш рядом с ответом и на следующих
+попаданиях берется оттуда, а не сжимается заново. В ключе есть версии
+ресурсов, поэтому сжатые тела устаревают вместе с ответом.
+"""
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence, compress_string
+
+from api.cache import get_cache
+from api.metrics import COMPRESSION_CACHE_REQUESTS
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GZIP = 'gzip'
+BROTLI = 'br'
+COMPRESSIBLE_TYPES = (
+    'application/json', 'application/x-ndjson', 'text/'
+)
+COMPRESSED_KEY = '{}:{}'
+
+
+def available_encodings():
+    """Поддерживаемые кодировки в порядке предпочтения."""
+
+    if brotli is None:
+        return (GZIP,)
+    return (BROTLI, GZIP)
+
+
+def parse_accept_encoding(header):
+    """Веса кодировок из Accept-Encoding: {'gzip': 1.0, 'br': 0.5}."""
+
+    weights = {}
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        weight = 1.0
+        name, _, value = params.strip().partition('=')
+        if name.strip() == 'q':
+            try:
+                weight = float(value)
+            except ValueError:
+                weight = 0.0
+        weights[coding] = weight
+    return weights
+
+
+def choose_encoding(header):
+    """Лучшая из поддерживаемых кодировок или None."""
+
+    weights = parse_accept_encoding(header)
+    best, best_weight = None, 0.0
+    for coding in available_encodings():
+        weight = weights.get(coding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def compress(body, coding):
+    if coding == BROTLI:
+        return brotli.compress(
+            body, quality=settings.COMPRESSION_BROTLI_QUALITY
+        )
+    return compress_string(body)
+
+
+def compress_stream(chunks, coding):
+    if coding == GZIP:
+        yield from compress_sequence(chunks)
+        return
+    compressor = brotli.Compressor(
+        quality=settings.COMPRESSION_BROTLI_QUALITY
+    )
+    for chunk in chunks:
+        # flush после каждой части, чтобы клиент получал данные сразу
+        yield compressor.process(chunk) + compressor.flush()
+    yield compressor.finish()
+
+
+def compressed_content(response, coding):
+    """Сжатое тело, для ответов кэша API - сжатое один раз."""
+
+    key = getattr(response, 'compression_key', None)
+    if key is None:
+        return compress(response.content, coding)
+    cache = get_cache()
+    key = COMPRESSED_KEY.format(key, coding)
+    body = cache.get(key)
+    if body is not None:
+        COMPRESSION_CACHE_REQUESTS.labels('hits').inc()
+        return body
+    COMPRESSION_CACHE_REQUESTS.labels('misses').inc()
+    body = compress(response.content, coding)
+    cache.set(key, body)
+    return body
+
+
+def is_compressible(response):
+    content_type = response.get('Content-Type', '').lower()
+    return (
+        not response.has_header('Content-Encoding')
+        and content_type.startswith(COMPRESSIBLE_TYPES)
+        and (
+            response.streaming
+            or len(response.content) >= settings.COMPRESSION_MIN_SIZE
+        )
+    )
+
+
+def compress_response(request, response):
+    """Сжимает ответ кодировкой, которую принимает клиент."""
+
+    if not is_compressible(response):
+        return response
+    patch_vary_headers(response, ('Accept-Encoding',))
+    coding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    if coding is None:
+        return response
+    if response.streaming:
+        response.streaming_content = compress_stream(
+            response.streaming_content, coding
+        )
+        del response['Content-Length']
+    else:
+        content = compressed_content(response, coding)
+        if len(content) >= len(response.content):
+            return response
+        response.content = content
+        response['Content-Length'] = str(len(content))
+    # сжатое тело отличается байтами, но не смыслом: ETag становится слабым
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response['ETag'] = 'W/' + etag
+    response['Content-Encoding'] = coding
+    return response
@@ -0,0 +1,175 @@
+"""Условные GET-запросы (ETag / Last-Modified) для читающих эндпоинтов.
+
+У retrieve валидаторы считаются одним агрегатным запросом max(updated_at)
+и count() по той же выборке, что и ответ, поэтому 304 отдается без
+сериализации.
+
+ETag списка строится по его странице: ключам и датам изменения ее строк
+и ссылкам пагинатора (count у LimitOffsetPagination меняется и при
+удалении). Даты берутся из уже загруженных объектов, поэтому обычный
+запрос списка не делает лишних агрегатов по всей таблице, а страница
+читается заранее только при If-None-Match. Last-Modified у списков нет:
+удаление строки не сдвигает даты остальных.
+"""
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.db.models.constants import LOOKUP_SEP
+from django.http import Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def make_etag(*parts):
+    raw = '|'.join(str(part) for part in parts)
+    return '"{}"'.format(hashlib.sha1(raw.encode()).hexdigest())
+
+
+NOT_LOADED = object()
+
+
+def loaded_value(instance, path):
+    """Значение поля по пути вида 'author__updated_at' без запросов к базе.
+
+    NOT_LOADED, если поле отложено (only, defer) или связь не загружена.
+    """
+
+    *relations, name = path.split(LOOKUP_SEP)
+    for relation in relations:
+        field = instance._meta.get_field(relation)
+        if not field.is_cached(instance):
+            return NOT_LOADED
+        instance = field.get_cached_value(instance)
+        if instance is None:
+            return None
+    if name in instance.get_deferred_fields():
+        return NOT_LOADED
+    return getattr(instance, name)
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+
+
+class ConditionalGetMixin:
+    """Отдает 304 Not Modified для list и retrieve.
+
+    freshness_fields - поля с датой изменения, влияющие на ответ, в том
+    числе через связи, загруженные вместе со страницей.
+    """
+
+    freshness_fields = ('updated_at',)
+
+    def list(self, request, *args, **kwargs):
+        if 'HTTP_IF_NONE_MATCH' in request.META:
+            # страница читается до сериализации, list возьмет ее же
+            self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+            etag = self.get_page_etag(request)
+            if etag is not None:
+                not_modified = get_conditional_response(request, etag=etag)
+                if not_modified is not None:
+                    set_validators(not_modified, etag, None)
+                    return not_modified
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            etag = self.get_page_etag(request)
+            if etag is not None:
+                set_validators(response, etag, None)
+        return response
+
+    def paginate_queryset(self, queryset):
+        if self.action != 'list':
+            return super().paginate_queryset(queryset)
+        if not hasattr(self, '_page'):
+            self._page = super().paginate_queryset(queryset)
+        return self._page
+
+    def get_page_etag(self, request):
+        """ETag прочитанной страницы списка или None без пагинации."""
+
+        page = getattr(self, '_page', None)
+        if page is None:
+            return None
+        if not hasattr(self, '_page_etag'):
+            rows = [
+                (obj.pk, *(
+                    loaded_value(obj, field)
+                    for field in self.freshness_fields
+                ))
+                for obj in page
+            ]
+            if any(NOT_LOADED in row for row in rows):
+                # например, ?fields= без updated_at: добираем по ключам
+                stored = {
+                    row[0]: row
+                    for row in page[0]._meta.model._base_manager.filter(
+                        pk__in=[row[0] for row in rows]
+                    ).values_list('pk', *self.freshness_fields)
+                }
+                rows = [stored.get(row[0], row) for row in rows]
+            self._page_etag = make_etag(
+                request.get_full_path(),
+                request.accepted_renderer.format,
+                self.paginator.get_next_link(),
+                self.paginator.get_previous_link(),
+                getattr(self.paginator, 'count', None),
+                *rows
+            )
+        return self._page_etag
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = self.filter_queryset(self.get_queryset()).filter(
+                **{self.lookup_field: kwargs[lookup_url_kwarg]}
+            )
+        except (TypeError, ValueError, ValidationError):
+            # как get_object_or_404 в DRF: /titles/abc/ - это 404
+            raise Http404
+        return self.conditional_response(
+            queryset, super().retrieve, request, *args, **kwargs
+        )
+
+    def get_validators(self, request, queryset):
+        """Возвращает (etag, last_modified) или None для пустой выборки."""
+
+        aggregates = {
+            f'modified_{index}': Max(field)
+            for index, field in enumerate(self.freshness_fields)
+        }
+        row = queryset.order_by().aggregate(count=Count('pk'), **aggregates)
+        modified = [
+            row[name] for name in aggregates if row[name] is not None
+        ]
+        if not row['count'] or not modified:
+            return None
+        last_modified = max(modified)
+        etag = make_etag(
+            request.get_full_path(),
+            request.accepted_renderer.format,
+            row['count'],
+            *(row[name] for name in aggregates)
+        )
+        return etag, int(last_modified.timestamp())
+
+    def conditional_response(self, queryset, handler, request, *args,
+                             use_last_modified=True, **kwargs):
+        validators = self.get_validators(request, queryset)
+        if validators is None:
+            return handler(request, *args, **kwargs)
+        etag, last_modified = validators
+        if not use_last_modified:
+            last_modified = None
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is not None:
+            set_validators(not_modified, etag, last_modified)
+            return not_modified
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            set_validators(response, etag, last_modified)
+        return response
@@ -0,0 +1,153 @@
+"""Готовые JSON-документы произведений для list и retrieve.
+
+Страница произведений собирается склейкой сохраненных документов, без
+построения моделей жанров и категорий и без TitleSerializer. Документ
+хранит updated_at произведения, из которого собран: все, что меняет
+представление произведения, сдвигает эту дату.
+
+Документы пересобираются после фиксации записи (сигнал titles_changed,
+api/signals.py) и командой build_title_documents после массовой
+загрузки. Чтение ничего не пишет: вместо устаревшего документа ответ
+для этого произведения собирается сериализатором, поэтому list и
+retrieve работают и на реплике только для чтения.
+"""
+from django.conf import settings
+from django.db import transaction
+
+from rest_framework.response import Response
+
+from api.renderers import FastJSONRenderer, PreRenderedJSON
+from api.serializers import TitleSerializer
+from reviews.models import Title, TitleDocument
+
+DOCUMENT_COLUMNS = ('updated_at', 'document__body', 'document__updated_at')
+# сколько документов собирать одним запросом при пересборке
+REBUILD_BATCH_SIZE = 500
+
+
+def fresh_document(title):
+    """Актуальный документ произведения или None."""
+
+    try:
+        document = title.document
+    except TitleDocument.DoesNotExist:
+        return None
+    if document.updated_at != title.updated_at:
+        return None
+    return document
+
+
+def render_documents(pks):
+    """Собирает документы произведений, не сохраняя их."""
+
+    titles = list(
+        Title.objects.filter(pk__in=pks).select_related(
+            'category'
+        ).prefetch_related('genre')
+    )
+    renderer = FastJSONRenderer()
+    return [
+        TitleDocument(
+            title_id=title.pk,
+            body=renderer.render(data).decode(),
+            # версия из того же запроса, что и данные документа
+            updated_at=title.updated_at
+        )
+        for title, data in zip(titles, TitleSerializer(titles, many=True).data)
+    ]
+
+
+def build_documents(pks):
+    """Собирает и сохраняет документы произведений, возвращает {pk: body}."""
+
+    documents = render_documents(pks)
+    with transaction.atomic():
+        outdated = TitleDocument.objects.filter(
+            pk__in=[document.pk for document in documents]
+        )
+        outdated._raw_delete(outdated.db)
+        # параллельный запрос мог уже вставить такой же документ
+        TitleDocument.objects.bulk_create(documents, ignore_conflicts=True)
+    return {document.title_id: document.body for document in documents}
+
+
+def rebuild_changed_documents(since):
+    """Пересобирает устаревшие документы произведений, измененных с since.
+
+    Возвращает число собранных документов.
+    """
+
+    titles = Title.objects.filter(updated_at__gte=since).select_related(
+        'document'
+    ).only('updated_at', 'document__updated_at')
+    stale = [title.pk for title in titles if fresh_document(title) is None]
+    built = 0
+    for start in range(0, len(stale), REBUILD_BATCH_SIZE):
+        built += len(
+            build_documents(stale[start:start + REBUILD_BATCH_SIZE])
+        )
+    return built
+
+
+def get_bodies(titles):
+    """Документы произведений по порядку, без записи в базу.
+
+    Устаревшие документы собираются заново только для ответа, сохраняет
+    их запись, изменившая произведение.
+    """
+
+    bodies = {}
+    stale = []
+    for title in titles:
+        document = fresh_document(title)
+        if document is None:
+            stale.append(title.pk)
+        else:
+            bodies[title.pk] = document.body
+    if stale:
+        bodies.update(
+            (document.title_id, document.body)
+            for document in render_documents(stale)
+        )
+    # произведение могли удалить между чтением страницы и сборкой
+    return [bodies[title.pk] for title in titles if title.pk in bodies]
+
+
+class TitleDocumentMixin:
+    """Отдает list и retrieve произведений из готовых документов.
+
+    Используется, когда ответ целиком в JSON и рендерер умеет отдавать
+    готовый JSON: для ?fields= и браузерного API работает обычный путь
+    через сериализатор.
+    """
+
+    def use_documents(self):
+        return (
+            settings.TITLE_DOCUMENTS_ENABLED
+            and self.action in ('list', 'retrieve')
+            and self.get_sparse_fields() is None
+            and isinstance(self.request.accepted_renderer, FastJSONRenderer)
+        )
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_documents():
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            results = '[' + ','.join(get_bodies(list(queryset))) + ']'
+            return Response(PreRenderedJSON(results))
+        results = '[' + ','.join(get_bodies(page)) + ']'
+        envelope = self.get_paginated_response([]).data
+        # пагинаторы DRF и KeysetPagination ставят results последним
+        del envelope['results']
+        head = FastJSONRenderer().render(envelope).decode()[:-1]
+        separator = ',' if envelope else ''
+        return Response(PreRenderedJSON(
+            f'{head}{separator}"results":{results}}}'
+        ))
+
+    def retrieve(self, request, *args, **kwargs):
+        if not self.use_documents():
+            return super().retrieve(request, *args, **kwargs)
+        return Response(PreRenderedJSON(get_bodies([self.get_object()])[0]))
@@ -0,0 +1,70 @@
+"""Потоковая выгрузка каталога произведений в NDJSON.
+
+Произведения читаются через iterator() (серверный курсор на PostgreSQL),
+жанры подтягиваются одним запросом на пачку, поэтому память ограничена
+размером пачки независимо от размера каталога.
+"""
+import json
+import zlib
+from collections import defaultdict
+from itertools import islice
+
+from reviews.models import GenresTitle, Title
+
+EXPORT_CHUNK_SIZE = 2000
+TITLE_FIELDS = (
+    'id',
+    'name',
+    'year',
+    'rating',
+    'description',
+    'category__name',
+    'category__slug',
+)
+
+
+def iter_title_records(chunk_size=EXPORT_CHUNK_SIZE):
+    """Словари произведений в формате TitleSerializer."""
+
+    rows = Title.objects.order_by('pk').values(*TITLE_FIELDS).iterator(
+        chunk_size=chunk_size
+    )
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        genres = defaultdict(list)
+        links = GenresTitle.objects.filter(
+            title_id__in=[row['id'] for row in chunk]
+        ).order_by('genre__name').values_list(
+            'title_id', 'genre__name', 'genre__slug'
+        )
+        for title_id, name, slug in links:
+            genres[title_id].append({'name': name, 'slug': slug})
+        for row in chunk:
+            category_slug = row.pop('category__slug')
+            category_name = row.pop('category__name')
+            row['genre'] = genres[row['id']]
+            row['category'] = None if category_slug is None else {
+                'name': category_name, 'slug': category_slug
+            }
+            yield row
+
+
+def iter_ndjson(chunk_size=EXPORT_CHUNK_SIZE, compress=False):
+    """Строки NDJSON в байтах, при compress=True - поток gzip."""
+
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    buffer = []
+    for record in iter_title_records(chunk_size):
+        buffer.append(json.dumps(record, ensure_ascii=False))
+        if len(buffer) < chunk_size:
+            continue
+        data = ('\n'.join(buffer) + '\n').encode()
+        buffer = []
+        yield compressor.compress(data) if compressor else data
+    data = ('\n'.join(buffer) + '\n').encode() if buffer else b''
+    if compressor:
+        yield compressor.compress(data) + compressor.flush()
+    elif data:
+        yield data
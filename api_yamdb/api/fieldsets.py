@@ -0,0 +1,64 @@
+"""Выборочные поля ответа: ?fields=id,name и ?omit=description.
+
+Вьюсет проверяет запрошенные поля и передает их сериализатору через
+контекст, а сам сужает выборку, чтобы не читать из базы то, что не
+попадет в ответ.
+"""
+from rest_framework.exceptions import ValidationError
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+
+
+def split_fields(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def select_fields(params, available):
+    """Поля из available в их порядке или None, если нужны все."""
+
+    fields = split_fields(params.get(FIELDS_PARAM, ''))
+    omit = split_fields(params.get(OMIT_PARAM, ''))
+    if not fields and not omit:
+        return None
+    unknown = [name for name in fields + omit if name not in available]
+    if unknown:
+        raise ValidationError({
+            FIELDS_PARAM: [f'Неизвестные поля: {", ".join(unknown)}.']
+        })
+    return tuple(
+        name for name in available
+        if (not fields or name in fields) and name not in omit
+    )
+
+
+class SparseFieldsetSerializerMixin:
+    """Оставляет в сериализаторе только поля из context['sparse_fields']."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = self.context.get('sparse_fields')
+        if selected is not None:
+            for name in set(self.fields) - set(selected):
+                self.fields.pop(name)
+
+
+class SparseFieldsetMixin:
+    """Разбирает ?fields= и ?omit= для читающих действий вьюсета."""
+
+    sparse_actions = ('list', 'retrieve')
+
+    def get_sparse_fields(self):
+        if not hasattr(self, '_sparse_fields'):
+            self._sparse_fields = None
+            if self.action in self.sparse_actions:
+                self._sparse_fields = select_fields(
+                    self.request.query_params,
+                    self.get_serializer_class().Meta.fields
+                )
+        return self._sparse_fields
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['sparse_fields'] = self.get_sparse_fields()
+        return context
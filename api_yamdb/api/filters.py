@@ -1,13 +1,112 @@
 import django_filters
+from django.db.models import Exists, OuterRef
 
-from reviews.models import Title
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from api.pagination import order_by_fields
+from reviews.models import GenresTitle, Title
+from reviews.search import search_titles
+
+ORDERING_PARAM = 'ordering'
+GENRE_MODES = ('any', 'all')
+MAX_GENRES = 10
+
+
+def parse_ordering(params, fields):
+    """('-rating', '-id') для ?ordering=-rating или None.
+
+    fields - имена сортировки в API и поля модели. Второй ключ id идет в
+    том же направлении, чтобы порядок был однозначным, а индекс
+    (поле, id) читался в любую сторону без сортировки.
+    """
+
+    value = params.get(ORDERING_PARAM, '').strip()
+    if not value:
+        return None
+    prefix = '-' if value.startswith('-') else ''
+    field = fields.get(value[len(prefix):])
+    if field is None:
+        raise ValidationError({ORDERING_PARAM: [
+            f'Сортировка возможна по полям: {", ".join(fields)}.'
+        ]})
+    return (prefix + field, prefix + 'id')
+
+
+class OrderingFilter(BaseFilterBackend):
+    """Сортировка из view.get_ordering(), ее же использует курсор."""
+
+    def filter_queryset(self, request, queryset, view):
+        ordering = view.get_ordering()
+        if ordering is None:
+            return queryset
+        return order_by_fields(queryset, ordering)
 
 
 class TitleGenreFilter(django_filters.FilterSet):
+    q = django_filters.CharFilter(method='filter_search')
     name = django_filters.CharFilter(lookup_expr='icontains')
-    genre = django_filters.CharFilter(field_name='genre__slug')
+    genre = django_filters.CharFilter(method='filter_genre')
+    genre_mode = django_filters.ChoiceFilter(
+        choices=[(mode, mode) for mode in GENRE_MODES],
+        method='filter_nothing'
+    )
     category = django_filters.CharFilter(field_name='category__slug')
+    year_min = django_filters.NumberFilter(
+        field_name='year', lookup_expr='gte'
+    )
+    year_max = django_filters.NumberFilter(
+        field_name='year', lookup_expr='lte'
+    )
+    rating_min = django_filters.NumberFilter(
+        field_name='rating', lookup_expr='gte'
+    )
+    rating_max = django_filters.NumberFilter(
+        field_name='rating', lookup_expr='lte'
+    )
 
     class Meta:
         model = Title
         fields = ('name', 'year', 'category', 'genre')
+
+    def filter_search(self, queryset, name, value):
+        """Полнотекстовый поиск по названию и описанию с ранжированием."""
+
+        return search_titles(queryset, value)
+
+    def filter_nothing(self, queryset, name, value):
+        # genre_mode читает filter_genre
+        return queryset
+
+    def filter_genre(self, queryset, name, value):
+        """?genre=drama,comedy: любой из жанров или все (genre_mode=all).
+
+        Для нескольких жанров каждое условие - EXISTS по связям жанров,
+        поэтому произведение не повторяется в выдаче, сколько бы жанров
+        ни совпало. Один жанр дает не больше одной связи на произведение
+        (unique_genre_title), для него остается обычный JOIN по индексу.
+        """
+
+        slugs = list(dict.fromkeys(
+            slug.strip() for slug in value.split(',') if slug.strip()
+        ))
+        if not slugs:
+            return queryset
+        if len(slugs) > MAX_GENRES:
+            raise ValidationError({name: [
+                f'Не больше {MAX_GENRES} жанров за запрос.'
+            ]})
+        if len(slugs) == 1:
+            return queryset.filter(genre__slug=slugs[0])
+        links = GenresTitle.objects.filter(title=OuterRef('pk'))
+        if self.form.cleaned_data.get('genre_mode') == 'all':
+            groups = [[slug] for slug in slugs]
+        else:
+            groups = [slugs]
+        # Django 2.2 не фильтрует по Exists напрямую, только по аннотации
+        for index, group in enumerate(groups):
+            alias = f'has_genre_{index}'
+            queryset = queryset.annotate(**{
+                alias: Exists(links.filter(genre__slug__in=group))
+            }).filter(**{alias: True})
+        return queryset
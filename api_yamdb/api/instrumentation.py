@@ -0,0 +1,125 @@
+"""Замер SQL и фаз обработки запроса по именам маршрутов.
+
+Счетчики одного запроса собирает RequestStats: execute_wrapper считает
+запросы и время в базе, TimedSerializerMixin - время сериализации,
+а RequestInstrumentationMiddleware размечает границы view и отдает
+результат в заголовке Server-Timing и в гистограммы api.metrics.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class QueryBudgetExceededError(Exception):
+    """Маршрут выполнил больше SQL-запросов, чем разрешено бюджетом."""
+
+
+class RequestStats:
+    """Счетчики одного HTTP-запроса, время в секундах."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.view_started = None
+        self.view_finished = None
+        self.total_time = 0.0
+        self.serializing = False
+        # список (sql, время) ведется, только когда запрос профилируется
+        self.sql_log = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.db_time += elapsed
+            self.queries += 1
+            if self.sql_log is not None:
+                self.sql_log.append((sql, elapsed))
+
+    def finish(self):
+        finished = time.perf_counter()
+        self.total_time = finished - self.started
+        if self.view_started is not None and self.view_finished is None:
+            # обычный HttpResponse: рендеринга после view нет
+            self.view_finished = finished
+
+    @property
+    def view_time(self):
+        if self.view_started is None:
+            return 0.0
+        return self.view_finished - self.view_started
+
+    @property
+    def render_time(self):
+        if self.view_finished is None:
+            return 0.0
+        return self.started + self.total_time - self.view_finished
+
+    def server_timing(self):
+        return ', '.join((
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"',
+            f'serialize;dur={self.serialize_time * 1000:.1f}',
+            f'view;dur={self.view_time * 1000:.1f}',
+            f'render;dur={self.render_time * 1000:.1f}',
+            f'total;dur={self.total_time * 1000:.1f}',
+        ))
+
+
+def current_stats():
+    return getattr(_local, 'stats', None)
+
+
+def set_current_stats(stats):
+    _local.stats = stats
+
+
+def check_query_budget(method, route, stats):
+    """Логирует или бросает QueryBudgetExceededError при превышении бюджета.
+
+    Бюджеты задаются в API_QUERY_BUDGETS по ключу 'МЕТОД маршрут' или
+    просто 'маршрут', ключ '*' - бюджет для всех остальных запросов.
+    """
+
+    budgets = settings.API_QUERY_BUDGETS
+    budget = budgets.get(
+        f'{method} {route}', budgets.get(route, budgets.get('*'))
+    )
+    if budget is None or stats.queries <= budget:
+        return
+    message = (
+        f'{method} {route}: {stats.queries} SQL-запросов '
+        f'при бюджете {budget}'
+    )
+    if settings.API_QUERY_BUDGET_RAISE:
+        raise QueryBudgetExceededError(message)
+    logger.warning(message)
+
+
+class TimedSerializerMixin:
+    """Считает время to_representation внешнего сериализатора.
+
+    Вложенные сериализаторы и элементы списка внутри уже измеряемого
+    вызова повторно не засчитываются.
+    """
+
+    def to_representation(self, instance):
+        stats = current_stats()
+        if stats is None or stats.serializing:
+            return super().to_representation(instance)
+        stats.serializing = True
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            stats.serializing = False
+            stats.serialize_time += time.perf_counter() - started
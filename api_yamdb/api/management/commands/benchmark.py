@@ -0,0 +1,208 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment
+)
+
+from api.benchmark import (
+    DEFAULT_VOLUMES,
+    Volumes,
+    build_scenarios,
+    compare,
+    encode_payloads,
+    encode_throughput,
+    get_runtime,
+    make_clients,
+    run_benchmark,
+    seed_database,
+    uncovered_routes
+)
+
+DEFAULT_BASELINE = os.path.join(
+    settings.BASE_DIR, 'benchmarks', 'baseline.json'
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержку, число SQL-запросов и память на всех маршрутах '
+        'API во временной тестовой базе и сравнивает с базовой линией.'
+    )
+
+    def add_arguments(self, parser):
+        for field in Volumes._fields:
+            parser.add_argument(
+                f'--{field}',
+                type=float if field == 'comments' else int,
+                default=getattr(DEFAULT_VOLUMES, field),
+                help=(
+                    'Отзывов - всего, комментариев - в среднем на отзыв.'
+                    if field in ('reviews', 'comments')
+                    else f'Сколько создать: {field}.'
+                )
+            )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=100,
+            help='Сколько раз повторять каждый сценарий.'
+        )
+        parser.add_argument(
+            '--only',
+            help='Запускать только сценарии, в имени которых есть строка.'
+        )
+        parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+        parser.add_argument(
+            '--update-baseline',
+            action='store_true',
+            help='Записать результаты как новую базовую линию.'
+        )
+        parser.add_argument(
+            '--latency-threshold',
+            type=float,
+            default=0.5,
+            help='Допустимый относительный рост медианы задержки.'
+        )
+        parser.add_argument(
+            '--memory-threshold',
+            type=float,
+            default=0.25,
+            help='Допустимый относительный рост пиковой памяти.'
+        )
+        parser.add_argument(
+            '--encode-iterations',
+            type=int,
+            default=200,
+            help='Сколько раз кодировать каждую страницу в JSON, 0 - не '
+                 'замерять.'
+        )
+        parser.add_argument(
+            '--cache',
+            action='store_true',
+            help='Не отключать кэш ответов API.'
+        )
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations должен быть положительным.')
+        if options['genres'] < 2 or options['categories'] < 1:
+            raise CommandError(
+                'Сценариям нужны хотя бы два жанра и одна категория.'
+            )
+        volumes = Volumes(*(options[field] for field in Volumes._fields))
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            with override_settings(
+                API_CACHE_ENABLED=options['cache'],
+                API_QUERY_BUDGET_RAISE=False,
+                PROFILING_SAMPLE_RATE=0,
+                PROFILING_SLOW_THRESHOLD=None
+            ):
+                results = self.run(volumes, options)
+                encoding = {}
+                if options['encode_iterations'] > 0:
+                    encoding = encode_throughput(
+                        encode_payloads(), options['encode_iterations']
+                    )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        self.report_encoding(encoding)
+        self.report(volumes, results, options)
+
+    def run(self, volumes, options):
+        self.stdout.write(f'Заполнение базы ({connection.vendor}): {volumes}')
+        seeded = seed_database(volumes, options['seed'])
+        scenarios = build_scenarios(seeded)
+        missing = uncovered_routes(scenarios)
+        if missing:
+            self.stderr.write(f'Маршруты без сценариев: {", ".join(missing)}')
+        if options['only']:
+            scenarios = [
+                scenario for scenario in scenarios
+                if options['only'] in scenario.name
+            ]
+        try:
+            return run_benchmark(
+                scenarios, make_clients(seeded), options['iterations']
+            )
+        except RuntimeError as error:
+            raise CommandError(str(error))
+
+    def report_encoding(self, encoding):
+        if not encoding:
+            return
+        self.stdout.write(
+            f'{"кодирование JSON":28} {"страниц/с":>10} {"МБ/с":>8}'
+        )
+        for name, result in encoding.items():
+            self.stdout.write(
+                f'{name:28} {result["pages_per_s"]:10.1f} '
+                f'{result["mb_per_s"]:8.2f}'
+            )
+
+    def report(self, volumes, results, options):
+        self.stdout.write(
+            f'{"сценарий":28} {"p50 мс":>9} {"p95 мс":>9} {"p99 мс":>9} '
+            f'{"SQL":>4} {"память КБ":>10}'
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:28} {result["p50_ms"]:9.2f} {result["p95_ms"]:9.2f} '
+                f'{result["p99_ms"]:9.2f} {result["queries"]:4} '
+                f'{result["memory_kb"]:10.1f}'
+            )
+        path = options['baseline']
+        if options['update_baseline']:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as baseline_file:
+                json.dump({
+                    'runtime': get_runtime(),
+                    'volumes': volumes._asdict(),
+                    'results': results,
+                }, baseline_file, ensure_ascii=False, indent=2)
+                baseline_file.write('\n')
+            self.stdout.write(self.style.SUCCESS(
+                f'Базовая линия записана в {path}'
+            ))
+            return
+        if not os.path.exists(path):
+            self.stdout.write(f'Базовой линии {path} нет, сравнение пропущено')
+            return
+        with open(path, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get('volumes') != volumes._asdict():
+            self.stderr.write(
+                'Объемы данных отличаются от базовой линии, '
+                'сравнение может быть некорректным.'
+            )
+        memory_threshold = options['memory_threshold']
+        runtime = get_runtime()
+        if baseline.get('runtime') != runtime:
+            self.stderr.write(
+                f'Базовая линия записана в другой среде '
+                f'({baseline.get("runtime")}, сейчас {runtime}), '
+                'память не сравнивается.'
+            )
+            memory_threshold = None
+        regressions = compare(
+            results,
+            baseline['results'],
+            options['latency_threshold'],
+            memory_threshold
+        )
+        if regressions:
+            raise CommandError(
+                'Регрессии производительности:\n' + '\n'.join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS('Регрессий нет.'))
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+
+from api.cache import bump_versions
+from api.documents import build_documents, fresh_document
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    help = (
+        'Заранее собирает JSON-документы произведений, которых нет '
+        'или которые устарели.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Сколько произведений собирать за одну транзакцию.'
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Пересобрать и актуальные документы.'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_pk = 0
+        checked = built = 0
+        while True:
+            titles = list(
+                Title.objects.filter(pk__gt=last_pk).order_by(
+                    'pk'
+                ).select_related('document').only(
+                    'updated_at', 'document__updated_at'
+                )[:batch_size]
+            )
+            if not titles:
+                break
+            stale = [
+                title.pk for title in titles
+                if options['all'] or fresh_document(title) is None
+            ]
+            if stale:
+                built += len(build_documents(stale))
+            checked += len(titles)
+            last_pk = titles[-1].pk
+        if built:
+            bump_versions(('titles',))
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено произведений: {checked}, собрано документов: {built}'
+        ))
@@ -0,0 +1,37 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from api.export import EXPORT_CHUNK_SIZE, iter_ndjson
+
+
+class Command(BaseCommand):
+    help = 'Выгружает произведения с жанрами, категорией и рейтингом в NDJSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            help='Файл для выгрузки, по умолчанию stdout.'
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Сжать выгрузку gzip.'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=EXPORT_CHUNK_SIZE,
+            help='Размер пачки чтения из базы.'
+        )
+
+    def handle(self, *args, **options):
+        chunks = iter_ndjson(options['chunk_size'], compress=options['gzip'])
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                for chunk in chunks:
+                    output.write(chunk)
+        else:
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.profiling import get_store
+
+
+class Command(BaseCommand):
+    help = 'Показывает самые медленные сохраненные профили запросов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'capture_id',
+            nargs='?',
+            help='Показать функции и SQL одного профиля.'
+        )
+        parser.add_argument(
+            '--route',
+            help='Только профили маршрута, например titles-list.'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=20,
+            help='Сколько профилей или функций выводить.'
+        )
+
+    def handle(self, *args, **options):
+        store = get_store()
+        if options['capture_id']:
+            try:
+                capture = store.load(options['capture_id'] + '.json')
+            except FileNotFoundError:
+                raise CommandError(
+                    f'Профиль {options["capture_id"]} не найден.'
+                )
+            self.show(capture, options['limit'])
+            return
+        captures = [
+            capture for capture in store.captures()
+            if options['route'] in (None, capture['route'])
+        ]
+        captures.sort(key=lambda capture: capture['duration'], reverse=True)
+        for capture in captures[:options['limit']]:
+            self.stdout.write(
+                f'{capture["id"]}  {capture["duration"] * 1000:8.1f} мс  '
+                f'{len(capture["queries"]):3} SQL  {capture["kind"]:8}  '
+                f'{capture["method"]} {capture["path"]}'
+            )
+        if not captures:
+            self.stdout.write('Профилей нет.')
+
+    def show(self, capture, limit):
+        self.stdout.write(
+            f'{capture["method"]} {capture["path"]} -> {capture["status"]}, '
+            f'{capture["duration"] * 1000:.1f} мс ({capture["kind"]})'
+        )
+        self.stdout.write('\nФункции по cumulative-времени:')
+        for row in capture['functions'][:limit]:
+            self.stdout.write(
+                f'{row["cumulative"] * 1000:8.1f} мс  {row["function"]}'
+            )
+        self.stdout.write(f'\nSQL ({len(capture["queries"])}):')
+        for query in capture['queries']:
+            self.stdout.write(
+                f'{query["time"] * 1000:8.1f} мс  {query["sql"]}'
+            )
@@ -0,0 +1,123 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.metrics import TIME_BUCKETS
+from api.replay import load_entries, replay, role_tokens, summarize
+
+
+def parse_token(value):
+    role, _, token = value.partition('=')
+    if not role or not token:
+        raise ValueError
+    return role, token
+
+
+class Command(BaseCommand):
+    help = (
+        'Воспроизводит JSONL-лог запросов в приложении или на сервере и '
+        'показывает пропускную способность, задержки, ошибки и SQL.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('log', help='JSONL-файл с запросами.')
+        parser.add_argument(
+            '--base-url',
+            help='Отправлять по HTTP, например http://localhost:8000. '
+                 'Без флага запросы идут в приложение в этом процессе.'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=1,
+            help='Сколько запросов выполнять одновременно.'
+        )
+        parser.add_argument(
+            '--pool',
+            choices=('thread', 'process'),
+            default='thread',
+            help='Пул потоков или процессов.'
+        )
+        parser.add_argument(
+            '--speed',
+            type=float,
+            help='Соблюдать интервалы по ts, ускорив их во столько раз. '
+                 'Без флага запросы идут без пауз.'
+        )
+        parser.add_argument(
+            '--token',
+            action='append',
+            default=[],
+            metavar='ROLE=JWT',
+            help='Токен для роли; иначе выпускается для пользователя '
+                 'с этой ролью из локальной базы.'
+        )
+        parser.add_argument('--timeout', type=float, default=30)
+        parser.add_argument(
+            '--json',
+            dest='json_path',
+            help='Записать сводку в JSON-файл.'
+        )
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1:
+            raise CommandError('--concurrency должен быть положительным.')
+        if options['speed'] is not None and options['speed'] <= 0:
+            raise CommandError('--speed должен быть положительным.')
+        try:
+            overrides = dict(parse_token(value) for value in options['token'])
+        except ValueError:
+            raise CommandError('--token задается как роль=токен.')
+        try:
+            with open(options['log'], encoding='utf-8') as log_file:
+                entries = load_entries(log_file)
+            tokens = role_tokens(
+                {entry.role for entry in entries}, overrides
+            )
+        except FileNotFoundError:
+            raise CommandError(f'Файл {options["log"]} не найден.')
+        except ValueError as error:
+            raise CommandError(str(error))
+        if not entries:
+            raise CommandError('В логе нет запросов.')
+        results, wall_time = replay(
+            entries,
+            base_url=options['base_url'],
+            tokens=tokens,
+            concurrency=options['concurrency'],
+            pool=options['pool'],
+            speed=options['speed'],
+            timeout=options['timeout']
+        )
+        summary = summarize(results, wall_time)
+        self.report(summary)
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as file:
+                json.dump(summary, file, ensure_ascii=False, indent=2)
+
+    def report(self, summary):
+        self.stdout.write(
+            f'Запросов: {summary["requests"]} за {summary["wall_time"]} с, '
+            f'{summary["throughput"]} запр/с, ошибок: {summary["errors"]} '
+            f'({summary["error_rate"]:.2%}), SQL: {summary["queries"]}'
+        )
+        self.stdout.write(
+            f'\n{"маршрут":28} {"запр":>6} {"5xx":>5} {"4xx":>5} '
+            f'{"p50 мс":>9} {"p95 мс":>9} {"p99 мс":>9} {"SQL":>7}'
+        )
+        for route, row in summary['routes'].items():
+            queries = '-' if row['queries'] is None else row['queries']
+            self.stdout.write(
+                f'{route:28} {row["requests"]:6} {row["errors"]:5} '
+                f'{row["client_errors"]:5} {row["p50_ms"]:9.2f} '
+                f'{row["p95_ms"]:9.2f} {row["p99_ms"]:9.2f} {queries:>7}'
+            )
+        bounds = [f'≤{bound * 1000:g}' for bound in TIME_BUCKETS] + ['>']
+        self.stdout.write('\nГистограммы задержки, мс:')
+        self.stdout.write(f'{"":28} ' + ' '.join(
+            f'{bound:>6}' for bound in bounds
+        ))
+        for route, row in summary['routes'].items():
+            self.stdout.write(f'{route:28} ' + ' '.join(
+                f'{count:6}' for count in row['histogram']
+            ))
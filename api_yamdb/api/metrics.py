@@ -0,0 +1,98 @@
+"""Метрики приложения в формате Prometheus.
+
+Под gunicorn с несколькими воркерами задайте PROMETHEUS_MULTIPROC_DIR
+(это делает gunicorn.conf.py): каждый воркер пишет значения в свои
+mmap-файлы, а /metrics собирает их все, так что один scrape видит весь
+инстанс. Без переменной метрики живут в памяти процесса.
+"""
+import os
+
+from django.http import HttpResponse
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess
+)
+
+TIME_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+QUERY_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+REQUEST_DURATION = Histogram(
+    'yamdb_http_request_duration_seconds',
+    'Время обработки запроса.',
+    ['route', 'method'],
+    buckets=TIME_BUCKETS
+)
+REQUESTS = Counter(
+    'yamdb_http_requests_total',
+    'Обработанные запросы по коду ответа.',
+    ['route', 'method', 'status']
+)
+IN_PROGRESS = Gauge(
+    'yamdb_http_requests_in_progress',
+    'Запросы, обрабатываемые прямо сейчас.',
+    multiprocess_mode='livesum'
+)
+DB_QUERIES = Histogram(
+    'yamdb_db_queries',
+    'Число SQL-запросов на HTTP-запрос.',
+    ['route'],
+    buckets=QUERY_BUCKETS
+)
+DB_DURATION = Histogram(
+    'yamdb_db_duration_seconds',
+    'Время в базе данных на HTTP-запрос.',
+    ['route'],
+    buckets=TIME_BUCKETS
+)
+SERIALIZE_DURATION = Histogram(
+    'yamdb_serialize_duration_seconds',
+    'Время сериализации на HTTP-запрос.',
+    ['route'],
+    buckets=TIME_BUCKETS
+)
+CACHE_REQUESTS = Counter(
+    'yamdb_api_cache_requests_total',
+    'Обращения к кэшу ответов API.',
+    ['result']
+)
+COMPRESSION_CACHE_REQUESTS = Counter(
+    'yamdb_compression_cache_requests_total',
+    'Обращения к кэшу сжатых тел ответов API.',
+    ['result']
+)
+AUTH_FAILURES = Counter(
+    'yamdb_auth_failures_total',
+    'Отклоненные попытки аутентификации.',
+    ['reason']
+)
+
+
+def observe_request(route, method, status, stats):
+    REQUEST_DURATION.labels(route, method).observe(stats.total_time)
+    REQUESTS.labels(route, method, status).inc()
+    DB_QUERIES.labels(route).observe(stats.queries)
+    DB_DURATION.labels(route).observe(stats.db_time)
+    SERIALIZE_DURATION.labels(route).observe(stats.serialize_time)
+
+
+def get_registry():
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def metrics_view(request):
+    return HttpResponse(
+        generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST
+    )
@@ -0,0 +1,142 @@
+import cProfile
+import random
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from api import metrics
+from api.compression import compress_response
+from api.instrumentation import (
+    RequestStats,
+    check_query_budget,
+    set_current_stats
+)
+from api.profiling import (
+    build_capture,
+    cprofile_top,
+    get_sampler,
+    get_store
+)
+
+UNRESOLVED_ROUTE = 'unresolved'
+
+
+def get_route(request):
+    """Имя маршрута (titles-list, reviews-detail) вместо пути с id."""
+
+    match = getattr(request, 'resolver_match', None)
+    if match is None or not match.view_name:
+        return UNRESOLVED_ROUTE
+    return match.view_name
+
+
+class RequestInstrumentationMiddleware:
+    """Считает SQL и время фаз запроса по маршрутам.
+
+    view - от вызова view до возврата ответа, включая db и serialize,
+    render - рендеринг ответа DRF после view.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = request.instrumentation = RequestStats()
+        set_current_stats(stats)
+        metrics.IN_PROGRESS.inc()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(stats))
+                response = self.get_response(request)
+        finally:
+            set_current_stats(None)
+            metrics.IN_PROGRESS.dec()
+        stats.finish()
+        route = get_route(request)
+        metrics.observe_request(
+            route, request.method, response.status_code, stats
+        )
+        if settings.SERVER_TIMING_ENABLED:
+            response['Server-Timing'] = stats.server_timing()
+        check_query_budget(request.method, route, stats)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.instrumentation.view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        request.instrumentation.view_finished = time.perf_counter()
+        return response
+
+
+class RequestProfilingMiddleware:
+    """Сохраняет профили выборки запросов и запросов дольше порога.
+
+    Должен стоять после RequestInstrumentationMiddleware, чтобы в снимок
+    попал список SQL. Без настроек профилирования отключается целиком.
+    """
+
+    def __init__(self, get_response):
+        if (
+            not settings.PROFILING_SAMPLE_RATE
+            and settings.PROFILING_SLOW_THRESHOLD is None
+        ):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sampled = random.random() < settings.PROFILING_SAMPLE_RATE
+        threshold = settings.PROFILING_SLOW_THRESHOLD
+        if not sampled and threshold is None:
+            return self.get_response(request)
+        stats = getattr(request, 'instrumentation', None)
+        if stats is not None:
+            stats.sql_log = []
+        started = time.perf_counter()
+        if sampled:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+            duration = time.perf_counter() - started
+            kind, functions = 'cprofile', cprofile_top(profiler)
+        else:
+            sampler = get_sampler()
+            thread_id = threading.get_ident()
+            sampler.start(thread_id)
+            try:
+                response = self.get_response(request)
+            finally:
+                sample = sampler.stop(thread_id)
+            duration = time.perf_counter() - started
+            if duration < threshold:
+                return response
+            kind, functions = 'sampling', sampler.top(sample)
+        get_store().save(build_capture(
+            request, get_route(request), response, duration, stats, kind,
+            functions
+        ))
+        return response
+
+
+class ResponseCompressionMiddleware:
+    """Сжимает ответы gzip или br по Accept-Encoding (api/compression.py).
+
+    Стоит после инструментирования, чтобы сжатие попало во время запроса,
+    и до всех, кто читает или меняет тело ответа.
+    """
+
+    def __init__(self, get_response):
+        if not settings.COMPRESSION_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return compress_response(request, self.get_response(request))
@@ -0,0 +1,30 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:40
+
+import time
+
+from django.db import migrations
+
+RESOURCES = ('titles', 'genres', 'categories', 'reviews', 'comments')
+
+
+def create_versions(apps, schema_editor):
+    """Заводит версии кэшируемых ресурсов до первого запроса к API."""
+
+    ResourceVersion = apps.get_model('api', 'ResourceVersion')
+    start = int(time.time() * 1000)
+    ResourceVersion.objects.bulk_create(
+        [ResourceVersion(resource=resource, version=start)
+         for resource in RESOURCES],
+        ignore_conflicts=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_versions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+from django.db import models
+
+
+class ResourceVersion(models.Model):
+    """Версия ресурса в ключах кэша ответов (api/cache.py).
+
+    Версии лежат в базе, а не в кэше процесса: запись, обработанная одним
+    воркером gunicorn, сразу меняет ключи ответов во всех остальных.
+    """
+
+    resource = models.CharField(
+        verbose_name='Ресурс',
+        max_length=32,
+        primary_key=True
+    )
+    version = models.BigIntegerField(verbose_name='Версия')
+
+    class Meta:
+        verbose_name = 'Версия ресурса'
+        verbose_name_plural = 'Версии ресурсов'
+
+    def __str__(self):
+        return f'{self.resource}: {self.version}'
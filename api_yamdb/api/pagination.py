@@ -0,0 +1,209 @@
+import base64
+import binascii
+import json
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import F, Q
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def flip(field):
+    return field[1:] if field.startswith('-') else f'-{field}'
+
+
+def order_by_fields(queryset, ordering):
+    """order_by по полям вида '-rating', NULL меньше любого значения.
+
+    Так NULL сортирует SQLite, PostgreSQL по умолчанию считает его
+    наибольшим, поэтому для него порядок NULL задается явно.
+    """
+
+    if connections[queryset.db].vendor != 'postgresql':
+        return queryset.order_by(*ordering)
+    expressions = []
+    for field in ordering:
+        name = field.lstrip('-')
+        if not queryset.model._meta.get_field(name).null:
+            expressions.append(field)
+        elif field.startswith('-'):
+            expressions.append(F(name).desc(nulls_last=True))
+        else:
+            expressions.append(F(name).asc(nulls_first=True))
+    return queryset.order_by(*expressions)
+
+
+class KeysetPagination(BasePagination):
+    """Пагинация по ключу сортировки без OFFSET и COUNT(*).
+
+    Курсор хранит значения полей ordering последнего (первого) объекта
+    страницы, следующая страница выбирается условием «строго после»
+    по этим полям, поэтому глубина листания не влияет на стоимость запроса.
+    Поле с минусом сортируется по убыванию, NULL меньше любого значения.
+    """
+
+    ordering = ('id',)
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'limit'
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position, self.reverse = self.decode_cursor(request, queryset)
+
+        ordering = self.ordering
+        if self.reverse:
+            ordering = tuple(flip(field) for field in ordering)
+        if position is not None:
+            queryset = queryset.filter(
+                self.build_filter(position, ordering, queryset.model)
+            )
+        results = list(
+            order_by_fields(queryset, ordering)[:self.page_size + 1]
+        )
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if self.reverse:
+            results.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def build_filter(self, position, ordering, model):
+        """Лексикографическое сравнение (f1, f2, ...) > (v1, v2, ...)."""
+
+        conditions = []
+        for index, field in enumerate(ordering):
+            after = self.after(field, position[index], model)
+            if after is None:
+                continue
+            for previous, value in zip(ordering[:index], position[:index]):
+                after &= self.equal(previous.lstrip('-'), value)
+            conditions.append(after)
+        return reduce(or_, conditions, Q(pk__in=[]))
+
+    def equal(self, name, value):
+        if value is None:
+            return Q(**{f'{name}__isnull': True})
+        return Q(**{name: value})
+
+    def after(self, field, value, model):
+        """Условие «строго после value» по полю или None, если таких нет."""
+
+        name = field.lstrip('-')
+        descending = field.startswith('-')
+        if value is None:
+            # NULL наименьший: после него только непустые при возрастании
+            if descending:
+                return None
+            return Q(**{f'{name}__isnull': False})
+        if not descending:
+            return Q(**{f'{name}__gt': value})
+        condition = Q(**{f'{name}__lt': value})
+        if model._meta.get_field(name).null:
+            condition |= Q(**{f'{name}__isnull': True})
+        return condition
+
+    def decode_cursor(self, request, queryset):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            cursor = json.loads(
+                base64.urlsafe_b64decode(encoded.encode('ascii'))
+            )
+            values = cursor['p']
+            if len(values) != len(self.ordering):
+                raise ValueError
+            position = [
+                queryset.model._meta.get_field(
+                    field.lstrip('-')
+                ).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+            return position, bool(cursor.get('r'))
+        except (
+            TypeError, ValueError, KeyError, binascii.Error, ValidationError
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance, reverse):
+        values = []
+        for field in self.ordering:
+            value = getattr(instance, field.lstrip('-'))
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            values.append(value)
+        cursor = {'p': values}
+        if reverse:
+            cursor['r'] = 1
+        encoded = base64.urlsafe_b64encode(
+            json.dumps(cursor, separators=(',', ':')).encode()
+        ).decode('ascii')
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            encoded
+        )
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+
+class PubDateKeysetPagination(KeysetPagination):
+    """Курсорная пагинация отзывов и комментариев."""
+
+    ordering = ('pub_date', 'id')
+
+
+class NameKeysetPagination(KeysetPagination):
+    """Курсорная пагинация произведений."""
+
+    ordering = ('name', 'id')
@@ -0,0 +1,42 @@
+"""JSON-парсер на orjson с запасным путем через json.
+
+Тело в UTF-8 без длинных чисел разбирает orjson. Длинные числа orjson
+превращает в float, а не в int, поэтому такие тела, как и тела в других
+кодировках и с ошибками, разбирает обычный json: результат и текст
+ошибки совпадают с JSONParser.
+"""
+import re
+
+from django.conf import settings
+
+from rest_framework import parsers
+from rest_framework.exceptions import ParseError
+from rest_framework.utils import json
+
+from api.renderers import FastJSONRenderer, orjson
+
+# от 19 цифр подряд число может не поместиться в 64 бита
+LONG_NUMBER_RE = re.compile(rb'\d{19}')
+UTF8 = ('utf-8', 'utf8')
+
+
+class FastJSONParser(parsers.JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or not self.strict or encoding.lower() not in UTF8:
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        if not LONG_NUMBER_RE.search(body):
+            try:
+                return orjson.loads(body)
+            except orjson.JSONDecodeError:
+                pass
+        try:
+            return json.loads(
+                body.decode(encoding), parse_constant=json.strict_constant
+            )
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -82,7 +82,7 @@ class IsAuthorOrVIPRole(permissions.BasePermission):
                 request.user.is_authenticated
                 and (
                     request.user.is_vip
-                    or obj.author == request.user
+                    or obj.author_id == request.user.pk
                 )
             )
         )
@@ -0,0 +1,200 @@
+"""Профилирование выборки запросов и медленных запросов.
+
+Доля PROFILING_SAMPLE_RATE запросов профилируется cProfile целиком.
+Остальные, если задан PROFILING_SLOW_THRESHOLD, наблюдает семплер стека:
+фоновый поток раз в PROFILING_SAMPLE_INTERVAL снимает стеки активных
+запросов, и запрос дольше порога сохраняется вместе с функциями, чаще
+всего встречавшимися в стеке. Снимки вместе со списком SQL лежат в
+каталоге PROFILING_DIR, старые удаляются сверх PROFILING_MAX_FILES.
+"""
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+
+TOP_FUNCTIONS = 40
+MAX_SQL_LENGTH = 2000
+UNSAFE_CHARS_RE = re.compile(r'[^\w.-]+')
+
+
+def format_function(filename, line, name):
+    return f'{filename}:{line}({name})'
+
+
+def cprofile_top(profiler, limit=TOP_FUNCTIONS):
+    """Функции с наибольшим cumulative-временем по данным cProfile."""
+
+    stats = pstats.Stats(profiler)
+    rows = []
+    for (filename, line, name), row in stats.stats.items():
+        calls, _, own_time, cumulative, _ = row
+        rows.append({
+            'function': format_function(filename, line, name),
+            'calls': calls,
+            'own': own_time,
+            'cumulative': cumulative,
+        })
+    rows.sort(key=lambda row: row['cumulative'], reverse=True)
+    return rows[:limit]
+
+
+class StackSampler:
+    """Периодически снимает стеки потоков, обрабатывающих запросы.
+
+    Для каждой функции считается число снимков, в которых она была в
+    стеке, - оценка cumulative-времени с точностью до интервала.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.active = {}
+        self.lock = threading.Lock()
+        self.has_work = threading.Event()
+        self.thread = None
+
+    def ensure_running(self):
+        # поток не переживает fork, поэтому запускается в воркере лениво
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(
+                target=self.run, name='stack-sampler', daemon=True
+            )
+            self.thread.start()
+
+    def start(self, thread_id):
+        with self.lock:
+            self.ensure_running()
+            self.active[thread_id] = [Counter(), 0]
+            self.has_work.set()
+
+    def stop(self, thread_id):
+        with self.lock:
+            return self.active.pop(thread_id, (Counter(), 0))
+
+    def run(self):
+        while True:
+            # без активных запросов поток спит, а не просыпается впустую
+            self.has_work.wait()
+            time.sleep(self.interval)
+            with self.lock:
+                if not self.active:
+                    self.has_work.clear()
+                    continue
+                frames = sys._current_frames()
+                for thread_id, sample in self.active.items():
+                    frame = frames.get(thread_id)
+                    seen = set()
+                    while frame is not None:
+                        code = frame.f_code
+                        key = (code.co_filename, code.co_firstlineno,
+                               code.co_name)
+                        if key not in seen:
+                            seen.add(key)
+                            sample[0][key] += 1
+                        frame = frame.f_back
+                    sample[1] += 1
+
+    def top(self, sample, limit=TOP_FUNCTIONS):
+        counts, _ = sample
+        return [
+            {
+                'function': format_function(*key),
+                'samples': count,
+                'cumulative': count * self.interval,
+            }
+            for key, count in counts.most_common(limit)
+        ]
+
+
+class ProfileStore:
+    """Каталог снимков: один JSON-файл на запрос, имя - время и маршрут."""
+
+    def __init__(self, path, max_files):
+        self.path = path
+        self.max_files = max_files
+
+    def save(self, capture):
+        os.makedirs(self.path, exist_ok=True)
+        name = '{}_{}_{}.json'.format(
+            int(capture['timestamp'] * 1000000),
+            UNSAFE_CHARS_RE.sub('-', capture['route']),
+            os.getpid()
+        )
+        tmp_path = os.path.join(self.path, '.' + name)
+        with open(tmp_path, 'w', encoding='utf-8') as capture_file:
+            json.dump(capture, capture_file, ensure_ascii=False)
+        os.replace(tmp_path, os.path.join(self.path, name))
+        self.rotate()
+        return name
+
+    def names(self):
+        try:
+            return sorted(
+                name for name in os.listdir(self.path)
+                if name.endswith('.json') and not name.startswith('.')
+            )
+        except FileNotFoundError:
+            return []
+
+    def rotate(self):
+        names = self.names()
+        for name in names[:max(len(names) - self.max_files, 0)]:
+            try:
+                os.remove(os.path.join(self.path, name))
+            except FileNotFoundError:
+                # снимок уже удалил другой воркер
+                pass
+
+    def load(self, name):
+        with open(os.path.join(self.path, name), encoding='utf-8') as file:
+            capture = json.load(file)
+        capture['id'] = name[:-len('.json')]
+        return capture
+
+    def captures(self):
+        for name in self.names():
+            try:
+                yield self.load(name)
+            except (FileNotFoundError, ValueError):
+                continue
+
+
+def get_store():
+    return ProfileStore(settings.PROFILING_DIR, settings.PROFILING_MAX_FILES)
+
+
+_sampler = None
+
+
+def get_sampler():
+    global _sampler
+    if _sampler is None:
+        _sampler = StackSampler(settings.PROFILING_SAMPLE_INTERVAL)
+    return _sampler
+
+
+def build_capture(request, route, response, duration, stats, kind,
+                  functions):
+    queries = []
+    if stats is not None and stats.sql_log is not None:
+        queries = [
+            {'sql': sql[:MAX_SQL_LENGTH], 'time': elapsed}
+            for sql, elapsed in stats.sql_log
+        ]
+    return {
+        'timestamp': time.time(),
+        'route': route,
+        'method': request.method,
+        'path': request.get_full_path(),
+        'status': response.status_code,
+        'duration': duration,
+        'db_time': stats.db_time if stats is not None else None,
+        'kind': kind,
+        'functions': functions,
+        'queries': queries,
+    }
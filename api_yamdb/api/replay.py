@@ -0,0 +1,287 @@
+"""Воспроизведение записанного трафика.
+
+Лог - JSONL, одна строка на запрос:
+{"method": "GET", "path": "/api/v1/titles/", "body": {...},
+"role": "user", "ts": 1700000000.5}. Обязательны только method и path,
+role по умолчанию anonymous, ts нужен для воспроизведения с исходными
+интервалами (--speed).
+
+Запросы отправляются либо прямо в WSGI-приложение через тестовый клиент,
+либо по HTTP на базовый URL, пулом потоков или процессов. Число
+SQL-запросов в первом случае берется из инструментирования запроса, во
+втором - из заголовка Server-Timing (SERVER_TIMING_ENABLED на сервере).
+"""
+import json
+import re
+import threading
+import time
+from collections import defaultdict, namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from django.db import connections
+from django.db.models import Q
+from django.test import Client
+from django.urls import Resolver404, resolve
+
+from api.benchmark import percentile
+from api.metrics import TIME_BUCKETS
+from api.middleware import UNRESOLVED_ROUTE
+from users.models import User
+from users.tokens import RoleAccessToken
+
+ANONYMOUS = 'anonymous'
+ROLES = (ANONYMOUS, 'user', 'moderator', 'admin')
+SERVER_TIMING_QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+# статус запроса, на который не пришел ответ
+NO_RESPONSE = 0
+
+Entry = namedtuple('Entry', 'method path body role ts')
+Result = namedtuple('Result', 'route status duration queries')
+
+
+def parse_entry(line):
+    data = json.loads(line)
+    if not isinstance(data, dict):
+        raise ValueError('ожидается объект')
+    method = data.get('method')
+    path = data.get('path')
+    if not isinstance(method, str) or not method:
+        raise ValueError('нет method')
+    if not isinstance(path, str) or not path.startswith('/'):
+        raise ValueError('path должен начинаться с /')
+    role = data.get('role') or ANONYMOUS
+    if role not in ROLES:
+        raise ValueError(f'неизвестная роль {role}')
+    return Entry(
+        method.upper(), path, data.get('body'), role, data.get('ts')
+    )
+
+
+def load_entries(lines):
+    entries = []
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            entries.append(parse_entry(line))
+        except ValueError as error:
+            raise ValueError(f'строка {number}: {error}')
+    return entries
+
+
+def role_tokens(roles, overrides=None):
+    """Токены доступа для ролей из лога.
+
+    Явно переданные токены (нужны для чужого сервера) важнее, остальные
+    выпускаются для первого пользователя с ролью в локальной базе.
+    """
+
+    tokens = dict(overrides or {})
+    for role in set(roles) - set(tokens) - {ANONYMOUS}:
+        users = User.objects.filter(role=role)
+        if role == 'admin':
+            users = User.objects.filter(Q(role=role) | Q(is_superuser=True))
+        user = users.order_by('pk').first()
+        if user is None:
+            raise ValueError(f'Нет пользователя с ролью {role}.')
+        tokens[role] = str(RoleAccessToken.for_user(user))
+    return tokens
+
+
+def route_for_path(path):
+    try:
+        return resolve(urlsplit(path).path).view_name or UNRESOLVED_ROUTE
+    except Resolver404:
+        return UNRESOLVED_ROUTE
+
+
+class InProcessTarget:
+    """Запросы в WSGI-приложение текущего процесса, клиент на поток."""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.local = threading.local()
+
+    def client(self):
+        if not hasattr(self.local, 'client'):
+            self.local.client = Client()
+        return self.local.client
+
+    def send(self, entry):
+        extra = {}
+        if entry.role in self.tokens:
+            extra['HTTP_AUTHORIZATION'] = f'Bearer {self.tokens[entry.role]}'
+        data = '' if entry.body is None else json.dumps(entry.body)
+        started = time.perf_counter()
+        response = self.client().generic(
+            entry.method, entry.path, data,
+            content_type='application/json', **extra
+        )
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        duration = time.perf_counter() - started
+        stats = getattr(response.wsgi_request, 'instrumentation', None)
+        return Result(
+            route_for_path(entry.path),
+            response.status_code,
+            duration,
+            stats.queries if stats is not None else None
+        )
+
+
+class HTTPTarget:
+    """Запросы по HTTP на базовый URL, сессия на поток."""
+
+    def __init__(self, base_url, tokens, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.tokens = tokens
+        self.timeout = timeout
+        self.local = threading.local()
+
+    def session(self):
+        if not hasattr(self.local, 'session'):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def send(self, entry):
+        headers = {}
+        if entry.role in self.tokens:
+            headers['Authorization'] = f'Bearer {self.tokens[entry.role]}'
+        route = route_for_path(entry.path)
+        started = time.perf_counter()
+        try:
+            response = self.session().request(
+                entry.method, self.base_url + entry.path, json=entry.body,
+                headers=headers, timeout=self.timeout
+            )
+        except requests.RequestException:
+            return Result(
+                route, NO_RESPONSE, time.perf_counter() - started, None
+            )
+        duration = time.perf_counter() - started
+        match = SERVER_TIMING_QUERIES_RE.search(
+            response.headers.get('Server-Timing', '')
+        )
+        return Result(
+            route,
+            response.status_code,
+            duration,
+            int(match.group(1)) if match else None
+        )
+
+
+def make_target(base_url, tokens, timeout):
+    if base_url:
+        return HTTPTarget(base_url, tokens, timeout)
+    return InProcessTarget(tokens)
+
+
+_worker_target = None
+
+
+def _init_worker(base_url, tokens, timeout):
+    global _worker_target
+    _worker_target = make_target(base_url, tokens, timeout)
+
+
+def _send_in_worker(entry):
+    return _worker_target.send(entry)
+
+
+def paced(entries, speed):
+    """Выдает записи с исходными интервалами по ts, ускоренными в speed."""
+
+    started = time.monotonic()
+    first_ts = None
+    for entry in entries:
+        if speed and entry.ts is not None:
+            if first_ts is None:
+                first_ts = entry.ts
+            delay = (entry.ts - first_ts) / speed - (
+                time.monotonic() - started
+            )
+            if delay > 0:
+                time.sleep(delay)
+        yield entry
+
+
+def replay(entries, base_url=None, tokens=None, concurrency=1,
+           pool='thread', speed=None, timeout=30):
+    """Отправляет записи и возвращает результаты и общее время."""
+
+    tokens = tokens or {}
+    started = time.perf_counter()
+    if concurrency == 1:
+        target = make_target(base_url, tokens, timeout)
+        results = [target.send(entry) for entry in paced(entries, speed)]
+    elif pool == 'process':
+        # соединения с базой не должны переходить в дочерние процессы
+        connections.close_all()
+        with ProcessPoolExecutor(
+            concurrency,
+            initializer=_init_worker,
+            initargs=(base_url, tokens, timeout)
+        ) as executor:
+            results = list(executor.map(
+                _send_in_worker, paced(entries, speed)
+            ))
+    else:
+        target = make_target(base_url, tokens, timeout)
+        with ThreadPoolExecutor(concurrency) as executor:
+            results = list(executor.map(target.send, paced(entries, speed)))
+    return results, time.perf_counter() - started
+
+
+def histogram(durations):
+    """Число запросов по корзинам TIME_BUCKETS, последняя - сверх них."""
+
+    counts = [0] * (len(TIME_BUCKETS) + 1)
+    for duration in durations:
+        index = 0
+        while index < len(TIME_BUCKETS) and duration > TIME_BUCKETS[index]:
+            index += 1
+        counts[index] += 1
+    return counts
+
+
+def summarize(results, wall_time):
+    by_route = defaultdict(list)
+    for result in results:
+        by_route[result.route].append(result)
+    routes = {}
+    for route, route_results in sorted(by_route.items()):
+        durations = [result.duration for result in route_results]
+        queries = [
+            result.queries for result in route_results
+            if result.queries is not None
+        ]
+        routes[route] = {
+            'requests': len(route_results),
+            'errors': sum(
+                result.status == NO_RESPONSE or result.status >= 500
+                for result in route_results
+            ),
+            'client_errors': sum(
+                400 <= result.status < 500 for result in route_results
+            ),
+            'p50_ms': round(percentile(durations, 0.5) * 1000, 3),
+            'p95_ms': round(percentile(durations, 0.95) * 1000, 3),
+            'p99_ms': round(percentile(durations, 0.99) * 1000, 3),
+            'queries': sum(queries) if queries else None,
+            'histogram': histogram(durations),
+        }
+    errors = sum(route['errors'] for route in routes.values())
+    return {
+        'requests': len(results),
+        'wall_time': round(wall_time, 3),
+        'throughput': round(len(results) / wall_time, 2) if wall_time else 0,
+        'errors': errors,
+        'error_rate': round(errors / len(results), 4) if results else 0,
+        'queries': sum(
+            route['queries'] or 0 for route in routes.values()
+        ),
+        'routes': routes,
+    }
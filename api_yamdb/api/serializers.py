@@ -1,18 +1,22 @@
-from django.shortcuts import get_object_or_404
+from django.db import connection, transaction
+from django.db.models import prefetch_related_objects
 
 from rest_framework import serializers
 from rest_framework.relations import SlugRelatedField
 
+from api.fieldsets import SparseFieldsetSerializerMixin
+from api.instrumentation import TimedSerializerMixin
 from reviews.models import (
     Review,
     Comment,
     Category,
     Genre,
+    GenresTitle,
     Title
 )
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для категорий."""
 
     class Meta:
@@ -20,7 +24,7 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = tuple(Category.REQUIRED_FIELDS)
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для жанров."""
 
     class Meta:
@@ -28,25 +32,109 @@ class GenreSerializer(serializers.ModelSerializer):
         fields = tuple(Genre.REQUIRED_FIELDS)
 
 
-class CreateTitleSerializer(serializers.ModelSerializer):
+class PrefetchedSlugRelatedField(SlugRelatedField):
+    """SlugRelatedField, берущий объекты из заранее загруженного словаря.
+
+    Словарь {slug: объект} кладет в контекст BulkCreateTitleSerializer,
+    без него поле работает как обычный SlugRelatedField.
+    """
+
+    def to_internal_value(self, data):
+        prefetched = self.context.get('prefetched_slugs')
+        if prefetched is None:
+            return super().to_internal_value(data)
+        try:
+            return prefetched[self.get_queryset().model][str(data)]
+        except KeyError:
+            self.fail(
+                'does_not_exist', slug_name=self.slug_field, value=str(data)
+            )
+
+
+class BulkCreateTitleSerializer(serializers.ListSerializer):
+    """Пакетное создание тайтлов.
+
+    Все slug жанров и категорий разрешаются двумя запросами, тайтлы
+    и связи с жанрами вставляются через bulk_create в одной транзакции.
+    """
+
+    max_batch_size = 10000
+
+    def to_internal_value(self, data):
+        if isinstance(data, list) and len(data) > self.max_batch_size:
+            raise serializers.ValidationError({
+                'non_field_errors': [
+                    f'Не больше {self.max_batch_size} тайтлов за запрос.'
+                ]
+            })
+        if isinstance(data, list):
+            self.prefetch_slugs(data)
+        return super().to_internal_value(data)
+
+    def prefetch_slugs(self, data):
+        genre_slugs = set()
+        category_slugs = set()
+        for item in data:
+            if not isinstance(item, dict):
+                continue
+            genres = item.get('genre')
+            if isinstance(genres, list):
+                genre_slugs.update(str(slug) for slug in genres)
+            if item.get('category') is not None:
+                category_slugs.add(str(item['category']))
+        self.context['prefetched_slugs'] = {
+            Genre: Genre.objects.in_bulk(list(genre_slugs), field_name='slug'),
+            Category: Category.objects.in_bulk(
+                list(category_slugs), field_name='slug'
+            ),
+        }
+
+    def create(self, validated_data):
+        titles = []
+        genres = []
+        for item in validated_data:
+            genres.append(item.pop('genre', []))
+            titles.append(Title(**item))
+        with transaction.atomic():
+            if connection.features.can_return_ids_from_bulk_insert:
+                Title.objects.bulk_create(titles, batch_size=1000)
+            else:
+                # SQLite в Django 2.2 не возвращает id после bulk_create
+                for title in titles:
+                    title.save()
+            GenresTitle.objects.bulk_create(
+                [
+                    GenresTitle(title=title, genre=genre)
+                    for title, title_genres in zip(titles, genres)
+                    # повтор жанра нарушил бы unique_genre_title
+                    for genre in dict.fromkeys(title_genres)
+                ],
+                batch_size=1000
+            )
+        prefetch_related_objects(titles, 'genre')
+        return titles
+
+
+class CreateTitleSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для создания тайтла."""
 
-    genre = SlugRelatedField(
+    genre = PrefetchedSlugRelatedField(
         queryset=Genre.objects.all(),
         slug_field='slug',
         many=True
     )
-    category = SlugRelatedField(
+    category = PrefetchedSlugRelatedField(
         queryset=Category.objects.all(),
         slug_field='slug'
     )
 
     class Meta:
-        fields = '__all__'
+        exclude = Title.RATING_FIELDS + ('updated_at',)
         model = Title
+        list_serializer_class = BulkCreateTitleSerializer
 
 
-class GenresTitleSerializer(serializers.ModelSerializer):
+class GenresTitleSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Вложенный сериализатор для поля genre."""
 
     class Meta:
@@ -54,8 +142,12 @@ class GenresTitleSerializer(serializers.ModelSerializer):
         fields = ('name', 'slug')
 
 
-class TitleSerializer(serializers.ModelSerializer):
-    """Сериализатор для произведения."""
+class TitleSerializer(
+    SparseFieldsetSerializerMixin,
+    TimedSerializerMixin,
+    serializers.ModelSerializer
+):
+    """Сериализатор для произведения, поддерживает ?fields= и ?omit=."""
 
     genre = GenresTitleSerializer(read_only=True, many=True)
     category = CategorySerializer(read_only=True)
@@ -75,7 +167,7 @@ class TitleSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для отзывов."""
 
     author = serializers.SlugRelatedField(
@@ -108,17 +200,22 @@ class ReviewSerializer(serializers.ModelSerializer):
     def validate(self, data):
         """Автор может оставлять только один review на title."""
 
-        author = self.context.get('request').user
-        title_id = self.context.get('view').kwargs.get('title_id')
-        title = get_object_or_404(Title, pk=title_id)
-        if self.context.get('request').method == 'POST':
-            if Review.objects.filter(title=title, author=author).exists():
+        request = self.context.get('request')
+        if request.method == 'POST':
+            # произведение уже загружено вьюсетом при разборе URL
+            title = self.context.get('view').get_parent()
+            if Review.objects.filter(
+                title=title, author=request.user
+            ).exists():
                 raise serializers.ValidationError('Отзыв уже существует!')
         return data
 
 
-class CommentSerializer(serializers.ModelSerializer):
-    """Сериализатор для комментариев."""
+class CommentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Сериализатор для комментариев.
+
+    С параметром запроса ?review_as=id отзыв отдается id вместо текста.
+    """
 
     review = serializers.SlugRelatedField(
         slug_field='text',
@@ -131,4 +228,15 @@ class CommentSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Comment
-        fields = '__all__'
+        fields = ('id', 'review', 'text', 'author', 'pub_date')
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is not None and (
+            request.query_params.get('review_as') == 'id'
+        ):
+            fields['review'] = serializers.PrimaryKeyRelatedField(
+                read_only=True
+            )
+        return fields
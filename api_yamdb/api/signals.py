@@ -0,0 +1,79 @@
+import logging
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from api.cache import bump_versions
+from api.documents import rebuild_changed_documents
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    GenresTitle,
+    Review,
+    Title,
+    bulk_loaded,
+    titles_changed
+)
+from users.models import User
+
+logger = logging.getLogger(__name__)
+
+# какие закэшированные ресурсы устаревают при записи в модель
+INVALIDATES = {
+    Title: ('titles',),
+    Genre: ('genres', 'titles'),
+    Category: ('categories', 'titles'),
+    GenresTitle: ('titles',),
+    # отзыв меняет рейтинг произведения
+    Review: ('reviews', 'titles'),
+    Comment: ('comments',),
+    # отзывы и комментарии показывают имя автора
+    User: ('reviews', 'comments'),
+}
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_cached_responses(sender, created=False, **kwargs):
+    if sender is User and created:
+        # у нового пользователя еще нет отзывов и комментариев
+        return
+    resources = INVALIDATES.get(sender)
+    if resources:
+        bump_versions(resources)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genres(sender, action, **kwargs):
+    if action.startswith('post_'):
+        bump_versions(INVALIDATES[GenresTitle])
+
+
+@receiver(bulk_loaded)
+def invalidate_bulk_loaded(sender, models, **kwargs):
+    resources = {
+        resource for model in models
+        for resource in INVALIDATES.get(model, ())
+    }
+    if resources:
+        bump_versions(sorted(resources))
+
+
+@receiver(titles_changed)
+def rebuild_title_documents(sender, since, **kwargs):
+    """Пересобирает документы произведений после фиксации записи."""
+
+    if not settings.TITLE_DOCUMENTS_ENABLED:
+        return
+
+    def rebuild():
+        try:
+            rebuild_changed_documents(since)
+        except DatabaseError:
+            # запись уже зафиксирована, а чтение обойдется сериализатором
+            logger.exception('Не удалось пересобрать документы произведений')
+
+    transaction.on_commit(rebuild)
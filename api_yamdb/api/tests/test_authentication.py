@@ -0,0 +1,104 @@
+from django.test import TestCase, override_settings
+
+from rest_framework.test import APIClient
+
+from reviews.models import Title
+from users.models import User
+from users.tokens import RoleAccessToken, make_confirmation_code
+
+
+@override_settings(API_CACHE_ENABLED=False)
+class StatelessAuthenticationTest(TestCase):
+    """Чтение с токеном не обращается к таблице пользователей."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(
+            username='admin', email='admin@yamdb.fake', role='admin'
+        )
+        cls.user = User.objects.create(
+            username='user', email='user@yamdb.fake'
+        )
+        cls.title = Title.objects.create(
+            name='Побег из Шоушенка', year=1994, description='Драма'
+        )
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {RoleAccessToken.for_user(user)}'
+        )
+        return client
+
+    def test_read_skips_user_lookup(self):
+        client = self.client_for(self.user)
+        url = f'/api/v1/titles/{self.title.pk}/reviews/'
+        # версия токена, родитель и count пустого списка
+        with self.assertNumQueries(3):
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_role_change_revokes_token(self):
+        client = self.client_for(self.user)
+        url = f'/api/v1/titles/{self.title.pk}/reviews/'
+        self.assertEqual(client.get(url).status_code, 200)
+        response = self.client_for(self.admin).patch(
+            f'/api/v1/users/{self.user.username}/', {'role': 'moderator'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(client.get(url).status_code, 401)
+        self.user.refresh_from_db()
+        fresh = self.client_for(self.user)
+        self.assertEqual(fresh.get(url).status_code, 200)
+
+    def test_claims_change_on_save_revokes_token(self):
+        client = self.client_for(self.user)
+        url = f'/api/v1/titles/{self.title.pk}/reviews/'
+        user = User.objects.get(pk=self.user.pk)
+        user.bio = 'Люблю кино'
+        user.save()
+        self.assertEqual(client.get(url).status_code, 200)
+        # как при смене роли в админке
+        user.role = 'admin'
+        user.save()
+        self.assertEqual(client.get(url).status_code, 401)
+
+    def test_admin_claims_allow_write(self):
+        response = self.client_for(self.admin).post(
+            '/api/v1/genres/', {'name': 'Драма', 'slug': 'drama'}
+        )
+        self.assertEqual(response.status_code, 201)
+
+
+class ConfirmationCodeTest(TestCase):
+    """Код подтверждения не хранится, обмен на токен - один SELECT."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.post(
+            '/api/v1/auth/signup/',
+            {'username': 'newbie', 'email': 'newbie@yamdb.fake'}
+        )
+        self.user = User.objects.get(username='newbie')
+        self.code = make_confirmation_code(self.user)
+
+    def exchange(self, code):
+        return self.client.post(
+            '/api/v1/auth/token/',
+            {'username': 'newbie', 'confirmation_code': code}
+        )
+
+    def test_code_exchange_single_query(self):
+        with self.assertNumQueries(1):
+            response = self.exchange(self.code)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('token', response.json())
+
+    def test_tampered_code_rejected(self):
+        timestamp = self.code.split('-')[0]
+        self.assertEqual(self.exchange(f'{timestamp}-0000').status_code, 400)
+
+    @override_settings(CONFIRMATION_CODE_TIMEOUT=60)
+    def test_expired_code_rejected(self):
+        code = make_confirmation_code(self.user, timestamp=1)
+        self.assertEqual(self.exchange(code).status_code, 400)
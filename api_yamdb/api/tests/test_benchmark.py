@@ -0,0 +1,42 @@
+from django.test import TestCase, override_settings
+
+from api.benchmark import (
+    Volumes,
+    build_scenarios,
+    compare,
+    make_clients,
+    run_benchmark,
+    seed_database,
+    uncovered_routes
+)
+
+
+@override_settings(API_CACHE_ENABLED=False)
+class BenchmarkTest(TestCase):
+    """Сценарии бенчмарка покрывают все маршруты и проходят без ошибок."""
+
+    def test_scenarios_run_on_seeded_data(self):
+        seeded = seed_database(Volumes(
+            users=5, genres=3, categories=2, titles=5, reviews=10, comments=1
+        ))
+        scenarios = build_scenarios(seeded)
+        self.assertEqual(uncovered_routes(scenarios), [])
+        results = run_benchmark(scenarios, make_clients(seeded), 1)
+        self.assertEqual(set(results), {s.name for s in scenarios})
+        self.assertGreater(results['GET reviews']['queries'], 0)
+
+    def test_compare_flags_regressions(self):
+        baseline = {'GET titles': {
+            'p50_ms': 10.0, 'p95_ms': 12.0, 'queries': 5, 'memory_kb': 100.0
+        }}
+        # выброс в хвосте не регрессия, пока медиана на месте
+        same = {'GET titles': {
+            'p50_ms': 10.5, 'p95_ms': 60.0, 'queries': 5, 'memory_kb': 101.0
+        }}
+        self.assertEqual(compare(same, baseline, 0.5, 0.25), [])
+        worse = {'GET titles': {
+            'p50_ms': 30.0, 'p95_ms': 30.0, 'queries': 6, 'memory_kb': 500.0
+        }}
+        self.assertEqual(len(compare(worse, baseline, 0.5, 0.25)), 3)
+        # другая версия Python: память не сравнивается
+        self.assertEqual(len(compare(worse, baseline, 0.5, None)), 2)
@@ -0,0 +1,109 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+
+from api.serializers import BulkCreateTitleSerializer
+from reviews.models import Category, Genre, GenresTitle, Title
+from users.models import User
+from users.tokens import RoleAccessToken
+
+TITLES_URL = '/api/v1/titles/'
+
+
+@override_settings(API_CACHE_ENABLED=False)
+class BulkCreateTitlesTest(TestCase):
+    """POST /titles/ с массивом создает все тайтлы или ни одного."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Category.objects.create(name='Кино', slug='movie')
+        Genre.objects.create(name='Драма', slug='drama')
+        Genre.objects.create(name='Комедия', slug='comedy')
+        cls.admin = User.objects.create(
+            username='admin', email='admin@yamdb.fake', role='admin'
+        )
+        cls.user = User.objects.create(
+            username='user', email='user@yamdb.fake'
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.login(self.admin)
+
+    def login(self, user):
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {RoleAccessToken.for_user(user)}'
+        )
+
+    def item(self, name, genre=('drama',), category='movie'):
+        return {
+            'name': name, 'year': 2000, 'description': 'Описание',
+            'genre': list(genre), 'category': category,
+        }
+
+    def test_create_many(self):
+        response = self.client.post(TITLES_URL, [
+            self.item('Первый'),
+            self.item('Второй', genre=('drama', 'comedy', 'drama')),
+        ], format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(
+            [title['name'] for title in response.json()],
+            ['Первый', 'Второй']
+        )
+        second = Title.objects.get(name='Второй')
+        self.assertEqual(
+            sorted(second.genre.values_list('slug', flat=True)),
+            ['comedy', 'drama']
+        )
+        self.assertEqual(second.category.slug, 'movie')
+        self.assertEqual(GenresTitle.objects.count(), 3)
+
+    def test_errors_per_item(self):
+        response = self.client.post(TITLES_URL, [
+            self.item('Первый'),
+            self.item('Второй', genre=('unknown',)),
+            self.item('', category='books'),
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()
+        self.assertEqual(errors[0], {})
+        self.assertEqual(list(errors[1]), ['genre'])
+        self.assertEqual(sorted(errors[2]), ['category', 'name'])
+        self.assertFalse(Title.objects.exists())
+
+    def test_future_year(self):
+        item = self.item('Будущий')
+        item['year'] = timezone.now().year + 1
+        response = self.client.post(TITLES_URL, item, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('year', response.json())
+        item['year'] = timezone.now().year
+        response = self.client.post(TITLES_URL, item, format='json')
+        self.assertEqual(response.status_code, 201)
+
+    def test_batch_limit(self):
+        with mock.patch.object(BulkCreateTitleSerializer, 'max_batch_size', 1):
+            response = self.client.post(TITLES_URL, [
+                self.item('Первый'), self.item('Второй')
+            ], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('non_field_errors', response.json())
+        self.assertFalse(Title.objects.exists())
+
+    def test_single_object(self):
+        response = self.client.post(
+            TITLES_URL, self.item('Один'), format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['name'], 'Один')
+
+    def test_admin_only(self):
+        self.login(self.user)
+        response = self.client.post(
+            TITLES_URL, [self.item('Первый')], format='json'
+        )
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,109 @@
+import io
+
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TransactionTestCase
+
+from rest_framework.test import APIClient
+
+from api.cache import get_cache, get_versions
+from reviews.models import Genre, Review, Title
+from users.models import User
+from users.tokens import RoleAccessToken
+
+TITLES_URL = '/api/v1/titles/'
+
+
+class CacheInvalidationTest(TransactionTestCase):
+    """Версии ресурсов растут после фиксации записи."""
+
+    def setUp(self):
+        get_cache().clear()
+        # таблица версий очищается между тестами, как и остальные
+        get_versions(('titles', 'genres', 'categories', 'reviews', 'comments'))
+        self.client = APIClient()
+        self.author = User.objects.create(
+            username='author', email='author@yamdb.fake'
+        )
+        self.title = Title.objects.create(
+            name='Побег из Шоушенка', year=1994, description='Драма'
+        )
+        Review.objects.create(
+            title=self.title, author=self.author, text='Отзыв', score=9
+        )
+        self.reviews_url = f'/api/v1/titles/{self.title.pk}/reviews/'
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_author_rename(self):
+        self.get(self.reviews_url)
+        self.assertEqual(self.get(self.reviews_url)['X-Cache'], 'HIT')
+        self.author.username = 'renamed'
+        self.author.save()
+        response = self.get(self.reviews_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['results'][0]['author'], 'renamed')
+
+    def test_new_user_keeps_cache(self):
+        self.get(self.reviews_url)
+        User.objects.create(username='reader', email='reader@yamdb.fake')
+        self.assertEqual(self.get(self.reviews_url)['X-Cache'], 'HIT')
+
+    def test_bump_after_commit(self):
+        before = get_versions(('titles', 'genres'))
+        with transaction.atomic():
+            Genre.objects.create(name='Драма', slug='drama')
+            self.assertEqual(get_versions(('titles', 'genres')), before)
+        after = get_versions(('titles', 'genres'))
+        self.assertTrue(all(new > old for new, old in zip(after, before)))
+
+    def test_versions_shared_between_processes(self):
+        before = get_versions(('titles',))
+        # другой воркер видит ту же базу, но не локальный кэш
+        get_cache().clear()
+        self.assertEqual(get_versions(('titles',)), before)
+        Genre.objects.create(name='Драма', slug='drama')
+        get_cache().clear()
+        self.assertGreater(get_versions(('titles',))[0], before[0])
+
+    def test_bulk_command_bumps(self):
+        # агрегаты разошлись запросом UPDATE, post_save не сработал
+        Title.objects.filter(pk=self.title.pk).update(rating_count=0)
+        before = get_versions(('titles',))
+        call_command('reconcile_ratings', stdout=io.StringIO())
+        self.assertGreater(get_versions(('titles',))[0], before[0])
+
+    def test_no_bump_on_rollback(self):
+        before = get_versions(('titles',))
+        try:
+            with transaction.atomic():
+                self.title.save()
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertEqual(get_versions(('titles',)), before)
+
+    def test_write_invalidates_list(self):
+        self.get(TITLES_URL)
+        self.assertEqual(self.get(TITLES_URL)['X-Cache'], 'HIT')
+        self.title.name = 'Зеленая миля'
+        self.title.save()
+        response = self.get(TITLES_URL)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['results'][0]['name'], 'Зеленая миля')
+
+    def test_key_varies_by_role(self):
+        admin = User.objects.create(
+            username='admin', email='admin@yamdb.fake', role='admin'
+        )
+        self.get(TITLES_URL)
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {RoleAccessToken.for_user(admin)}'
+        )
+        self.assertEqual(self.get(TITLES_URL)['X-Cache'], 'MISS')
+        self.assertEqual(self.get(TITLES_URL)['X-Cache'], 'HIT')
+        self.client.credentials()
+        self.assertEqual(self.get(TITLES_URL)['X-Cache'], 'HIT')
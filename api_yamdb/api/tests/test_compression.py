@@ -0,0 +1,112 @@
+import gzip
+from unittest import mock, skipUnless
+
+from django.test import TestCase, override_settings
+
+from rest_framework.test import APIClient
+
+from api import compression
+from api.cache import get_cache
+from api.compression import choose_encoding
+from reviews.models import Category, Genre, Title
+from users.models import User
+from users.tokens import RoleAccessToken
+
+TITLES_URL = '/api/v1/titles/'
+
+
+class ChooseEncodingTest(TestCase):
+    def test_weights(self):
+        self.assertEqual(choose_encoding('gzip, deflate'), 'gzip')
+        self.assertEqual(choose_encoding('deflate'), None)
+        self.assertEqual(choose_encoding('gzip;q=0'), None)
+        self.assertEqual(choose_encoding('*;q=0.5, gzip;q=0'), (
+            'br' if compression.brotli else None
+        ))
+        self.assertEqual(choose_encoding(''), None)
+
+    @skipUnless(compression.brotli, 'Brotli не установлен.')
+    def test_brotli_preferred(self):
+        self.assertEqual(choose_encoding('gzip, deflate, br'), 'br')
+        self.assertEqual(choose_encoding('gzip, br;q=0.5'), 'gzip')
+
+
+@override_settings(COMPRESSION_MIN_SIZE=200)
+class ResponseCompressionTest(TestCase):
+    """Ответы API сжимаются, сжатые тела кэша переиспользуются."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Кино', slug='movie')
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        for number in range(5):
+            title = Title.objects.create(
+                name=f'Произведение {number}', year=2000,
+                description='Длинное описание ' * 20, category=category
+            )
+            title.genre.add(genre)
+        cls.admin = User.objects.create(
+            username='admin', email='a@a.ru', role='admin'
+        )
+
+    def setUp(self):
+        get_cache().clear()
+        self.client = APIClient()
+
+    def test_gzip(self):
+        plain = self.client.get(TITLES_URL)
+        response = self.client.get(TITLES_URL, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertEqual(
+            int(response['Content-Length']), len(response.content)
+        )
+
+    @skipUnless(compression.brotli, 'Brotli не установлен.')
+    def test_brotli(self):
+        plain = self.client.get(TITLES_URL)
+        response = self.client.get(TITLES_URL, HTTP_ACCEPT_ENCODING='br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(
+            compression.brotli.decompress(response.content), plain.content
+        )
+
+    def test_small_response_not_compressed(self):
+        response = self.client.get(
+            '/api/v1/genres/', HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_cached_body_compressed_once(self):
+        with mock.patch.object(
+            compression, 'compress', wraps=compression.compress
+        ) as compress:
+            for _ in range(3):
+                response = self.client.get(
+                    TITLES_URL, HTTP_ACCEPT_ENCODING='gzip'
+                )
+                self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(compress.call_count, 1)
+
+    def test_weak_etag_revalidates(self):
+        response = self.client.get(TITLES_URL, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        response = self.client.get(
+            TITLES_URL, HTTP_ACCEPT_ENCODING='gzip',
+            HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_streaming_export(self):
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {RoleAccessToken.for_user(self.admin)}'
+        )
+        url = f'{TITLES_URL}export/'
+        plain = b''.join(self.client.get(url).streaming_content)
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(
+            gzip.decompress(b''.join(response.streaming_content)), plain
+        )
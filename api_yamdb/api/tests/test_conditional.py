@@ -0,0 +1,113 @@
+from django.test import TestCase, override_settings
+
+from rest_framework.test import APIClient
+
+from reviews.models import Comment, Review, Title
+from users.models import User
+
+
+@override_settings(API_CACHE_ENABLED=False)
+class ConditionalGetTest(TestCase):
+    """ETag и Last-Modified у списков и отдельных объектов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.title = Title.objects.create(
+            name='Побег из Шоушенка', year=1994, description='Драма'
+        )
+        cls.reviews = [
+            Review.objects.create(
+                title=cls.title,
+                author=User.objects.create(
+                    username=f'user{number}', email=f'{number}@yamdb.fake'
+                ),
+                text=f'Отзыв {number}',
+                score=7
+            )
+            for number in range(2)
+        ]
+        Comment.objects.create(
+            review=cls.reviews[0], author=cls.reviews[1].author, text='Ok'
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.reviews_url = f'/api/v1/titles/{self.title.pk}/reviews/'
+
+    def test_bad_lookup_is_not_found(self):
+        for url in (
+            '/api/v1/titles/abc/',
+            f'{self.reviews_url}abc/',
+            f'{self.reviews_url}{self.reviews[0].pk}/comments/abc/',
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_list_revalidates_by_etag(self):
+        response = self.client.get(self.reviews_url)
+        self.assertFalse(response.has_header('Last-Modified'))
+        etag = response['ETag']
+        response = self.client.get(self.reviews_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_list_after_delete(self):
+        response = self.client.get(self.reviews_url)
+        etag = response['ETag']
+        self.reviews[1].delete()
+        for headers in (
+            {'HTTP_IF_NONE_MATCH': etag},
+            {'HTTP_IF_MODIFIED_SINCE': 'Fri, 01 Jan 2100 00:00:00 GMT'},
+        ):
+            with self.subTest(headers=headers):
+                response = self.client.get(self.reviews_url, **headers)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json()['count'], 1)
+
+    def test_retrieve_last_modified(self):
+        url = f'{self.reviews_url}{self.reviews[0].pk}/'
+        response = self.client.get(url)
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_author_rename_changes_etag(self):
+        urls = (self.reviews_url, f'{self.reviews_url}{self.reviews[0].pk}/')
+        etags = [self.client.get(url)['ETag'] for url in urls]
+        author = self.reviews[0].author
+        author.username = 'renamed'
+        author.save()
+        for url, etag in zip(urls, etags):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_list_etag_covers_only_page(self):
+        params = {'limit': 1}
+        etag = self.client.get(self.reviews_url, params)['ETag']
+        first, second = self.title.title_reviews.all()
+        # второй отзыв на другой странице
+        second.text = 'Новый'
+        second.save()
+        response = self.client.get(
+            self.reviews_url, params, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 304)
+        first.text = 'Новый'
+        first.save()
+        response = self.client.get(
+            self.reviews_url, params, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_sparse_list_etag(self):
+        # updated_at не читается для ?fields=name, ETag добирает его
+        url = '/api/v1/titles/'
+        etag = self.client.get(url, {'fields': 'name'})['ETag']
+        title = Title.objects.get(pk=self.title.pk)
+        title.description = 'Тюремная драма'
+        title.save()
+        response = self.client.get(
+            url, {'fields': 'name'}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
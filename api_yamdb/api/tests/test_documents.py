@@ -0,0 +1,129 @@
+import io
+import json
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from rest_framework.test import APIClient
+
+from api.documents import build_documents
+from reviews.models import Category, Genre, Review, Title, TitleDocument
+from users.models import User
+
+TITLES_URL = '/api/v1/titles/'
+
+
+@override_settings(API_CACHE_ENABLED=False)
+class TitleDocumentTest(TestCase):
+    """Ответы из готовых документов совпадают с ответами сериализатора."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='user', email='u@u.ru')
+        category = Category.objects.create(name='Кино', slug='movie')
+        cls.genre = Genre.objects.create(name='Драма', slug='drama')
+        comedy = Genre.objects.create(name='Комедия', slug='comedy')
+        for number in range(7):
+            title = Title.objects.create(
+                name=f'Произведение {number}', year=2000 + number,
+                description='Описание', category=category
+            )
+            title.genre.add(cls.genre, comedy)
+        cls.title = title
+        cls.detail_url = f'{TITLES_URL}{title.pk}/'
+        # on_commit внутри TestCase не срабатывает
+        build_documents(Title.objects.values_list('pk', flat=True))
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def assert_same_as_serializer(self, url, params=None):
+        response = self.client.get(url, params)
+        with override_settings(TITLE_DOCUMENTS_ENABLED=False):
+            expected = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, expected.content)
+        self.assertEqual(response['Content-Type'], expected['Content-Type'])
+        return response
+
+    def test_responses_match_serializer(self):
+        for params in (None, {'genre': 'drama', 'limit': 2, 'offset': 2}):
+            with self.subTest(params=params):
+                self.assert_same_as_serializer(TITLES_URL, params)
+        self.assert_same_as_serializer(self.detail_url)
+
+    def test_cursor_pages_match_serializer(self):
+        response = self.assert_same_as_serializer(
+            TITLES_URL, {'pagination': 'cursor'}
+        )
+        self.assert_same_as_serializer(response.json()['next'])
+
+    def test_list_queries(self):
+        # count, страница вместе с документами
+        with self.assertNumQueries(2):
+            self.client.get(TITLES_URL)
+
+    def test_stale_documents_not_written_on_read(self):
+        Review.objects.create(
+            title=self.title, author=self.user, text='Отзыв', score=7
+        )
+        TitleDocument.objects.filter(title=Title.objects.first()).delete()
+        stored = set(TitleDocument.objects.values_list('pk', 'updated_at'))
+        data = self.assert_same_as_serializer(self.detail_url).json()
+        self.assertEqual(data['rating'], 7)
+        self.assert_same_as_serializer(TITLES_URL)
+        self.assertEqual(
+            set(TitleDocument.objects.values_list('pk', 'updated_at')),
+            stored
+        )
+
+    def test_sparse_fields_use_serializer(self):
+        response = self.client.get(TITLES_URL, {'fields': 'id'})
+        self.assertEqual(
+            response.json()['results'][0], {'id': Title.objects.first().pk}
+        )
+
+
+@override_settings(API_CACHE_ENABLED=False)
+class TitleDocumentRebuildTest(TransactionTestCase):
+    """Документы пересобираются после фиксации записи."""
+
+    def setUp(self):
+        self.user = User.objects.create(username='user', email='u@u.ru')
+        self.genre = Genre.objects.create(name='Драма', slug='drama')
+        self.title = Title.objects.create(
+            name='Произведение', year=2000, description='Описание'
+        )
+        self.title.genre.add(self.genre)
+
+    def assert_document_fresh(self):
+        document = TitleDocument.objects.get(title=self.title)
+        self.assertEqual(
+            document.updated_at,
+            Title.objects.get(pk=self.title.pk).updated_at
+        )
+        with override_settings(TITLE_DOCUMENTS_ENABLED=False):
+            expected = APIClient().get(f'{TITLES_URL}{self.title.pk}/')
+        self.assertEqual(json.loads(document.body), expected.json())
+        return expected.json()
+
+    def test_rebuilt_on_write(self):
+        self.assert_document_fresh()
+        Review.objects.create(
+            title=self.title, author=self.user, text='Отзыв', score=7
+        )
+        self.assertEqual(self.assert_document_fresh()['rating'], 7)
+        self.genre.name = 'Трагедия'
+        self.genre.save()
+        self.assertEqual(
+            self.assert_document_fresh()['genre'],
+            [{'name': 'Трагедия', 'slug': 'drama'}]
+        )
+        self.genre.delete()
+        self.assertEqual(self.assert_document_fresh()['genre'], [])
+
+    def test_rebuilt_after_bulk_load(self):
+        Title.objects.filter(pk=self.title.pk).update(name='Переименовано')
+        TitleDocument.objects.all().delete()
+        call_command('build_title_documents', stdout=io.StringIO())
+        self.assertEqual(self.assert_document_fresh()['name'], 'Переименовано')
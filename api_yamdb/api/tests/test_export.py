@@ -0,0 +1,99 @@
+import gzip
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from rest_framework.test import APIClient
+
+from api.export import iter_ndjson
+from reviews.models import Category, Genre, Review, Title
+from users.models import User
+from users.tokens import RoleAccessToken
+
+EXPORT_URL = '/api/v1/titles/export/'
+
+
+def parse(body):
+    return [json.loads(line) for line in body.decode().splitlines()]
+
+
+@override_settings(API_CACHE_ENABLED=False, TITLE_DOCUMENTS_ENABLED=False)
+class ExportTitlesTest(TestCase):
+    """NDJSON-выгрузка совпадает с ответами API по каждому произведению."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Кино', slug='movie')
+        genres = [
+            Genre.objects.create(name=name, slug=slug)
+            for name, slug in (('Драма', 'drama'), ('Комедия', 'comedy'))
+        ]
+        author = User.objects.create(username='user', email='u@u.ru')
+        for number in range(5):
+            title = Title.objects.create(
+                name=f'«Произведение» {number}', year=2000 + number,
+                description='Строка\nс переводом',
+                category=category if number % 2 else None
+            )
+            title.genre.set(genres[:number % 3])
+            if number:
+                Review.objects.create(
+                    title=title, author=author, text='t', score=number
+                )
+        cls.admin = User.objects.create(
+            username='admin', email='admin@yamdb.fake', role='admin'
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def api_titles(self):
+        return [
+            self.client.get(f'/api/v1/titles/{pk}/').json()
+            for pk in Title.objects.order_by('pk').values_list('pk', flat=True)
+        ]
+
+    def test_records_match_api(self):
+        body = b''.join(iter_ndjson(chunk_size=2))
+        self.assertEqual(parse(body), self.api_titles())
+
+    def test_queries_per_chunk(self):
+        # произведения одним запросом, жанры - по запросу на пачку из двух
+        with self.assertNumQueries(4):
+            lines = parse(b''.join(iter_ndjson(chunk_size=2)))
+        self.assertEqual(len(lines), 5)
+
+    def test_gzip(self):
+        plain = b''.join(iter_ndjson())
+        compressed = b''.join(iter_ndjson(compress=True))
+        self.assertEqual(gzip.decompress(compressed), plain)
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'titles.ndjson.gz')
+            call_command(
+                'export_titles', output=output, gzip=True, chunk_size=3
+            )
+            with gzip.open(output) as exported:
+                self.assertEqual(parse(exported.read()), self.api_titles())
+
+    def test_endpoint(self):
+        self.assertEqual(self.client.get(EXPORT_URL).status_code, 401)
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {RoleAccessToken.for_user(self.admin)}'
+        )
+        response = self.client.get(EXPORT_URL)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(
+            parse(b''.join(response.streaming_content)), self.api_titles()
+        )
+        response = self.client.get(EXPORT_URL, {'gzip': '1'})
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('titles.ndjson.gz', response['Content-Disposition'])
+        self.assertEqual(
+            parse(gzip.decompress(b''.join(response.streaming_content))),
+            self.api_titles()
+        )
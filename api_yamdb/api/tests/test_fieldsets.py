@@ -0,0 +1,70 @@
+from django.test import TestCase, override_settings
+
+from rest_framework.test import APIClient
+
+from reviews.models import Category, Genre, Title
+
+TITLES_URL = '/api/v1/titles/'
+
+
+@override_settings(API_CACHE_ENABLED=False)
+class TitleSparseFieldsetTest(TestCase):
+    """?fields= и ?omit= сужают и ответ, и запросы к базе."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Кино', slug='movie')
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        for number in range(7):
+            title = Title.objects.create(
+                name=f'Произведение {number}', year=2000 + number,
+                description='Описание ' * 100, category=category
+            )
+            title.genre.add(genre)
+        cls.title = title
+
+    def setUp(self):
+        self.client = APIClient()
+
+    @override_settings(TITLE_DOCUMENTS_ENABLED=False)
+    def test_full_list(self):
+        # условный GET, count, страница вместе с категорией, жанры
+        with self.assertNumQueries(4):
+            response = self.client.get(TITLES_URL)
+        self.assertEqual(
+            list(response.data['results'][0]),
+            ['id', 'name', 'year', 'rating', 'description', 'genre',
+             'category']
+        )
+
+    def test_fields(self):
+        with self.assertNumQueries(3) as captured:
+            response = self.client.get(TITLES_URL, {'fields': 'name,id'})
+        self.assertEqual(list(response.data['results'][0]), ['id', 'name'])
+        page_query = captured.captured_queries[-1]['sql']
+        self.assertNotIn('description', page_query)
+        self.assertNotIn('reviews_category', page_query)
+
+    def test_omit(self):
+        response = self.client.get(
+            f'{TITLES_URL}{self.title.pk}/', {'omit': 'description,genre'}
+        )
+        self.assertEqual(
+            list(response.data),
+            ['id', 'name', 'year', 'rating', 'category']
+        )
+        self.assertEqual(response.data['category']['slug'], 'movie')
+
+    def test_unknown_field(self):
+        response = self.client.get(TITLES_URL, {'fields': 'id,secret'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('secret', response.data['fields'][0])
+
+    def test_cursor_pages_keep_fields(self):
+        response = self.client.get(
+            TITLES_URL, {'fields': 'year', 'pagination': 'cursor'}
+        )
+        self.assertEqual(response.data['results'][0], {'year': 2000})
+        with self.assertNumQueries(2):
+            response = self.client.get(response.data['next'])
+        self.assertEqual(response.data['results'][0], {'year': 2005})
@@ -0,0 +1,26 @@
+import os
+import unittest
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase
+
+from reviews.models import Title
+from users.models import User
+
+FIXTURES = os.path.join(
+    os.path.dirname(settings.BASE_DIR), 'infra', 'fixtures.json'
+)
+
+
+@unittest.skipUnless(os.path.exists(FIXTURES), 'нет каталога infra')
+class FixturesTest(TestCase):
+    """Дамп из infra загружается в базу после migrate."""
+
+    def test_loaddata(self):
+        call_command('loaddata', FIXTURES, stdout=StringIO())
+        title = Title.objects.get()
+        self.assertEqual(title.genre.count(), 1)
+        self.assertEqual(Title.objects.recalculate_rating(), 0)
+        self.assertTrue(User.objects.get(username='admin').is_superuser)
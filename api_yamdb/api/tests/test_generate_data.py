@@ -0,0 +1,68 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from reviews.generation import generate, make_plan, zipf_counts
+from reviews.models import Comment, GenresTitle, Review, Title
+from users.models import User
+
+
+class GenerateDataTest(TestCase):
+    """Синтетические данные детерминированы и согласованы."""
+
+    def test_zipf_counts(self):
+        counts = zipf_counts(100, 1000, 1.1, 50)
+        self.assertEqual(sum(counts), 1000)
+        self.assertEqual(counts[0], 50)
+        self.assertEqual(counts, sorted(counts, reverse=True))
+        self.assertGreater(counts[5], counts[50])
+        self.assertEqual(sum(zipf_counts(3, 1000, 1.1, 10)), 30)
+
+    def generate(self, seed):
+        plan = make_plan(seed, 30, 4, 2, 25, 200, 1.0, 1.1, 50)
+        list(generate(plan, titles_per_chunk=10))
+        return plan
+
+    def snapshot(self, plan):
+        titles = Title.objects.filter(
+            pk__gte=plan.title_start
+        ).order_by('pk')
+        return [
+            (title.rating_count, title.rating_sum, [
+                (review.author_id - plan.user_start, review.score,
+                 review.text, review.pub_date, [
+                     (comment.pk - plan.comment_start, comment.text)
+                     for comment in review.review_comments.order_by('pk')
+                 ])
+                for review in title.title_reviews.order_by('pk')
+            ], [
+                (link.pk - plan.link_start, link.genre_id - plan.genre_start)
+                for link in GenresTitle.objects.filter(
+                    title=title
+                ).order_by('pk')
+            ])
+            for title in titles
+        ]
+
+    def test_generate_is_consistent_and_deterministic(self):
+        plan = self.generate(seed=1)
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Title.objects.count(), 25)
+        self.assertEqual(Review.objects.count(), 200)
+        self.assertTrue(Comment.objects.exists())
+        self.assertFalse(Title.objects.filter(genre__isnull=True).exists())
+        self.assertGreaterEqual(GenresTitle.objects.count(), 25)
+        self.assertEqual(Title.objects.recalculate_rating(), 0)
+        first = self.snapshot(plan)
+
+        second = self.snapshot(self.generate(seed=1))
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, self.snapshot(self.generate(seed=2)))
+
+    def test_command(self):
+        call_command(
+            'generate_data', users=10, titles=5, reviews=20, workers=4,
+            stdout=StringIO()
+        )
+        self.assertEqual(Review.objects.count(), 20)
@@ -0,0 +1,140 @@
+import csv
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db.models import Avg
+from django.test import TestCase
+
+from reviews.management.commands.import_yamdb import Command
+from reviews.models import Category, Comment, GenresTitle, Review, Title
+from users.models import User
+
+USERS = [
+    {'id': number, 'username': f'user{number}', 'email': f'{number}@u.ru',
+     'role': 'user', 'bio': '', 'first_name': '', 'last_name': ''}
+    for number in range(1, 4)
+]
+TITLES = [
+    {'id': number, 'name': f'Произведение {number}', 'year': 2000 + number,
+     'category': 1}
+    for number in range(1, 6)
+]
+REVIEWS = [
+    {'id': number, 'title_id': number % 5 + 1, 'text': 'Отзыв',
+     'author': number % 3 + 1, 'score': number % 10 + 1,
+     'pub_date': '2019-09-24T21:08:21.567Z'}
+    for number in range(1, 12)
+]
+
+
+def write_csv(path, rows):
+    with open(path, 'w', encoding='utf-8', newline='') as target:
+        writer = csv.DictWriter(target, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+class ImportYamdbTest(TestCase):
+    """import_yamdb загружает датасет пачками и продолжает после сбоя."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = directory.name
+        write_csv(os.path.join(self.path, 'users.csv'), USERS)
+        write_csv(os.path.join(self.path, 'category.csv'), [
+            {'id': 1, 'name': 'Фильм', 'slug': 'movie'}
+        ])
+        write_csv(os.path.join(self.path, 'titles.csv'), TITLES)
+        write_csv(os.path.join(self.path, 'genre_title.csv'), [
+            {'id': 1, 'title_id': 1, 'genre_id': 1}
+        ])
+        write_csv(os.path.join(self.path, 'genre.csv'), [
+            {'id': 1, 'name': 'Драма', 'slug': 'drama'}
+        ])
+        write_csv(os.path.join(self.path, 'review.csv'), REVIEWS)
+        with open(
+            os.path.join(self.path, 'comments.jsonl'), 'w', encoding='utf-8'
+        ) as target:
+            for number in range(1, 4):
+                target.write(json.dumps({
+                    'id': number, 'review_id': 1, 'text': 'Коммент',
+                    'author': 2, 'pub_date': '2019-09-24T21:08:21Z',
+                }) + '\n')
+
+    def run_import(self, *args):
+        out = StringIO()
+        call_command(
+            'import_yamdb', self.path, '--batch-size', '4', *args,
+            stdout=out, stderr=StringIO()
+        )
+        return out.getvalue()
+
+    def assert_imported(self):
+        self.assertEqual(User.objects.count(), len(USERS))
+        self.assertEqual(Category.objects.count(), 1)
+        self.assertEqual(Title.objects.count(), len(TITLES))
+        self.assertEqual(GenresTitle.objects.count(), 1)
+        self.assertEqual(Review.objects.count(), len(REVIEWS))
+        self.assertEqual(Comment.objects.count(), 3)
+        for title in Title.objects.annotate(avg=Avg('title_reviews__score')):
+            self.assertAlmostEqual(title.rating, title.avg)
+
+    def test_import(self):
+        out = self.run_import()
+        self.assert_imported()
+        self.assertIn('Загружено строк: 25', out)
+        review = Review.objects.get(pk=1)
+        # даты берутся из файла, а не из auto_now_add
+        self.assertEqual(review.pub_date.year, 2019)
+        self.assertEqual(review.author.username, 'user2')
+        self.assertEqual(Title.objects.get(pk=1).category.slug, 'movie')
+
+    def test_resume_after_failure(self):
+        insert_batch = Command.insert_batch
+        calls = []
+
+        def failing_insert(command, model, batch):
+            calls.append(model)
+            if model is Review and calls.count(Review) == 2:
+                raise RuntimeError('обрыв соединения')
+            insert_batch(command, model, batch)
+
+        with mock.patch.object(Command, 'insert_batch', failing_insert):
+            with self.assertRaises(RuntimeError):
+                self.run_import()
+        state_path = os.path.join(self.path, '.import_state')
+        with open(state_path, encoding='utf-8') as state_file:
+            state = json.load(state_file)
+        self.assertTrue(state['titles']['done'])
+        self.assertEqual(state['review'], {'rows': 4})
+        self.assertEqual(Review.objects.count(), 4)
+
+        out = self.run_import('--resume')
+        self.assertIn('titles: уже загружен', out)
+        self.assert_imported()
+
+    def test_batch_replayed_after_lost_checkpoint(self):
+        # пачка зафиксирована, а контрольная точка не записана
+        save_state = Command.save_state
+
+        def failing_save(command):
+            if command.state.get('review', {}).get('rows') == 8:
+                raise OSError('диск заполнен')
+            save_state(command)
+
+        with mock.patch.object(Command, 'save_state', failing_save):
+            with self.assertRaises(OSError):
+                self.run_import()
+        self.assertEqual(Review.objects.count(), 8)
+        self.run_import('--resume')
+        self.assert_imported()
+
+    def test_new_rows_after_import(self):
+        self.run_import()
+        title = Title.objects.create(name='Новое', year=2020, description='')
+        self.assertGreater(title.pk, len(TITLES))
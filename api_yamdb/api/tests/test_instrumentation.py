@@ -0,0 +1,86 @@
+from django.test import TestCase, override_settings
+
+from rest_framework.test import APIClient
+
+from prometheus_client import REGISTRY
+
+from api.instrumentation import QueryBudgetExceededError
+from reviews.models import Title
+
+
+@override_settings(API_CACHE_ENABLED=False)
+class RequestInstrumentationTest(TestCase):
+    """Server-Timing, метрики по маршрутам и бюджет запросов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.title = Title.objects.create(
+            name='Побег из Шоушенка', year=1994, description='Драма'
+        )
+
+    def setUp(self):
+        self.url = f'/api/v1/titles/{self.title.pk}/reviews/'
+
+    def test_server_timing_header(self):
+        response = APIClient().get(self.url)
+        timing = response['Server-Timing']
+        for phase in ('db', 'serialize', 'view', 'render', 'total'):
+            self.assertIn(f'{phase};dur=', timing)
+        self.assertIn('desc="2 queries"', timing)
+
+    def sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_route_histograms(self):
+        count = self.sample('yamdb_db_queries_count', route='reviews-list')
+        total = self.sample('yamdb_db_queries_sum', route='reviews-list')
+        APIClient().get(self.url)
+        APIClient().get(self.url)
+        self.assertEqual(
+            self.sample('yamdb_db_queries_count', route='reviews-list'),
+            count + 2
+        )
+        self.assertEqual(
+            self.sample('yamdb_db_queries_sum', route='reviews-list'),
+            total + 4
+        )
+
+    def test_metrics_endpoint(self):
+        APIClient().get(self.url)
+        response = APIClient().get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn(
+            'yamdb_http_request_duration_seconds_bucket{'
+            'le="0.005",method="GET",route="reviews-list"}', body
+        )
+        self.assertIn('yamdb_http_requests_in_progress', body)
+
+    def test_auth_failures_counted(self):
+        before = self.sample(
+            'yamdb_auth_failures_total', reason='token_not_valid'
+        )
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Bearer broken')
+        self.assertEqual(client.get(self.url).status_code, 401)
+        self.assertEqual(
+            self.sample('yamdb_auth_failures_total', reason='token_not_valid'),
+            before + 1
+        )
+
+    @override_settings(
+        API_QUERY_BUDGETS={'GET reviews-list': 1},
+        API_QUERY_BUDGET_RAISE=True
+    )
+    def test_query_budget_raises(self):
+        with self.assertRaises(QueryBudgetExceededError):
+            APIClient().get(self.url)
+
+    @override_settings(
+        API_QUERY_BUDGETS={'reviews-list': 1},
+        API_QUERY_BUDGET_RAISE=False
+    )
+    def test_query_budget_logs(self):
+        with self.assertLogs('api.instrumentation', 'WARNING'):
+            response = APIClient().get(self.url)
+        self.assertEqual(response.status_code, 200)
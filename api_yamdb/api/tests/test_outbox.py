@@ -0,0 +1,62 @@
+from unittest import mock
+
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase
+
+from rest_framework.test import APIClient
+
+from users.models import OutboxEmail, User
+from users.tokens import check_confirmation_code
+
+
+class SignupOutboxTest(TestCase):
+    """Регистрация ставит письмо в очередь, run_outbox его отправляет."""
+
+    def signup(self):
+        return APIClient().post(
+            '/api/v1/auth/signup/',
+            {'username': 'newbie', 'email': 'newbie@yamdb.fake'}
+        )
+
+    def test_signup_enqueues_without_sending(self):
+        response = self.signup()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.recipient, 'newbie@yamdb.fake')
+        self.assertIsNone(email.sent_at)
+
+    def test_worker_delivers_queue(self):
+        self.signup()
+        call_command('run_outbox', '--once', stdout=mock.Mock())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['newbie@yamdb.fake'])
+        self.assertIsNotNone(OutboxEmail.objects.get().sent_at)
+
+    def test_code_not_stored(self):
+        self.signup()
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.body, '{confirmation_code}')
+        call_command('run_outbox', '--once', stdout=mock.Mock())
+        code = mail.outbox[0].body
+        self.assertTrue(check_confirmation_code(
+            User.objects.get(username='newbie'), code
+        ))
+        email.refresh_from_db()
+        self.assertNotIn(code, email.body)
+
+    def test_failed_delivery_is_retried_later(self):
+        self.signup()
+        with mock.patch(
+            'django.core.mail.EmailMessage.send',
+            side_effect=ConnectionError('SMTP недоступен')
+        ):
+            call_command('run_outbox', '--once', stdout=mock.Mock())
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.attempts, 1)
+        self.assertIsNone(email.sent_at)
+        self.assertIn('SMTP', email.last_error)
+        # до истечения паузы письмо не берется повторно
+        call_command('run_outbox', '--once', stdout=mock.Mock())
+        self.assertEqual(len(mail.outbox), 0)
@@ -0,0 +1,67 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from rest_framework.test import APIClient
+
+from api.profiling import get_store
+from reviews.models import Title
+
+
+@override_settings(API_CACHE_ENABLED=False)
+class RequestProfilingTest(TestCase):
+    """Профили запросов сохраняются на диск и выводятся командой."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.title = Title.objects.create(
+            name='Побег из Шоушенка', year=1994, description='Драма'
+        )
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.url = f'/api/v1/titles/{self.title.pk}/reviews/'
+
+    def test_sampled_request_is_stored(self):
+        with self.settings(PROFILING_DIR=self.directory,
+                           PROFILING_SAMPLE_RATE=1.0):
+            APIClient().get(self.url)
+            captures = list(get_store().captures())
+        self.assertEqual(len(captures), 1)
+        capture = captures[0]
+        self.assertEqual(capture['route'], 'reviews-list')
+        self.assertEqual(capture['kind'], 'cprofile')
+        self.assertEqual(len(capture['queries']), 2)
+        self.assertTrue(capture['functions'])
+
+    def test_slow_request_threshold(self):
+        with self.settings(PROFILING_DIR=self.directory,
+                           PROFILING_SLOW_THRESHOLD=60.0):
+            APIClient().get(self.url)
+            self.assertEqual(list(get_store().captures()), [])
+        with self.settings(PROFILING_DIR=self.directory,
+                           PROFILING_SLOW_THRESHOLD=0.0):
+            APIClient().get(self.url)
+            captures = list(get_store().captures())
+        self.assertEqual(len(captures), 1)
+        self.assertEqual(captures[0]['kind'], 'sampling')
+
+    def test_store_rotation_and_command(self):
+        with self.settings(PROFILING_DIR=self.directory,
+                           PROFILING_SAMPLE_RATE=1.0,
+                           PROFILING_MAX_FILES=2):
+            client = APIClient()
+            for _ in range(3):
+                client.get(self.url)
+            captures = list(get_store().captures())
+            self.assertEqual(len(captures), 2)
+            output = StringIO()
+            call_command('profiles', '--route', 'reviews-list', stdout=output)
+            self.assertEqual(len(output.getvalue().splitlines()), 2)
+            output = StringIO()
+            call_command('profiles', captures[0]['id'], stdout=output)
+            self.assertIn('SELECT', output.getvalue())
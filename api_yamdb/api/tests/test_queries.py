@@ -0,0 +1,95 @@
+from django.test import TestCase, override_settings
+
+from rest_framework.test import APIClient
+
+from reviews.models import Comment, Review, Title
+from users.models import User
+
+
+@override_settings(API_CACHE_ENABLED=False)
+class NestedResourceQueriesTest(TestCase):
+    """Фиксирует число запросов к базе для отзывов и комментариев."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(
+            username='author', email='author@yamdb.fake'
+        )
+        cls.reader = User.objects.create(
+            username='reader', email='reader@yamdb.fake'
+        )
+        cls.title = Title.objects.create(
+            name='Побег из Шоушенка', year=1994, description='Драма'
+        )
+        cls.other_title = Title.objects.create(
+            name='Зеленая миля', year=1999, description='Драма'
+        )
+        cls.review = Review.objects.create(
+            title=cls.title, author=cls.author, text='Отзыв', score=9
+        )
+        for number in range(3):
+            Comment.objects.create(
+                review=cls.review, author=cls.author, text=f'Коммент {number}'
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+        self.reviews_url = f'/api/v1/titles/{self.title.pk}/reviews/'
+        self.comments_url = (
+            f'{self.reviews_url}{self.review.pk}/comments/'
+        )
+
+    def test_review_list(self):
+        # родитель, count, страница вместе с авторами
+        with self.assertNumQueries(3):
+            response = self.client.get(self.reviews_url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_review_create(self):
+        # родитель, проверка дубликата, вставка и пересчет рейтинга
+        # плюс SAVEPOINT/RELEASE внутри транзакции теста
+        with self.assertNumQueries(6):
+            response = self.client.post(
+                self.reviews_url, {'text': 'Новый', 'score': 5}
+            )
+        self.assertEqual(response.status_code, 201)
+
+    def test_comment_list(self):
+        # родитель, count, страница вместе с авторами
+        with self.assertNumQueries(3):
+            response = self.client.get(self.comments_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['review'], 'Отзыв')
+
+    def test_comment_list_does_not_grow_with_page(self):
+        for number in range(20):
+            Comment.objects.create(
+                review=self.review, author=self.reader, text=str(number)
+            )
+        with self.assertNumQueries(3):
+            response = self.client.get(self.comments_url, {'limit': 20})
+        self.assertEqual(len(response.data['results']), 20)
+
+    def test_comment_list_review_as_id(self):
+        response = self.client.get(self.comments_url, {'review_as': 'id'})
+        self.assertEqual(
+            response.data['results'][0]['review'], self.review.pk
+        )
+
+    def test_comment_create(self):
+        # родитель и вставка
+        with self.assertNumQueries(2):
+            response = self.client.post(
+                self.comments_url, {'text': 'Новый коммент'}
+            )
+        self.assertEqual(response.status_code, 201)
+
+    def test_comment_for_foreign_review_not_found(self):
+        url = (
+            f'/api/v1/titles/{self.other_title.pk}/reviews/'
+            f'{self.review.pk}/comments/'
+        )
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,141 @@
+import re
+from unittest import skipUnless
+
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from api.filters import parse_ordering
+from api.pagination import order_by_fields
+from api.views import TitleViewSet
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    GenresTitle,
+    Review,
+    Title
+)
+from users.models import User
+
+# имя индекса ограничения unique_genre_title в плане запроса
+GENRE_LINK_INDEX = {
+    'postgresql': 'unique_genre_title',
+    'sqlite': 'sqlite_autoindex_reviews_genrestitle_1',
+}
+TITLE_ORDERING_INDEXES = {
+    'name': 'reviews_title_name_idx',
+    'year': 'reviews_title_year_idx',
+    'rating': 'reviews_title_rating_idx',
+    'rating_count': 'reviews_title_reviews_idx',
+}
+SORT_RE = {
+    'postgresql': re.compile(r'\bSort\b'),
+    'sqlite': re.compile(r'TEMP B-TREE FOR ORDER BY'),
+}
+
+
+def query_plan(queryset):
+    if connection.vendor == 'postgresql':
+        # на маленьких тестовых таблицах полный просмотр дешевле индекса
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+    return queryset.explain()
+
+
+@skipUnless(
+    connection.vendor in GENRE_LINK_INDEX, 'План зависит от СУБД.'
+)
+class QueryPlanTest(TestCase):
+    """Вложенные списки и фильтр по жанру читаются по индексам."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='user', email='u@u.ru')
+        cls.genre = Genre.objects.create(name='Драма', slug='drama')
+        cls.title = Title.objects.create(
+            name='Произведение', year=2000, description='d',
+            category=Category.objects.create(name='Кино', slug='movie')
+        )
+        cls.title.genre.add(cls.genre)
+        cls.review = Review.objects.create(
+            title=cls.title, author=cls.user, text='t', score=5
+        )
+        Comment.objects.create(review=cls.review, author=cls.user, text='c')
+
+    def assert_indexed_without_sort(self, queryset, index):
+        plan = query_plan(queryset)
+        self.assertIn(index, plan)
+        self.assertIsNone(SORT_RE[connection.vendor].search(plan), plan)
+
+    def test_reviews_of_title(self):
+        self.assert_indexed_without_sort(
+            self.title.title_reviews.select_related('author')[:10],
+            'reviews_review_title_pub_idx'
+        )
+
+    def test_comments_of_review(self):
+        self.assert_indexed_without_sort(
+            self.review.review_comments.select_related('author')[:10],
+            'reviews_comment_review_pub_idx'
+        )
+
+    def test_keyset_page_of_reviews(self):
+        self.assert_indexed_without_sort(
+            self.title.title_reviews.filter(
+                pub_date__gte=self.review.pub_date
+            ).order_by('pub_date', 'id')[:10],
+            'reviews_review_title_pub_idx'
+        )
+
+    def test_title_orderings(self):
+        fields = TitleViewSet.ordering_fields
+        for name, field in fields.items():
+            for prefix in ('', '-'):
+                ordering = parse_ordering({'ordering': prefix + name}, fields)
+                with self.subTest(ordering=ordering):
+                    self.assert_indexed_without_sort(
+                        order_by_fields(Title.objects.all(), ordering)[:10],
+                        TITLE_ORDERING_INDEXES[field]
+                    )
+
+    def test_titles_by_genre(self):
+        plan = query_plan(Title.objects.filter(genre__slug='drama'))
+        self.assertIn(GENRE_LINK_INDEX[connection.vendor], plan)
+
+
+class GenreLinkIntegrityTest(TestCase):
+    """Связь жанра с произведением уникальна и не остается без жанра."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.titles = [
+            Title.objects.create(name=str(number), year=2000, description='d')
+            for number in range(5)
+        ]
+
+    def test_duplicate_link_rejected(self):
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        GenresTitle.objects.create(genre=genre, title=self.titles[0])
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            GenresTitle.objects.create(genre=genre, title=self.titles[0])
+
+    def test_genre_save_keeps_links(self):
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        GenresTitle.objects.create(genre=genre, title=self.titles[0])
+        genre.name = 'Трагедия'
+        genre.save()
+        self.assertTrue(GenresTitle.objects.filter(genre=genre).exists())
+
+    def delete_genre(self, links):
+        genre = Genre.objects.create(name=f'Жанр {links}', slug=f'g{links}')
+        for title in self.titles[:links]:
+            GenresTitle.objects.create(genre=genre, title=title)
+        with CaptureQueriesContext(connection) as captured:
+            genre.delete()
+        self.assertFalse(GenresTitle.objects.exists())
+        return len(captured)
+
+    def test_genre_delete_removes_links_in_bulk(self):
+        # число запросов не зависит от числа связей
+        self.assertEqual(self.delete_genre(1), self.delete_genre(5))
@@ -0,0 +1,107 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import Avg, Count
+from django.test import TestCase
+
+from reviews.models import Review, Title
+from users.models import User
+
+
+class RatingAggregatesTest(TestCase):
+    """Хранимые rating и rating_count совпадают с Avg и Count по отзывам."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create(
+                username=f'user{number}', email=f'{number}@u.ru'
+            )
+            for number in range(3)
+        ]
+        cls.titles = [
+            Title.objects.create(name=name, year=2000, description='')
+            for name in ('Первое', 'Второе')
+        ]
+
+    def assert_aggregates(self):
+        expected = {
+            title.pk: (title.avg, title.count)
+            for title in Title.objects.annotate(
+                avg=Avg('title_reviews__score'),
+                count=Count('title_reviews')
+            )
+        }
+        stored = {
+            pk: (rating, rating_count)
+            for pk, rating, rating_count in Title.objects.values_list(
+                'pk', 'rating', 'rating_count'
+            )
+        }
+        self.assertEqual(stored.keys(), expected.keys())
+        for pk, (rating, rating_count) in stored.items():
+            avg, count = expected[pk]
+            self.assertEqual(rating_count, count)
+            if avg is None:
+                self.assertIsNone(rating)
+            else:
+                self.assertAlmostEqual(rating, avg)
+
+    def review(self, user=0, title=0, score=5):
+        return Review.objects.create(
+            title=self.titles[title], author=self.users[user], text='t',
+            score=score
+        )
+
+    def test_create(self):
+        self.assert_aggregates()
+        self.review(0, score=10)
+        self.review(1, score=3)
+        self.review(2, title=1, score=7)
+        self.assert_aggregates()
+
+    def test_score_change(self):
+        review = self.review(0, score=10)
+        self.review(1, score=4)
+        review.score = 2
+        review.save()
+        self.assert_aggregates()
+        # объект, загруженный из базы, и объект с отложенными полями
+        review = Review.objects.get(pk=review.pk)
+        review.score = 9
+        review.save()
+        self.assert_aggregates()
+        review = Review.objects.only('id').get(pk=review.pk)
+        review.score = 1
+        review.save()
+        self.assert_aggregates()
+
+    def test_move_to_other_title(self):
+        review = self.review(0, score=8)
+        self.review(1, score=2)
+        review = Review.objects.get(pk=review.pk)
+        review.title = self.titles[1]
+        review.score = 6
+        review.save()
+        self.assert_aggregates()
+
+    def test_delete(self):
+        review = self.review(0, score=8)
+        self.review(1, score=2)
+        self.review(2, title=1, score=5)
+        review.delete()
+        self.assert_aggregates()
+        Review.objects.all().delete()
+        self.assert_aggregates()
+
+    def test_reconcile_command(self):
+        self.review(0, score=8)
+        self.review(1, title=1, score=4)
+        Title.objects.update(rating_sum=100, rating_count=1, rating=100)
+        out = StringIO()
+        call_command('reconcile_ratings', batch_size=1, stdout=out)
+        self.assertIn('исправлено: 2', out.getvalue())
+        self.assert_aggregates()
+        out = StringIO()
+        call_command('reconcile_ratings', stdout=out)
+        self.assertIn('исправлено: 0', out.getvalue())
@@ -0,0 +1,129 @@
+import datetime
+import decimal
+import io
+import uuid
+from collections import OrderedDict
+
+import pytz
+from django.test import TestCase
+from django.utils.translation import gettext_lazy
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api.benchmark import encode_payloads, encode_throughput
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer, PreRenderedJSON
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.models import User
+
+MOSCOW = pytz.timezone('Europe/Moscow')
+
+
+class FastJSONRendererTest(TestCase):
+    """FastJSONRenderer пишет те же байты, что и JSONRenderer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create(username='user', email='u@u.ru')
+        category = Category.objects.create(name='Кино', slug='movie')
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        for number in range(3):
+            title = Title.objects.create(
+                name=f'«Произведение» {number}', year=2000 + number,
+                description='Строка с "разделителем"\n\tи <тегом>',
+                category=category
+            )
+            title.genre.add(genre)
+            review = Review.objects.create(
+                title=title, author=user, text='Отзыв ' * 10, score=7
+            )
+            Comment.objects.create(review=review, author=user, text='Ok')
+
+    def assert_same_bytes(self, data, media_type=None):
+        self.assertEqual(
+            FastJSONRenderer().render(data, media_type),
+            JSONRenderer().render(data, media_type)
+        )
+
+    def test_api_payloads(self):
+        for name, payload in encode_payloads().items():
+            with self.subTest(payload=name):
+                self.assertTrue(payload)
+                self.assert_same_bytes(payload)
+
+    def test_special_values(self):
+        moment = datetime.datetime(2021, 5, 1, 12, 30, 15, 120000)
+        self.assert_same_bytes(OrderedDict([
+            ('utc', pytz.utc.localize(moment)),
+            ('moscow', MOSCOW.localize(moment)),
+            ('naive', moment),
+            ('date', moment.date()),
+            ('time', moment.time()),
+            ('delta', datetime.timedelta(hours=1, microseconds=5)),
+            ('decimal', decimal.Decimal('7.50')),
+            ('lazy', gettext_lazy('Произведение')),
+            ('uuid', uuid.UUID(int=1)),
+            ('tuple', (1, 2.5, None, True)),
+            ('bytes', b'raw'),
+            ('separators', '\u2028\u2029'),
+            ('control', '\x00\x1f\x7f'),
+        ]))
+
+    def test_json_fallbacks(self):
+        self.assert_same_bytes({1: 'int key', None: 'null key'})
+        self.assert_same_bytes({'big': 2 ** 70})
+        self.assert_same_bytes(
+            {'nested': [1, 2]}, 'application/json; indent=4'
+        )
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_pre_rendered(self):
+        rendered = FastJSONRenderer().render(PreRenderedJSON('{"id":1}'))
+        self.assertEqual(rendered, b'{"id":1}')
+
+    def test_encode_throughput(self):
+        results = encode_throughput(encode_payloads(), 1)
+        self.assertIn('titles FastJSONRenderer', results)
+        self.assertGreater(results['comments JSONRenderer']['mb_per_s'], 0)
+
+
+class FastJSONParserTest(TestCase):
+    """FastJSONParser возвращает то же, что и JSONParser."""
+
+    def parse(self, parser_class, body, encoding='utf-8'):
+        return parser_class().parse(
+            io.BytesIO(body), 'application/json', {'encoding': encoding}
+        )
+
+    def assert_same_result(self, body, encoding='utf-8'):
+        expected = self.parse(JSONParser, body, encoding)
+        result = self.parse(FastJSONParser, body, encoding)
+        self.assertEqual(result, expected)
+        self.assertEqual(
+            [type(value) for value in result.values()],
+            [type(value) for value in expected.values()]
+        )
+
+    def assert_same_error(self, body):
+        with self.assertRaises(ParseError) as expected:
+            self.parse(JSONParser, body)
+        with self.assertRaises(ParseError) as error:
+            self.parse(FastJSONParser, body)
+        self.assertEqual(str(error.exception), str(expected.exception))
+
+    def test_bodies(self):
+        self.assert_same_result(
+            '{"text": "Отзыв\\u2028", "score": 7, "x": 1.5e3, "n": null}'
+            .encode()
+        )
+        self.assert_same_result(b'{"big": 123456789012345678901234567890}')
+        self.assert_same_result(
+            '{"name": "Драма"}'.encode('cp1251'), encoding='cp1251'
+        )
+
+    def test_errors(self):
+        for body in (b'', b'{"score": NaN}', b'{"a": 1,}', b'\xff\xfe'):
+            with self.subTest(body=body):
+                self.assert_same_error(body)
@@ -0,0 +1,84 @@
+from django.test import TestCase, override_settings
+
+from api.replay import (
+    NO_RESPONSE,
+    Result,
+    load_entries,
+    replay,
+    role_tokens,
+    summarize
+)
+from reviews.models import Genre
+from users.models import User
+
+
+@override_settings(API_CACHE_ENABLED=False)
+class ReplayTest(TestCase):
+    """Лог воспроизводится в приложении, сводка считается по маршрутам."""
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create(username='admin', email='a@a.ru', role='admin')
+        Genre.objects.create(name='Драма', slug='drama')
+
+    def test_load_entries_validates_lines(self):
+        entries = load_entries([
+            '{"method": "get", "path": "/api/v1/genres/"}\n',
+            '\n',
+            '{"method": "POST", "path": "/api/v1/genres/", '
+            '"body": {"name": "n", "slug": "n"}, "role": "admin"}\n',
+        ])
+        self.assertEqual(entries[0].method, 'GET')
+        self.assertEqual(entries[0].role, 'anonymous')
+        self.assertEqual(entries[1].body, {'name': 'n', 'slug': 'n'})
+        with self.assertRaisesMessage(ValueError, 'строка 1'):
+            load_entries(['{"method": "GET", "path": "api/v1/"}'])
+        with self.assertRaisesMessage(ValueError, 'неизвестная роль'):
+            load_entries(['{"method": "GET", "path": "/", "role": "x"}'])
+
+    def test_replay_in_process(self):
+        entries = load_entries([
+            '{"method": "GET", "path": "/api/v1/genres/"}',
+            '{"method": "GET", "path": "/api/v1/genres/?search=Д"}',
+            '{"method": "POST", "path": "/api/v1/genres/", '
+            '"body": {"name": "Комедия", "slug": "comedy"}, "role": "admin"}',
+            '{"method": "POST", "path": "/api/v1/genres/", '
+            '"body": {"name": "Комедия", "slug": "comedy"}}',
+            '{"method": "GET", "path": "/missing/"}',
+        ])
+        results, wall_time = replay(
+            entries, tokens=role_tokens({e.role for e in entries})
+        )
+        self.assertEqual(
+            [result.status for result in results], [200, 200, 201, 401, 404]
+        )
+        self.assertTrue(Genre.objects.filter(slug='comedy').exists())
+        summary = summarize(results, wall_time)
+        genres = summary['routes']['genres-list']
+        self.assertEqual(genres['requests'], 4)
+        self.assertEqual(genres['client_errors'], 1)
+        self.assertEqual(sum(genres['histogram']), 4)
+        self.assertGreater(genres['queries'], 0)
+        self.assertEqual(summary['routes']['unresolved']['requests'], 1)
+        self.assertEqual(summary['errors'], 0)
+
+    def test_role_without_user(self):
+        with self.assertRaisesMessage(ValueError, 'moderator'):
+            role_tokens({'moderator'})
+        self.assertEqual(
+            role_tokens({'moderator'}, {'moderator': 'jwt'}),
+            {'moderator': 'jwt'}
+        )
+
+    def test_summary_counts_server_errors(self):
+        results = [
+            Result('titles-list', 200, 0.002, 3),
+            Result('titles-list', 500, 0.2, 1),
+            Result('titles-list', NO_RESPONSE, 30.0, None),
+        ]
+        summary = summarize(results, 2.0)
+        self.assertEqual(summary['errors'], 2)
+        self.assertEqual(summary['throughput'], 1.5)
+        self.assertEqual(summary['queries'], 4)
+        histogram = summary['routes']['titles-list']['histogram']
+        self.assertEqual((histogram[0], histogram[-1]), (1, 1))
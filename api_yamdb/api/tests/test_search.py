@@ -0,0 +1,87 @@
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from rest_framework.test import APIClient
+
+from reviews.models import Title
+from reviews.search import search_titles
+
+TITLES_URL = '/api/v1/titles/'
+
+# триггеры, поддерживающие поисковый индекс
+TRIGGERS = {
+    'postgresql': (
+        "SELECT count(*) FROM pg_trigger "
+        "WHERE tgname = 'reviews_title_search_vector_trigger'",
+        "DROP TRIGGER reviews_title_search_vector_trigger ON reviews_title",
+        1,
+    ),
+    'sqlite': (
+        "SELECT count(*) FROM sqlite_master "
+        "WHERE type = 'trigger' AND name LIKE 'reviews_title_fts_%'",
+        "DROP TRIGGER reviews_title_fts_update",
+        3,
+    ),
+}
+
+
+@skipUnless(connection.vendor in TRIGGERS, 'Поиск без индекса.')
+@override_settings(API_CACHE_ENABLED=False)
+class TitleSearchTest(TestCase):
+    """?q= ищет по индексу, который поддерживают триггеры базы."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.in_name = Title.objects.create(
+            name='Солярис', year=1972, description='Фантастика о станции'
+        )
+        cls.in_description = Title.objects.create(
+            name='Сталкер', year=1979, description='Снят после фильма Солярис'
+        )
+        Title.objects.create(
+            name='Зеркало', year=1975, description='Воспоминания'
+        )
+
+    def search(self, text):
+        return list(search_titles(Title.objects.all(), text))
+
+    def test_ranking(self):
+        self.assertEqual(
+            self.search('солярис'), [self.in_name, self.in_description]
+        )
+        response = APIClient().get(TITLES_URL, {'q': 'солярис'})
+        self.assertEqual(
+            [title['id'] for title in response.json()['results']],
+            [self.in_name.pk, self.in_description.pk]
+        )
+
+    def test_all_words_required(self):
+        self.assertEqual(self.search('сталкер фильма'), [self.in_description])
+        self.assertEqual(self.search('сталкер станции'), [])
+
+    def test_index_follows_update_and_delete(self):
+        Title.objects.filter(pk=self.in_name.pk).update(name='Андрей Рублев')
+        self.assertEqual(self.search('рублев'), [self.in_name])
+        self.assertEqual(self.search('солярис'), [self.in_description])
+        Title.objects.filter(pk=self.in_description.pk).delete()
+        self.assertEqual(self.search('солярис'), [])
+
+    def test_rating_update_keeps_index(self):
+        Title.objects.filter(pk=self.in_name.pk).apply_rating_delta(8, 1)
+        self.assertEqual(self.search('солярис')[0], self.in_name)
+
+    def test_triggers_restored_after_migrate(self):
+        count, drop, expected = TRIGGERS[connection.vendor]
+        with connection.cursor() as cursor:
+            cursor.execute(drop)
+            cursor.execute(count)
+            self.assertLess(cursor.fetchone()[0], expected)
+        call_command('migrate', verbosity=0)
+        with connection.cursor() as cursor:
+            cursor.execute(count)
+            self.assertEqual(cursor.fetchone()[0], expected)
+        Title.objects.filter(pk=self.in_name.pk).update(name='Андрей Рублев')
+        self.assertEqual(self.search('рублев'), [self.in_name])
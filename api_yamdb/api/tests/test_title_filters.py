@@ -0,0 +1,120 @@
+from django.test import TestCase, override_settings
+
+from rest_framework.test import APIClient
+
+from reviews.models import Genre, Review, Title
+from users.models import User
+
+TITLES_URL = '/api/v1/titles/'
+
+
+@override_settings(API_CACHE_ENABLED=False)
+class TitleListingTest(TestCase):
+    """Сортировка, диапазоны и фильтр по нескольким жанрам."""
+
+    @classmethod
+    def setUpTestData(cls):
+        drama = Genre.objects.create(name='Драма', slug='drama')
+        comedy = Genre.objects.create(name='Комедия', slug='comedy')
+        horror = Genre.objects.create(name='Ужасы', slug='horror')
+        users = [
+            User.objects.create(
+                username=f'user{number}', email=f'{number}@u.ru'
+            )
+            for number in range(3)
+        ]
+        # название, год, оценки, жанры
+        rows = (
+            ('Б', 1990, (8, 10), (drama, comedy)),
+            ('А', 2005, (3,), (drama,)),
+            ('Г', 2010, (), (comedy,)),
+            ('В', 2000, (7, 7, 7), (horror, drama)),
+            ('Д', 1995, (), ()),
+        )
+        for name, year, scores, genres in rows:
+            title = Title.objects.create(name=name, year=year, description='')
+            title.genre.set(genres)
+            for user, score in zip(users, scores):
+                Review.objects.create(
+                    title=title, author=user, text='t', score=score
+                )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def names(self, params):
+        response = self.client.get(TITLES_URL, {'limit': 100, **params})
+        self.assertEqual(response.status_code, 200, response.content)
+        return [title['name'] for title in response.json()['results']]
+
+    def test_ordering(self):
+        self.assertEqual(
+            self.names({'ordering': 'name'}), ['А', 'Б', 'В', 'Г', 'Д']
+        )
+        self.assertEqual(
+            self.names({'ordering': '-year'}), ['Г', 'А', 'В', 'Д', 'Б']
+        )
+        # без оценок - наименьший рейтинг, по id внутри равных
+        self.assertEqual(
+            self.names({'ordering': '-rating'}), ['Б', 'В', 'А', 'Д', 'Г']
+        )
+        self.assertEqual(
+            self.names({'ordering': 'rating'}), ['Г', 'Д', 'А', 'В', 'Б']
+        )
+        self.assertEqual(
+            self.names({'ordering': '-review_count'}),
+            ['В', 'Б', 'А', 'Д', 'Г']
+        )
+
+    def test_unknown_ordering(self):
+        response = self.client.get(TITLES_URL, {'ordering': 'description'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('review_count', response.json()['ordering'][0])
+
+    def test_cursor_follows_ordering(self):
+        for ordering in ('rating', '-rating', '-review_count'):
+            with self.subTest(ordering=ordering):
+                expected = self.names({'ordering': ordering})
+                response = self.client.get(TITLES_URL, {
+                    'ordering': ordering, 'pagination': 'cursor', 'limit': 2
+                }).json()
+                names = []
+                while True:
+                    names += [title['name'] for title in response['results']]
+                    if response['next'] is None:
+                        break
+                    last = response
+                    response = self.client.get(response['next']).json()
+                self.assertEqual(names, expected)
+                previous = self.client.get(response['previous']).json()
+                self.assertEqual(previous['results'], last['results'])
+
+    def test_ranges(self):
+        self.assertEqual(
+            self.names({'year_min': 1995, 'year_max': 2005,
+                        'ordering': 'year'}),
+            ['Д', 'В', 'А']
+        )
+        self.assertEqual(
+            self.names({'rating_min': 5, 'ordering': 'rating'}), ['В', 'Б']
+        )
+        self.assertEqual(
+            self.names({'rating_max': 7, 'ordering': 'rating'}), ['А', 'В']
+        )
+
+    def test_genres(self):
+        self.assertEqual(
+            self.names({'genre': 'comedy,horror', 'ordering': 'name'}),
+            ['Б', 'В', 'Г']
+        )
+        self.assertEqual(
+            self.names({'genre': 'drama,comedy', 'genre_mode': 'all'}),
+            ['Б']
+        )
+        response = self.client.get(TITLES_URL, {
+            'genre': 'drama,comedy,horror'
+        })
+        # каждое произведение один раз, сколько бы жанров ни совпало
+        self.assertEqual(response.json()['count'], 4)
+        response = self.client.get(TITLES_URL, {'genre_mode': 'some'})
+        self.assertEqual(response.status_code, 400)
@@ -1,11 +1,16 @@
-from django.shortcuts import get_object_or_404, get_list_or_404
-from django.db.models import Avg
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
 
 from rest_framework import (
     viewsets,
     filters,
-    mixins
+    mixins,
+    status
 )
+from rest_framework.decorators import action
+from rest_framework.response import Response
 
 from django_filters import rest_framework as dfilters
 
@@ -13,7 +18,8 @@ from reviews.models import (
     Category,
     Genre,
     Title,
-    Review
+    Review,
+    titles_changed
 )
 from api.serializers import (
     CategorySerializer,
@@ -24,10 +30,73 @@ from api.serializers import (
     CommentSerializer,
 )
 from api.permissions import (
+    OnlyAdmin,
     OnlyAdminOrReadonly,
     IsAuthorOrVIPRole
 )
-from api.filters import TitleGenreFilter
+from api.cache import (
+    CachedListMixin,
+    CachedListRetrieveMixin,
+    bump_versions
+)
+from api.conditional import ConditionalGetMixin
+from api.documents import DOCUMENT_COLUMNS, TitleDocumentMixin
+from api.export import iter_ndjson
+from api.fieldsets import SparseFieldsetMixin
+from api.filters import OrderingFilter, TitleGenreFilter, parse_ordering
+from api.pagination import NameKeysetPagination, PubDateKeysetPagination
+
+
+class KeysetPaginationMixin:
+    """Курсорная пагинация по запросу клиента.
+
+    По умолчанию используется пагинация из настроек, курсорная включается
+    параметром ?pagination=cursor либо переданным курсором ?cursor=.
+    Если вьюсет задает сортировку (get_ordering), курсор идет по ней.
+    """
+
+    keyset_pagination_class = None
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if self.keyset_pagination_class is not None and (
+                params.get('pagination') == 'cursor'
+                or params.get('cursor')
+            ):
+                self._paginator = self.keyset_pagination_class()
+                ordering = getattr(self, 'get_ordering', lambda: None)()
+                if ordering is not None:
+                    self._paginator.ordering = ordering
+                return self._paginator
+        return super().paginator
+
+
+class NestedParentMixin:
+    """Разрешает родительский объект вложенного маршрута один раз за запрос.
+
+    parent_lookups - соответствие полей родительской модели kwargs URL,
+    все условия проверяются одним запросом. Результат кэшируется на
+    экземпляре вьюсета и используется в get_queryset, perform_create и
+    сериализаторах (через context['view']). Пермишены родителя не
+    проверяют: несуществующий родитель дает 404 уже в get_queryset.
+    """
+
+    parent_model = None
+    parent_lookups = {}
+    parent_fields = ()
+
+    def get_parent(self):
+        if not hasattr(self, '_parent'):
+            queryset = self.parent_model.objects.all()
+            if self.parent_fields:
+                queryset = queryset.only(*self.parent_fields)
+            self._parent = get_object_or_404(queryset, **{
+                field: self.kwargs.get(kwarg)
+                for field, kwarg in self.parent_lookups.items()
+            })
+        return self._parent
 
 
 class ProjectBaseViewSet(
@@ -39,10 +108,11 @@ class ProjectBaseViewSet(
     permission_classes = [OnlyAdminOrReadonly]
 
 
-class CategoryViewSet(ProjectBaseViewSet):
+class CategoryViewSet(CachedListMixin, ProjectBaseViewSet):
     """Вьюсет для категории и жанров."""
 
     queryset = Category.objects.all()
+    cache_resources = ('categories',)
     serializer_class = CategorySerializer
     lookup_field = ('slug')
     filter_backends = (dfilters.DjangoFilterBackend, filters.SearchFilter)
@@ -50,8 +120,9 @@ class CategoryViewSet(ProjectBaseViewSet):
     search_fields = ('name',)
 
 
-class GenreViewSet(ProjectBaseViewSet):
+class GenreViewSet(CachedListMixin, ProjectBaseViewSet):
     queryset = Genre.objects.all()
+    cache_resources = ('genres',)
     serializer_class = GenreSerializer
     lookup_field = ('slug')
     filter_backends = (dfilters.DjangoFilterBackend, filters.SearchFilter)
@@ -59,55 +130,164 @@ class GenreViewSet(ProjectBaseViewSet):
     search_fields = ('name',)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(
+    CachedListRetrieveMixin,
+    ConditionalGetMixin,
+    TitleDocumentMixin,
+    KeysetPaginationMixin,
+    SparseFieldsetMixin,
+    viewsets.ModelViewSet
+):
     """Вьюсет для произведений."""
 
-    queryset = Title.objects.prefetch_related(
-        'genre', 'category'
-    ).annotate(rating=Avg('title_reviews__score'))
+    queryset = Title.objects.all()
     permission_classes = [OnlyAdminOrReadonly]
-    filter_backends = (dfilters.DjangoFilterBackend, filters.SearchFilter)
+    filter_backends = (dfilters.DjangoFilterBackend, OrderingFilter)
     filterset_class = TitleGenreFilter
+    keyset_pagination_class = NameKeysetPagination
+    # ?ordering= и поле модели, у каждого есть индекс (поле, id)
+    ordering_fields = {
+        'name': 'name',
+        'year': 'year',
+        'rating': 'rating',
+        'review_count': 'rating_count',
+    }
+    cache_resources = ('titles',)
+    # колонки, которые читаются для поля ответа, если оно не колонка
+    sparse_columns = {
+        'genre': (),
+        'category': ('category', 'category__name', 'category__slug'),
+    }
+
+    def get_queryset(self):
+        """Читает только колонки и связи запрошенных полей ответа."""
+
+        queryset = super().get_queryset()
+        if self.action not in self.sparse_actions:
+            return queryset
+        # поля курсора нужны пагинатору, чтобы построить ссылки
+        columns = {
+            'id',
+            *(field.lstrip('-')
+              for field in getattr(self.paginator, 'ordering', ()))
+        }
+        if self.use_documents():
+            return queryset.select_related('document').only(
+                *columns, *DOCUMENT_COLUMNS
+            )
+        fields = self.get_sparse_fields()
+        if fields is None:
+            fields = TitleSerializer.Meta.fields
+        for field in fields:
+            columns.update(self.sparse_columns.get(field, (field,)))
+        if 'category' in fields:
+            queryset = queryset.select_related('category')
+        if 'genre' in fields:
+            queryset = queryset.prefetch_related(Prefetch(
+                'genre', queryset=Genre.objects.only('name', 'slug')
+            ))
+        return queryset.only(*columns)
+
+    def get_ordering(self):
+        if not hasattr(self, '_ordering'):
+            self._ordering = None
+            if self.action == 'list':
+                self._ordering = parse_ordering(
+                    self.request.query_params, self.ordering_fields
+                )
+        return self._ordering
 
     def get_serializer_class(self):
         if self.action in ['retrieve', 'list']:
             return TitleSerializer
         return CreateTitleSerializer
 
+    def create(self, request, *args, **kwargs):
+        """Принимает один тайтл или массив тайтлов."""
+
+        if not isinstance(request.data, list):
+            return super().create(request, *args, **kwargs)
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        self.perform_bulk_create(serializer)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-class ReviewViewSet(viewsets.ModelViewSet):
+    def perform_bulk_create(self, serializer):
+        since = timezone.now()
+        serializer.save()
+        # bulk_create не отправляет post_save
+        bump_versions(self.cache_resources)
+        titles_changed.send(sender=Title, since=since)
+
+    @action(['get'], detail=False, permission_classes=[OnlyAdmin])
+    def export(self, request):
+        """Потоковая выгрузка всех произведений в NDJSON (?gzip=1)."""
+
+        compress = request.query_params.get('gzip') == '1'
+        response = StreamingHttpResponse(
+            iter_ndjson(compress=compress),
+            content_type=(
+                'application/gzip' if compress else 'application/x-ndjson'
+            )
+        )
+        filename = 'titles.ndjson.gz' if compress else 'titles.ndjson'
+        response['Content-Disposition'] = (
+            f'attachment; filename="{filename}"'
+        )
+        return response
+
+
+class ReviewViewSet(
+    NestedParentMixin,
+    CachedListRetrieveMixin,
+    ConditionalGetMixin,
+    KeysetPaginationMixin,
+    viewsets.ModelViewSet
+):
     """Вьюсет для ревью."""
 
     serializer_class = ReviewSerializer
     permission_classes = [IsAuthorOrVIPRole]
+    keyset_pagination_class = PubDateKeysetPagination
+    cache_resources = ('reviews',)
+    freshness_fields = ('updated_at', 'author__updated_at')
+    parent_model = Title
+    parent_lookups = {'pk': 'title_id'}
+    parent_fields = ('id',)
 
     def get_queryset(self):
-        title_id = self.kwargs.get('title_id')
-        return get_object_or_404(Title, pk=title_id).title_reviews.all()
+        return self.get_parent().title_reviews.select_related('author')
 
     def perform_create(self, serializer):
-        title_id = self.kwargs.get('title_id')
-        title = get_object_or_404(Title, pk=title_id)
-        serializer.save(author=self.request.user, title=title)
+        serializer.save(author=self.request.user, title=self.get_parent())
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(
+    NestedParentMixin,
+    CachedListRetrieveMixin,
+    ConditionalGetMixin,
+    KeysetPaginationMixin,
+    viewsets.ModelViewSet
+):
     """Вьюсет для комментов."""
 
     serializer_class = CommentSerializer
     permission_classes = [IsAuthorOrVIPRole]
+    keyset_pagination_class = PubDateKeysetPagination
+    # комментарии показывают текст отзыва
+    cache_resources = ('comments', 'reviews')
+    freshness_fields = (
+        'updated_at', 'review__updated_at', 'author__updated_at'
+    )
+    parent_model = Review
+    # отзыв должен принадлежать произведению из URL
+    parent_lookups = {'pk': 'review_id', 'title_id': 'title_id'}
+    # updated_at отзыва входит в ETag страницы комментариев
+    parent_fields = ('id', 'title_id', 'text', 'updated_at')
 
     def get_queryset(self):
-        review_id = self.kwargs.get('review_id')
-        title_id = self.kwargs.get('title_id')
-        # проверяем что ревью соответсвует указанному тайтлу
-        get_list_or_404(
-            get_object_or_404(Title, pk=title_id).title_reviews.all(),
-            id=review_id
-        )
-        return get_object_or_404(Review, pk=review_id).review_comments.all()
+        # связанный менеджер проставляет комментариям уже загруженный отзыв
+        return self.get_parent().review_comments.select_related('author')
 
     def perform_create(self, serializer):
-        review_id = self.kwargs.get('review_id')
-        review = get_object_or_404(Review, pk=review_id)
-        serializer.save(author=self.request.user, review=review)
+        serializer.save(author=self.request.user, review=self.get_parent())
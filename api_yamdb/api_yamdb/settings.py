@@ -30,6 +30,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.RequestInstrumentationMiddleware',
+    'api.middleware.RequestProfilingMiddleware',
+    'api.middleware.ResponseCompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -75,6 +78,78 @@ DATABASES = {
 }
 
 
+# Cache
+# locmem живет в памяти одного процесса: при нескольких воркерах gunicorn
+# версии ресурсов нужно хранить в общем бэкенде (file или db).
+
+API_CACHE_ENABLED = os.getenv('API_CACHE_ENABLED', default='1') == '1'
+API_CACHE_ALIAS = 'api'
+
+# list и retrieve произведений из готовых JSON-документов (api/documents.py)
+TITLE_DOCUMENTS_ENABLED = (
+    os.getenv('TITLE_DOCUMENTS_ENABLED', default='1') == '1'
+)
+
+# сжатие ответов: gzip, br - если установлен пакет Brotli
+COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', default='1') == '1'
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', default=1024))
+COMPRESSION_BROTLI_QUALITY = int(
+    os.getenv('COMPRESSION_BROTLI_QUALITY', default=5)
+)
+
+SERVER_TIMING_ENABLED = os.getenv('SERVER_TIMING_ENABLED', default='1') == '1'
+# максимум SQL-запросов: 'МЕТОД маршрут', 'маршрут' или '*' для остальных;
+# в запас заложены проверка версии токена и условный GET
+API_QUERY_BUDGETS = {
+    # устаревшие документы собираются для ответа заново: выборка
+    # произведений и жанры (api/documents.py); кэшируемые эндпоинты
+    # читают версии ресурсов (api/cache.py)
+    'GET titles-list': 8,
+    'GET titles-detail': 8,
+    'GET reviews-list': 6,
+    'GET reviews-detail': 5,
+    'GET comments-list': 6,
+    'GET comments-detail': 5,
+    'GET genres-list': 4,
+    'GET categories-list': 4,
+    # пакетное создание на SQLite вставляет строки по одной
+    'POST titles-list': None,
+    '*': 50,
+}
+# при DEBUG превышение бюджета - ошибка, иначе предупреждение в логе
+API_QUERY_BUDGET_RAISE = DEBUG
+
+# доля запросов под cProfile и порог медленного запроса в секундах;
+# пустой порог выключает семплер стека
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', default=0))
+PROFILING_SLOW_THRESHOLD = (
+    float(os.getenv('PROFILING_SLOW_THRESHOLD'))
+    if os.getenv('PROFILING_SLOW_THRESHOLD') else None
+)
+PROFILING_SAMPLE_INTERVAL = 0.005
+PROFILING_DIR = os.getenv(
+    'PROFILING_DIR', default=os.path.join(BASE_DIR, 'profiles')
+)
+PROFILING_MAX_FILES = int(os.getenv('PROFILING_MAX_FILES', default=500))
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    API_CACHE_ALIAS: {
+        'BACKEND': os.getenv(
+            'API_CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('API_CACHE_LOCATION', default='api-responses'),
+        'TIMEOUT': int(os.getenv('API_CACHE_TIMEOUT', default=60)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('API_CACHE_MAX_ENTRIES', default=5000)),
+        },
+    },
+}
+
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -121,7 +196,17 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 5,
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.StatelessJWTAuthentication',
+    ],
+    # orjson, если установлен; вывод совпадает с JSONRenderer
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
 }
 
@@ -135,5 +220,10 @@ SIMPLE_JWT = {
 }
 
 
+# срок действия кода подтверждения в секундах
+CONFIRMATION_CODE_TIMEOUT = int(
+    os.getenv('CONFIRMATION_CODE_TIMEOUT', default=60 * 60 * 24)
+)
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
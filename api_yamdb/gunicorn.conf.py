@@ -0,0 +1,18 @@
+"""Настройки gunicorn: общий каталог метрик Prometheus для воркеров."""
+import os
+import shutil
+
+from prometheus_client import multiprocess
+
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/prometheus')
+
+
+def on_starting(server):
+    # файлы прошлого запуска исказили бы счетчики
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+
+
+def child_exit(server, worker):
+    multiprocess.mark_process_dead(worker.pid)
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from users.models import User
+from users.models import OutboxEmail, User
 from reviews.models import (
     Review,
     Comment,
@@ -37,7 +37,23 @@ class CommentAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
 
+class OutboxEmailAdmin(admin.ModelAdmin):
+    """Админка для очереди писем."""
+    list_display = (
+        'pk',
+        'recipient',
+        'subject',
+        'attempts',
+        'send_after',
+        'sent_at',
+    )
+    search_fields = ('recipient',)
+    list_filter = ('sent_at',)
+    empty_value_display = '-пусто-'
+
+
 admin.site.register(User)
+admin.site.register(OutboxEmail, OutboxEmailAdmin)
 admin.site.register(Genre)
 admin.site.register(Category)
 admin.site.register(Title)
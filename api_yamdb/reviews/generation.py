@@ -0,0 +1,297 @@
+"""Генерация синтетических данных для проверок на больших объемах.
+
+Число отзывов на произведение распределено по Ципфу: немногие
+произведения собирают большую часть отзывов, у остальных их единицы.
+Каждый кусок данных строится своим генератором случайных чисел от
+зерна и номера куска, а первичные ключи всех строк, включая связи с
+жанрами и комментарии, назначаются заранее, поэтому результат не
+зависит от числа процессов и порядка их работы. Агрегаты
+рейтинга считаются при генерации и сразу согласованы с отзывами.
+"""
+import math
+import random
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    GenresTitle,
+    Review,
+    Title
+)
+from reviews.utils import keep_timestamps
+from users.models import User
+
+EPOCH = datetime(2015, 1, 1, tzinfo=timezone.utc)
+SPAN_SECONDS = 8 * 365 * 24 * 3600
+USERS_PER_CHUNK = 10000
+# под связи произведения с жанрами резервируется столько ключей
+MAX_GENRES_PER_TITLE = 3
+WORDS = (
+    'драма', 'комедия', 'история', 'любовь', 'война', 'мир', 'город',
+    'дорога', 'море', 'ночь', 'семья', 'тайна', 'герой', 'время', 'музыка',
+    'детство', 'память', 'север', 'лето', 'зима', 'побег', 'дом', 'сон',
+    'путешествие', 'судьба', 'друг', 'враг', 'песня', 'картина', 'роман',
+)
+
+Plan = namedtuple('Plan', (
+    'seed users genres categories titles reviews comments exponent '
+    'batch_size user_start genre_start category_start title_start '
+    'review_start link_start comment_start'
+))
+
+
+def chunk_random(seed, kind, index):
+    # строковое зерно хешируется одинаково во всех процессах и запусках
+    return random.Random(f'{seed}:{kind}:{index}')
+
+
+def zipf_counts(titles, reviews, exponent, cap):
+    """Число отзывов по рангу популярности, в сумме reviews.
+
+    Ранг r получает долю 1 / r ** exponent. Доли сверх cap (одного
+    отзыва на пользователя) срезаются, а остаток делится между
+    следующими рангами; сумма меньше reviews, только если отзывов
+    больше, чем titles * cap.
+    """
+
+    weights = [1 / rank ** exponent for rank in range(1, titles + 1)]
+    tails = list(accumulate(reversed(weights)))[::-1]
+    counts = []
+    remaining = reviews
+    for rank, weight in enumerate(weights):
+        if remaining * weight / tails[rank] < cap:
+            break
+        counts.append(cap)
+        remaining -= cap
+    if len(counts) == titles:
+        return counts
+    scale = remaining / tails[len(counts)]
+    shares = [int(weight * scale) for weight in weights[len(counts):]]
+    # остаток от округления вниз достается самым популярным
+    for index in range(remaining - sum(shares)):
+        shares[index] += 1
+    return counts + shares
+
+
+def random_text(rng, low, high):
+    return ' '.join(rng.choices(WORDS, k=rng.randint(low, high)))
+
+
+def random_date(rng, start=EPOCH, span=SPAN_SECONDS):
+    return start + timedelta(seconds=rng.randrange(span))
+
+
+def bulk_insert(model, objects, batch_size):
+    # Django 2.2 не ограничивает явный batch_size лимитами SQLite
+    batch_size = min(batch_size, connection.ops.bulk_batch_size(
+        model._meta.concrete_fields, objects
+    ) or 1)
+    model.objects.bulk_create(objects, batch_size=batch_size)
+
+
+def generate_users(plan, index, start, stop):
+    rng = chunk_random(plan.seed, 'users', index)
+    users = []
+    for number in range(start, stop):
+        pk = plan.user_start + number
+        users.append(User(
+            pk=pk,
+            username=f'user{pk}',
+            email=f'user{pk}@yamdb.fake',
+            bio=random_text(rng, 0, 10),
+            confirmation_salt=f'{rng.getrandbits(128):032x}',
+            date_joined=random_date(rng),
+        ))
+    with transaction.atomic():
+        bulk_insert(User, users, plan.batch_size)
+    return {'users': len(users)}
+
+
+def thread_lengths(plan, index, reviews):
+    """Число комментариев к каждому из reviews отзывов куска.
+
+    У длин веток свой генератор: их сумма нужна заранее, чтобы назначить
+    кускам непересекающиеся ключи комментариев.
+    """
+
+    if not plan.comments:
+        return [0] * reviews
+    # целая часть экспоненты - геометрическое распределение со средним
+    # plan.comments: длинные ветки редки, но встречаются
+    rate = math.log1p(1 / plan.comments)
+    rng = chunk_random(plan.seed, 'threads', index)
+    return [int(rng.expovariate(rate)) for _ in range(reviews)]
+
+
+def generate_titles(plan, index, first, counts, review_offset,
+                    comment_offset, threads):
+    """Произведения first..first + len(counts) со всеми отзывами.
+
+    Произведение, его связи с жанрами, отзывы и комментарии вставляются
+    в одной транзакции, так что прерванная генерация не оставляет
+    произведений с неполными агрегатами.
+    """
+
+    rng = chunk_random(plan.seed, 'titles', index)
+    threads = iter(threads)
+    titles, links, reviews, comments = [], [], [], []
+    review_pk = plan.review_start + review_offset
+    comment_pk = plan.comment_start + comment_offset
+    for number, count in enumerate(counts, start=first):
+        pk = plan.title_start + number
+        quality = rng.uniform(2, 9)
+        scores = [
+            min(10, max(1, round(rng.gauss(quality, 2))))
+            for _ in range(count)
+        ]
+        titles.append(Title(
+            pk=pk,
+            name=f'Произведение {pk} {random_text(rng, 1, 3)}',
+            year=rng.randint(1900, 2022),
+            description=random_text(rng, 5, 40),
+            category_id=(
+                plan.category_start + rng.randrange(plan.categories)
+                if plan.categories else None
+            ),
+            rating_sum=sum(scores),
+            rating_count=count,
+            rating=sum(scores) / count if count else None,
+            updated_at=EPOCH + timedelta(seconds=SPAN_SECONDS),
+        ))
+        if plan.genres:
+            for position, genre in enumerate(rng.sample(
+                range(plan.genres),
+                min(plan.genres, rng.randint(1, MAX_GENRES_PER_TITLE))
+            )):
+                links.append(GenresTitle(
+                    pk=(
+                        plan.link_start + number * MAX_GENRES_PER_TITLE
+                        + position
+                    ),
+                    title_id=pk,
+                    genre_id=plan.genre_start + genre
+                ))
+        # разные авторы - ограничение unuque_review соблюдается
+        authors = rng.sample(range(plan.users), count)
+        for author, score in zip(authors, scores):
+            pub_date = random_date(rng)
+            reviews.append(Review(
+                pk=review_pk,
+                title_id=pk,
+                author_id=plan.user_start + author,
+                text=random_text(rng, 5, 60),
+                score=score,
+                pub_date=pub_date,
+                updated_at=pub_date,
+            ))
+            for _ in range(next(threads)):
+                comment_date = random_date(rng, pub_date, 30 * 24 * 3600)
+                comments.append(Comment(
+                    pk=comment_pk,
+                    review_id=review_pk,
+                    author_id=plan.user_start + rng.randrange(plan.users),
+                    text=random_text(rng, 2, 30),
+                    pub_date=comment_date,
+                    updated_at=comment_date,
+                ))
+                comment_pk += 1
+            review_pk += 1
+    with keep_timestamps([Title, Review, Comment]), transaction.atomic():
+        bulk_insert(Title, titles, plan.batch_size)
+        bulk_insert(GenresTitle, links, plan.batch_size)
+        bulk_insert(Review, reviews, plan.batch_size)
+        bulk_insert(Comment, comments, plan.batch_size)
+    return {
+        'titles': len(titles),
+        'reviews': len(reviews),
+        'comments': len(comments),
+    }
+
+
+def next_pk(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def make_plan(seed, users, genres, categories, titles, reviews, comments,
+              exponent, batch_size):
+    """План генерации с первичными ключами после уже существующих."""
+
+    return Plan(
+        seed, users, genres, categories, titles, reviews, comments,
+        exponent, batch_size,
+        user_start=next_pk(User),
+        genre_start=next_pk(Genre),
+        category_start=next_pk(Category),
+        title_start=next_pk(Title),
+        review_start=next_pk(Review),
+        link_start=next_pk(GenresTitle),
+        comment_start=next_pk(Comment),
+    )
+
+
+def run_tasks(function, tasks, workers):
+    if workers == 1 or len(tasks) < 2:
+        for task in tasks:
+            yield function(*task)
+        return
+    # соединения с базой не должны переходить в дочерние процессы
+    connections.close_all()
+    with ProcessPoolExecutor(workers) as executor:
+        yield from executor.map(function, *zip(*tasks))
+
+
+def generate(plan, workers=1, titles_per_chunk=1000):
+    """Создает данные по плану, выдает счетчики по мере готовности."""
+
+    bulk_insert(Genre, [
+        Genre(pk=pk, name=f'Жанр {pk}', slug=f'genre-{pk}')
+        for pk in range(plan.genre_start, plan.genre_start + plan.genres)
+    ], plan.batch_size)
+    bulk_insert(Category, [
+        Category(pk=pk, name=f'Категория {pk}', slug=f'category-{pk}')
+        for pk in range(
+            plan.category_start, plan.category_start + plan.categories
+        )
+    ], plan.batch_size)
+    yield {'genres': plan.genres, 'categories': plan.categories}
+
+    yield from run_tasks(generate_users, [
+        (plan, index, start, min(start + USERS_PER_CHUNK, plan.users))
+        for index, start in enumerate(
+            range(0, plan.users, USERS_PER_CHUNK)
+        )
+    ], workers)
+
+    counts = zipf_counts(
+        plan.titles, plan.reviews, plan.exponent, plan.users
+    )
+    # популярные произведения разбросаны по id, а не идут первыми
+    random.Random(f'{plan.seed}:ranks').shuffle(counts)
+    tasks = []
+    review_offset = comment_offset = 0
+    for index, first in enumerate(range(0, plan.titles, titles_per_chunk)):
+        chunk = counts[first:first + titles_per_chunk]
+        threads = thread_lengths(plan, index, sum(chunk))
+        tasks.append((
+            plan, index, first, chunk, review_offset, comment_offset, threads
+        ))
+        review_offset += sum(chunk)
+        comment_offset += sum(threads)
+    yield from run_tasks(generate_titles, tasks, workers)
+
+    statements = connection.ops.sequence_reset_sql(no_style(), [
+        User, Genre, Category, Title, GenresTitle, Review, Comment
+    ])
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
@@ -0,0 +1,119 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from reviews.generation import generate, make_plan
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    GenresTitle,
+    Review,
+    Title,
+    bulk_loaded
+)
+from users.models import User
+
+GENERATED_MODELS = (User, Genre, Category, Title, GenresTitle, Review, Comment)
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует синтетических пользователей, произведения, отзывы с '
+        'распределением Ципфа и ветки комментариев для нагрузочных проверок.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--genres', type=int, default=30)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--titles', type=int, default=10000)
+        parser.add_argument(
+            '--reviews',
+            type=int,
+            default=100000,
+            help='Сколько отзывов создать всего.'
+        )
+        parser.add_argument(
+            '--comments',
+            type=float,
+            default=1.0,
+            help='Среднее число комментариев на отзыв.'
+        )
+        parser.add_argument(
+            '--zipf-exponent',
+            type=float,
+            default=1.1,
+            help='Показатель распределения отзывов по произведениям.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Сколько строк вставлять одним запросом.'
+        )
+        parser.add_argument(
+            '--titles-per-chunk',
+            type=int,
+            default=1000,
+            help='Сколько произведений с отзывами генерирует одна задача.'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Число процессов; на SQLite всегда один.'
+        )
+
+    def validate(self, options):
+        for name in ('users', 'genres', 'categories', 'titles', 'reviews'):
+            if options[name] < 0:
+                raise CommandError(f'--{name} не может быть отрицательным.')
+        for name in ('batch_size', 'titles_per_chunk', 'workers'):
+            if options[name] < 1:
+                raise CommandError(
+                    f'--{name.replace("_", "-")} должен быть положительным.'
+                )
+        if options['comments'] < 0 or options['zipf_exponent'] <= 0:
+            raise CommandError(
+                '--comments и --zipf-exponent должны быть положительными.'
+            )
+        if options['reviews'] and not options['users']:
+            raise CommandError('Для отзывов нужны пользователи.')
+
+    def handle(self, *args, **options):
+        self.validate(options)
+        workers = options['workers']
+        if connection.vendor == 'sqlite' and workers > 1:
+            # SQLite не допускает параллельной записи
+            self.stdout.write('SQLite: генерация в одном процессе')
+            workers = 1
+
+        plan = make_plan(
+            options['seed'], options['users'], options['genres'],
+            options['categories'], options['titles'], options['reviews'],
+            options['comments'], options['zipf_exponent'],
+            options['batch_size']
+        )
+        started = time.monotonic()
+        totals = {}
+        for counts in generate(plan, workers, options['titles_per_chunk']):
+            for name, count in counts.items():
+                totals[name] = totals.get(name, 0) + count
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                ', '.join(f'{name}: {count}' for name, count in totals.items())
+                + f' ({elapsed:.1f} с)'
+            )
+        bulk_loaded.send(sender=self.__class__, models=GENERATED_MODELS)
+        if totals.get('reviews', 0) < options['reviews']:
+            self.stderr.write(
+                'Отзывов меньше запрошенного: у каждого произведения не '
+                'больше одного отзыва на пользователя.'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.monotonic() - started:.1f} с'
+        ))
@@ -0,0 +1,264 @@
+import csv
+import io
+import json
+import os
+import time
+from collections import namedtuple
+from datetime import datetime
+from itertools import islice
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    GenresTitle,
+    Review,
+    Title,
+    bulk_loaded
+)
+from reviews.utils import keep_timestamps
+from users.models import User
+
+Resource = namedtuple('Resource', 'name filenames model aliases')
+
+# порядок важен: внешние ключи ссылаются на уже загруженные таблицы
+RESOURCES = (
+    Resource('users', ('users',), User, {}),
+    Resource('category', ('category', 'categories'), Category, {}),
+    Resource('genre', ('genre', 'genres'), Genre, {}),
+    Resource('titles', ('titles',), Title, {'category': 'category_id'}),
+    Resource('genre_title', ('genre_title',), GenresTitle, {
+        'title': 'title_id', 'genre': 'genre_id'
+    }),
+    Resource('review', ('review', 'reviews'), Review, {
+        'title': 'title_id', 'author': 'author_id'
+    }),
+    Resource('comments', ('comments',), Comment, {
+        'review': 'review_id', 'author': 'author_id'
+    }),
+)
+EXTENSIONS = ('.csv', '.jsonl')
+
+
+def read_rows(path):
+    """Построчно читает CSV или JSONL, не загружая файл в память."""
+
+    with open(path, encoding='utf-8', newline='') as source:
+        if path.endswith('.jsonl'):
+            for line in source:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(source)
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково загружает датасет YaMDb из CSV/JSONL файлов '
+        '(users, category, genre, titles, genre_title, review, comments).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Каталог с файлами <ресурс>.csv или <ресурс>.jsonl.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Сколько строк вставлять за одну транзакцию.'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл контрольных точек, по умолчанию <path>/.import_state'
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Продолжить с последней контрольной точки.'
+        )
+        parser.add_argument(
+            '--no-copy',
+            action='store_true',
+            help='Не использовать COPY на PostgreSQL.'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.isdir(path):
+            raise CommandError(f'Каталог {path} не найден.')
+        self.batch_size = options['batch_size']
+        if self.batch_size < 1:
+            raise CommandError('--batch-size должен быть положительным.')
+        self.use_copy = (
+            connection.vendor == 'postgresql' and not options['no_copy']
+        )
+        self.checkpoint_path = options['checkpoint'] or os.path.join(
+            path, '.import_state'
+        )
+        self.state = self.load_state() if options['resume'] else {}
+
+        started = time.monotonic()
+        total = 0
+        imported_models = []
+        models = [resource.model for resource in RESOURCES]
+        with keep_timestamps(models) as self.timestamp_fields:
+            for resource in RESOURCES:
+                source = self.find_source(path, resource)
+                if source is None:
+                    self.stdout.write(f'{resource.name}: файл не найден')
+                    continue
+                total += self.import_resource(resource, source)
+                imported_models.append(resource.model)
+
+        self.reset_sequences(imported_models)
+        if Review in imported_models:
+            call_command('reconcile_ratings', stdout=self.stdout)
+        if imported_models:
+            bulk_loaded.send(sender=self.__class__, models=imported_models)
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено строк: {total} за {elapsed:.1f} с '
+            f'({total / elapsed if elapsed else 0:.0f} строк/с)'
+        ))
+
+    def find_source(self, path, resource):
+        for filename in resource.filenames:
+            for extension in EXTENSIONS:
+                source = os.path.join(path, filename + extension)
+                if os.path.exists(source):
+                    return source
+        return None
+
+    def load_state(self):
+        if not os.path.exists(self.checkpoint_path):
+            return {}
+        with open(self.checkpoint_path, encoding='utf-8') as state_file:
+            return json.load(state_file)
+
+    def save_state(self):
+        tmp_path = self.checkpoint_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as state_file:
+            json.dump(self.state, state_file)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def import_resource(self, resource, source):
+        state = self.state.setdefault(resource.name, {'rows': 0})
+        if state.get('done'):
+            self.stdout.write(f'{resource.name}: уже загружен, пропускаем')
+            return 0
+        fields = {
+            field.attname: field
+            for field in resource.model._meta.concrete_fields
+        }
+        rows = islice(read_rows(source), state['rows'], None)
+        started = time.monotonic()
+        imported = 0
+        warned = set()
+        while True:
+            batch = []
+            for row in islice(rows, self.batch_size):
+                batch.append(
+                    self.build_instance(resource, fields, row, warned)
+                )
+            if not batch:
+                break
+            with transaction.atomic():
+                self.insert_batch(resource.model, batch)
+            imported += len(batch)
+            state['rows'] += len(batch)
+            self.save_state()
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f'{resource.name}: {state["rows"]} строк '
+                f'({imported / elapsed if elapsed else 0:.0f} строк/с)'
+            )
+        state['done'] = True
+        self.save_state()
+        return imported
+
+    def build_instance(self, resource, fields, row, warned):
+        values = {}
+        for column, value in row.items():
+            attname = resource.aliases.get(column, column)
+            field = fields.get(attname)
+            if field is None:
+                if column not in warned:
+                    warned.add(column)
+                    self.stderr.write(
+                        f'{resource.name}: неизвестная колонка {column}'
+                    )
+                continue
+            if value == '' and field.null:
+                value = None
+            if value is not None:
+                value = field.to_python(value)
+            if isinstance(value, datetime) and timezone.is_naive(value):
+                value = timezone.make_aware(value, timezone.utc)
+            values[attname] = value
+        for field in self.timestamp_fields:
+            if (
+                field.model is resource.model
+                and values.get(field.attname) is None
+            ):
+                values[field.attname] = timezone.now()
+        return resource.model(**values)
+
+    def insert_batch(self, model, batch):
+        if self.use_copy:
+            self.copy_batch(model, batch)
+        else:
+            # ignore_conflicts делает повтор пачки после сбоя безопасным
+            model.objects.bulk_create(batch, ignore_conflicts=True)
+
+    def copy_batch(self, model, batch):
+        """COPY во временную таблицу и INSERT ... ON CONFLICT DO NOTHING."""
+
+        fields = [
+            field for field in model._meta.concrete_fields
+            if not (field.primary_key and batch[0].pk is None)
+        ]
+        buffer = io.StringIO()
+        # строки в кавычках, NULL - пустое значение без кавычек
+        writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC)
+        for instance in batch:
+            writer.writerow([
+                field.get_db_prep_save(
+                    getattr(instance, field.attname), connection
+                )
+                for field in fields
+            ])
+        buffer.seek(0)
+        table = connection.ops.quote_name(model._meta.db_table)
+        columns = ', '.join(
+            connection.ops.quote_name(field.column) for field in fields
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TEMP TABLE import_buffer '
+                f'(LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP'
+            )
+            cursor.cursor.copy_expert(
+                f'COPY import_buffer ({columns}) FROM STDIN WITH CSV',
+                buffer
+            )
+            cursor.execute(
+                f'INSERT INTO {table} ({columns}) '
+                f'SELECT {columns} FROM import_buffer ON CONFLICT DO NOTHING'
+            )
+            # ON COMMIT DROP не сработает, если команда вызвана внутри
+            # внешней транзакции, а следующей пачке нужна пустая таблица
+            cursor.execute('DROP TABLE import_buffer')
+
+    def reset_sequences(self, models):
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
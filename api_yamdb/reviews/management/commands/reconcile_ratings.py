@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from reviews.models import Title, bulk_loaded
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает разошедшиеся агрегаты рейтинга произведений.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Сколько произведений проверять за одну транзакцию.'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_pk = 0
+        checked = fixed = 0
+        while True:
+            pks = list(
+                Title.objects.filter(pk__gt=last_pk).order_by(
+                    'pk'
+                ).values_list('pk', flat=True)[:batch_size]
+            )
+            if not pks:
+                break
+            fixed += Title.objects.filter(pk__in=pks).recalculate_rating()
+            checked += len(pks)
+            last_pk = pks[-1]
+        if fixed:
+            bulk_loaded.send(sender=self.__class__, models=[Title])
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено произведений: {checked}, исправлено: {fixed}'
+        ))
@@ -0,0 +1,24 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:40
+
+from django.db import migrations
+
+from reviews.search import install_search_index, uninstall_search_index
+
+
+def install(apps, schema_editor):
+    install_search_index(schema_editor.connection)
+
+
+def uninstall(apps, schema_editor):
+    uninstall_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_title_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:40
+
+from django.db import migrations
+from django.db.models import Min, Q
+from django.utils import timezone
+
+
+def remove_broken_links(apps, schema_editor):
+    """Удаляет связи без жанра и повторы пары жанр - произведение."""
+
+    GenresTitle = apps.get_model('reviews', 'GenresTitle')
+    Title = apps.get_model('reviews', 'Title')
+    keep = GenresTitle.objects.filter(genre__isnull=False).values(
+        'genre_id', 'title_id'
+    ).annotate(keep=Min('id')).values('keep')
+    broken = GenresTitle.objects.filter(
+        Q(genre__isnull=True) | ~Q(pk__in=keep)
+    )
+    # повторы показывались в жанрах произведения, кэш нужно сбросить
+    Title.objects.filter(
+        pk__in=broken.values('title_id')
+    ).update(updated_at=timezone.now())
+    broken.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_broken_links, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_genre_title_cleanup'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='comment',
+            options={'ordering': ['pub_date', 'id'], 'verbose_name': 'Комментарий', 'verbose_name_plural': 'Комментарии'},
+        ),
+        migrations.AlterModelOptions(
+            name='review',
+            options={'ordering': ['pub_date', 'id'], 'verbose_name': 'Ревью пользователя', 'verbose_name_plural': 'Ревью пользователей'},
+        ),
+        migrations.AlterField(
+            model_name='genrestitle',
+            name='genre',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, to='reviews.Genre'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['review', 'pub_date', 'id'], name='reviews_comment_review_pub_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['title', 'pub_date', 'id'], name='reviews_review_title_pub_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='genrestitle',
+            constraint=models.UniqueConstraint(fields=('genre', 'title'), name='unique_genre_title'),
+        ),
+    ]
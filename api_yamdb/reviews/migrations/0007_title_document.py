@@ -0,0 +1,26 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_genre_title_integrity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleDocument',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='document', serialize=False, to='reviews.Title')),
+                ('body', models.TextField(verbose_name='JSON-документ')),
+                ('updated_at', models.DateTimeField(verbose_name='Версия произведения')),
+            ],
+            options={
+                'verbose_name': 'Документ произведения',
+                'verbose_name_plural': 'Документы произведений',
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:52
+
+import django.core.validators
+from django.db import migrations, models
+
+
+def rating_nulls_first(apps, schema_editor):
+    """Индекс рейтинга с NULL в начале на PostgreSQL.
+
+    По умолчанию PostgreSQL держит NULL в конце индекса, а рейтинг
+    сортируется с NULL как наименьшим значением (api/pagination.py).
+    """
+
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX reviews_title_rating_idx')
+    schema_editor.execute(
+        'CREATE INDEX reviews_title_rating_idx '
+        'ON reviews_title (rating ASC NULLS FIRST, id)'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_title_document'),
+    ]
+
+    operations = [
+        # отдельный индекс по году заменяет reviews_title_year_idx
+        migrations.AlterField(
+            model_name='title',
+            name='year',
+            field=models.PositiveIntegerField(help_text='Год произведения не может превышать текущий.', validators=[django.core.validators.MaxValueValidator(2022)], verbose_name='Год выпуска'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['name', 'id'], name='reviews_title_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['year', 'id'], name='reviews_title_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['rating', 'id'], name='reviews_title_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['rating_count', 'id'], name='reviews_title_reviews_idx'),
+        ),
+        migrations.RunPython(rating_nulls_first, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:43
+
+from django.db import migrations, models
+import reviews.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_title_ordering_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='title',
+            name='year',
+            field=models.PositiveIntegerField(help_text='Год произведения не может превышать текущий.', validators=[reviews.models.validate_year], verbose_name='Год выпуска'),
+        ),
+    ]
@@ -1,10 +1,33 @@
-from datetime import datetime
-
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, FloatField, Sum
+from django.db.models.functions import Cast, NullIf
+from django.dispatch import Signal
+from django.utils import timezone
 from django.core.validators import MaxValueValidator, MinValueValidator
 
 from users.models import User
 
+# Отправляется после того, как сдвинут updated_at произведений: новые
+# даты изменения не раньше since. Строки обновляются запросом UPDATE,
+# поэтому отправитель не знает их ключей, получатель ищет изменившиеся
+# произведения по индексу updated_at.
+titles_changed = Signal()
+
+# Отправляется после массовой записи в обход save() (bulk_create, COPY,
+# UPDATE): post_save для таких строк не срабатывает, поэтому получатель
+# сбрасывает зависящие от моделей models кэши сразу для всей таблицы.
+bulk_loaded = Signal()
+
+
+def validate_year(value):
+    """Год выпуска не позже текущего.
+
+    Граница берется при проверке, а не при импорте модуля, поэтому не
+    попадает в миграции и не устаревает в долгоживущем процессе.
+    """
+
+    MaxValueValidator(timezone.now().year)(value)
+
 
 class Genre(models.Model):
     """Модель для жанров."""
@@ -58,16 +81,89 @@ class Category(models.Model):
         return self.name
 
 
+class TitleQuerySet(models.QuerySet):
+    """Операции над агрегатами рейтинга произведений."""
+
+    def update_changed(self, **fields):
+        """UPDATE со сдвигом updated_at, о котором сообщает titles_changed."""
+
+        now = timezone.now()
+        updated = self.update(updated_at=now, **fields)
+        titles_changed.send(sender=self.model, since=now)
+        return updated
+
+    def apply_rating_delta(self, score_delta, count_delta):
+        """Атомарно сдвигает сумму и число оценок одним UPDATE."""
+
+        rating_sum = F('rating_sum') + score_delta
+        rating_count = F('rating_count') + count_delta
+        return self.update_changed(
+            rating_sum=rating_sum,
+            rating_count=rating_count,
+            rating=Cast(rating_sum, FloatField()) / NullIf(
+                Cast(rating_count, FloatField()), 0.0
+            ),
+        )
+
+    def touch(self):
+        """Отмечает изменение представления произведений."""
+
+        return self.update_changed()
+
+    def recalculate_rating(self):
+        """Пересчитывает агрегаты по отзывам, возвращает число исправленных.
+
+        Строки произведений блокируются на время пересчета, поэтому
+        параллельные изменения отзывов не теряются.
+        """
+
+        with transaction.atomic():
+            stored = {
+                pk: (rating_sum, rating_count)
+                for pk, rating_sum, rating_count in self.select_for_update(
+                ).order_by('pk').values_list(
+                    'pk', 'rating_sum', 'rating_count'
+                )
+            }
+            actual = {
+                row['title_id']: (row['score_sum'], row['score_count'])
+                for row in Review.objects.filter(
+                    title_id__in=list(stored)
+                ).order_by().values('title_id').annotate(
+                    score_sum=Sum('score'), score_count=Count('id')
+                )
+            }
+            fixed = 0
+            now = timezone.now()
+            for pk, aggregates in stored.items():
+                rating_sum, rating_count = actual.get(pk, (0, 0))
+                if aggregates == (rating_sum, rating_count):
+                    continue
+                Title.objects.filter(pk=pk).update(
+                    rating_sum=rating_sum,
+                    rating_count=rating_count,
+                    rating=(
+                        rating_sum / rating_count if rating_count else None
+                    ),
+                    updated_at=now,
+                )
+                fixed += 1
+            if fixed:
+                titles_changed.send(sender=self.model, since=now)
+        return fixed
+
+
 class Title(models.Model):
     """Модель для информации о произведениях."""
 
+    # Поля агрегатов обновляются только через TitleQuerySet,
+    # обычное сохранение произведения их не перезаписывает.
+    RATING_FIELDS = ('rating_sum', 'rating_count', 'rating')
+
     name = models.TextField(verbose_name='Название произведения')
     year = models.PositiveIntegerField(
         verbose_name='Год выпуска',
-        db_index=True,
-        validators=[
-            MaxValueValidator(datetime.now().year)
-        ],
+        validators=[validate_year],
         help_text='Год произведения не может превышать текущий.'
     )
     description = models.TextField(verbose_name='Описание')
@@ -81,22 +177,103 @@ class Title(models.Model):
         null=True,
         related_name='category_titles'
     )
+    rating_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        default=0,
+        editable=False
+    )
+    rating_count = models.PositiveIntegerField(
+        verbose_name='Количество оценок',
+        default=0,
+        editable=False
+    )
+    rating = models.FloatField(
+        verbose_name='Рейтинг',
+        blank=True,
+        null=True,
+        editable=False
+    )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+        db_index=True
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Категория произведения'
         verbose_name_plural = 'Категории произведений'
+        # сортировки списка произведений (?ordering=), id - второй ключ;
+        # индекс по году служит и фильтрам по году
+        indexes = [
+            models.Index(fields=['name', 'id'], name='reviews_title_name_idx'),
+            models.Index(fields=['year', 'id'], name='reviews_title_year_idx'),
+            models.Index(
+                fields=['rating', 'id'], name='reviews_title_rating_idx'
+            ),
+            models.Index(
+                fields=['rating_count', 'id'],
+                name='reviews_title_reviews_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        if (
+            not self._state.adding
+            and not kwargs.get('force_insert')
+            and kwargs.get('update_fields') is None
+        ):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.RATING_FIELDS
+            ]
+        # auto_now проставит updated_at не раньше этой даты
+        since = timezone.now()
+        super().save(*args, **kwargs)
+        titles_changed.send(sender=Title, since=since)
+
+
+class TitleDocument(models.Model):
+    """Готовое JSON-представление произведения для читающих запросов.
+
+    Документ актуален, пока updated_at совпадает с датой изменения
+    произведения: все, что меняет представление, сдвигает эту дату.
+    """
+
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='document'
+    )
+    body = models.TextField(verbose_name='JSON-документ')
+    updated_at = models.DateTimeField(
+        verbose_name='Версия произведения'
+    )
+
+    class Meta:
+        verbose_name = 'Документ произведения'
+        verbose_name_plural = 'Документы произведений'
+
+    def __str__(self):
+        return f'{self.title_id} {self.updated_at}'
+
 
 class GenresTitle(models.Model):
     """Модель для связи произведения и жанра."""
 
+    # связи удаляемого жанра удаляет сигнал touch_genre_titles одним
+    # DELETE, каскад Django обновлял бы произведение на каждую связь;
+    # поиск по genre_id обслуживает индекс unique_genre_title
     genre = models.ForeignKey(
         Genre,
-        on_delete=models.SET_NULL,
-        null=True
+        on_delete=models.DO_NOTHING,
+        db_index=False
     )
     title = models.ForeignKey(
         Title,
@@ -106,6 +283,12 @@ class GenresTitle(models.Model):
     class Meta:
         verbose_name = 'Жанр произведения'
         verbose_name_plural = 'Жанры произведений'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['genre', 'title'],
+                name='unique_genre_title',
+            )
+        ]
 
     def __str__(self):
         return f'{self.genre} {self.title}'
@@ -146,12 +329,22 @@ class Review(models.Model):
         auto_now_add=True,
         db_index=True,
     )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True
+    )
 
     class Meta:
-        ordering = ['pub_date']
+        ordering = ['pub_date', 'id']
         verbose_name = 'Ревью пользователя'
         verbose_name_plural = 'Ревью пользователей'
-
+        # отзывы произведения читаются по порядку без сортировки
+        indexes = [
+            models.Index(
+                fields=['title', 'pub_date', 'id'],
+                name='reviews_review_title_pub_idx',
+            )
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['title_id', 'author'],
@@ -162,6 +355,17 @@ class Review(models.Model):
     def __str__(self):
         return self.text[:15]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # запоминаем исходные значения для пересчета рейтинга
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     """Модель для комментов под ревью."""
@@ -190,11 +394,21 @@ class Comment(models.Model):
         auto_now_add=True,
         db_index=True
     )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True
+    )
 
     class Meta:
-        ordering = ['pub_date']
+        ordering = ['pub_date', 'id']
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                fields=['review', 'pub_date', 'id'],
+                name='reviews_comment_review_pub_idx',
+            )
+        ]
 
     def __str__(self):
         return self.text[:15]
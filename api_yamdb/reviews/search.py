@@ -0,0 +1,176 @@
+"""Полнотекстовый поиск по названию и описанию произведений.
+
+На PostgreSQL используется колонка tsvector с GIN-индексом, на SQLite
+(локальный запуск и тесты) - теневая таблица FTS5. Обе синхронизируются
+триггерами базы данных, поэтому поиск не зависит от того, каким путем
+изменилось произведение.
+"""
+import re
+
+from django.db import connections
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+SEARCH_CONFIG = 'russian'
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+POSTGRES_INSTALL = (
+    "ALTER TABLE reviews_title "
+    "ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    """
+    CREATE OR REPLACE FUNCTION reviews_title_search_vector_update()
+    RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('{config}', coalesce(NEW.name, '')), 'A')
+            || setweight(
+                to_tsvector('{config}', coalesce(NEW.description, '')), 'B'
+            );
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """.format(config=SEARCH_CONFIG),
+    "DROP TRIGGER IF EXISTS reviews_title_search_vector_trigger "
+    "ON reviews_title",
+    # пересчет только при изменении текста, а не агрегатов рейтинга
+    """
+    CREATE TRIGGER reviews_title_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, description ON reviews_title
+    FOR EACH ROW EXECUTE PROCEDURE reviews_title_search_vector_update()
+    """,
+    "UPDATE reviews_title SET name = name WHERE search_vector IS NULL",
+    "CREATE INDEX IF NOT EXISTS reviews_title_search_vector_idx "
+    "ON reviews_title USING gin (search_vector)",
+)
+
+POSTGRES_UNINSTALL = (
+    "DROP TRIGGER IF EXISTS reviews_title_search_vector_trigger "
+    "ON reviews_title",
+    "DROP FUNCTION IF EXISTS reviews_title_search_vector_update()",
+    "ALTER TABLE reviews_title DROP COLUMN IF EXISTS search_vector",
+)
+
+SQLITE_TRIGGERS = (
+    """
+    CREATE TRIGGER IF NOT EXISTS reviews_title_fts_insert
+    AFTER INSERT ON reviews_title BEGIN
+        INSERT INTO reviews_title_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS reviews_title_fts_delete
+    AFTER DELETE ON reviews_title BEGIN
+        INSERT INTO reviews_title_fts(
+            reviews_title_fts, rowid, name, description
+        ) VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS reviews_title_fts_update
+    AFTER UPDATE OF name, description ON reviews_title BEGIN
+        INSERT INTO reviews_title_fts(
+            reviews_title_fts, rowid, name, description
+        ) VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO reviews_title_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+)
+
+SQLITE_UNINSTALL = (
+    "DROP TRIGGER IF EXISTS reviews_title_fts_insert",
+    "DROP TRIGGER IF EXISTS reviews_title_fts_delete",
+    "DROP TRIGGER IF EXISTS reviews_title_fts_update",
+    "DROP TABLE IF EXISTS reviews_title_fts",
+)
+
+
+def install_search_index(db_connection):
+    """Создает поисковый индекс и триггеры, если их еще нет.
+
+    SQLite пересоздает таблицу при ALTER TABLE и теряет триггеры, поэтому
+    функция вызывается и из миграции, и после каждого migrate.
+    """
+
+    with db_connection.cursor() as cursor:
+        if db_connection.vendor == 'postgresql':
+            for statement in POSTGRES_INSTALL:
+                cursor.execute(statement)
+        elif db_connection.vendor == 'sqlite':
+            cursor.execute(
+                "SELECT count(*) FROM sqlite_master "
+                "WHERE type = 'trigger' AND name LIKE 'reviews_title_fts_%'"
+            )
+            if cursor.fetchone()[0] == len(SQLITE_TRIGGERS):
+                return
+            cursor.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS reviews_title_fts "
+                "USING fts5(name, description, content='reviews_title', "
+                "content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+            )
+            for statement in SQLITE_TRIGGERS:
+                cursor.execute(statement)
+            cursor.execute(
+                "INSERT INTO reviews_title_fts(reviews_title_fts) "
+                "VALUES ('rebuild')"
+            )
+
+
+def uninstall_search_index(db_connection):
+    statements = {
+        'postgresql': POSTGRES_UNINSTALL,
+        'sqlite': SQLITE_UNINSTALL,
+    }.get(db_connection.vendor, ())
+    with db_connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def fts5_query(text):
+    """Безопасный запрос FTS5: все слова обязательны, последнее - префикс."""
+
+    tokens = TOKEN_RE.findall(text)
+    if not tokens:
+        return None
+    quoted = [f'"{token}"' for token in tokens]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def search_titles(queryset, text):
+    """Фильтрует произведения по запросу и сортирует по релевантности.
+
+    Релевантность доступна в аннотации search_rank, больше - лучше.
+    """
+
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        tsquery = f"websearch_to_tsquery('{SEARCH_CONFIG}', %s)"
+        return queryset.annotate(search_rank=RawSQL(
+            f'ts_rank(reviews_title.search_vector, {tsquery})',
+            (text,),
+            output_field=FloatField()
+        )).extra(
+            where=[f'reviews_title.search_vector @@ {tsquery}'],
+            params=[text]
+        ).order_by('-search_rank', 'id')
+    if vendor == 'sqlite':
+        match = fts5_query(text)
+        if match is None:
+            return queryset.none()
+        # соединение с FTS-таблицей: MATCH выполняется один раз на запрос,
+        # а не в подзапросе на каждую строку; bm25 меньше у более
+        # релевантных строк, название весомее описания
+        return queryset.extra(
+            select={'search_rank': '-bm25(reviews_title_fts, 10.0, 1.0)'},
+            tables=['reviews_title_fts'],
+            where=[
+                'reviews_title_fts.rowid = reviews_title.id',
+                'reviews_title_fts MATCH %s',
+            ],
+            params=[match]
+        ).order_by('-search_rank', 'id')
+    return queryset.filter(
+        Q(name__icontains=text) | Q(description__icontains=text)
+    ).order_by('id')
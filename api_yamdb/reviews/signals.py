@@ -0,0 +1,115 @@
+from django.db import connections
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_migrate,
+    post_save,
+    pre_delete
+)
+from django.dispatch import receiver
+
+from reviews.models import Category, Genre, GenresTitle, Review, Title
+from reviews.search import install_search_index
+
+SEARCH_MIGRATION = ('reviews', '0003_title_search')
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, raw=False, **kwargs):
+    """Сдвигает агрегаты рейтинга при создании и изменении отзыва."""
+
+    if raw:
+        # loaddata: агрегаты восстанавливает команда reconcile_ratings
+        return
+    loaded = getattr(instance, '_loaded_values', None)
+    if created:
+        Title.objects.filter(pk=instance.title_id).apply_rating_delta(
+            instance.score, 1
+        )
+    elif loaded is None or not {'title_id', 'score'} <= loaded.keys():
+        # исходная оценка неизвестна, считаем агрегат заново
+        Title.objects.filter(pk=instance.title_id).recalculate_rating()
+    elif loaded.get('title_id') != instance.title_id:
+        Title.objects.filter(pk=loaded.get('title_id')).apply_rating_delta(
+            -loaded['score'], -1
+        )
+        Title.objects.filter(pk=instance.title_id).apply_rating_delta(
+            instance.score, 1
+        )
+    elif loaded['score'] != instance.score:
+        Title.objects.filter(pk=instance.title_id).apply_rating_delta(
+            instance.score - loaded['score'], 0
+        )
+    instance._loaded_values = {
+        'title_id': instance.title_id, 'score': instance.score
+    }
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    """Вычитает оценку удаленного отзыва, в том числе при bulk delete."""
+
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    Title.objects.filter(
+        pk=loaded.get('title_id', instance.title_id)
+    ).apply_rating_delta(-loaded.get('score', instance.score), -1)
+
+
+@receiver(post_save, sender=Genre)
+def touch_genre_titles(sender, instance, raw=False, **kwargs):
+    """Жанр входит в представление произведения."""
+
+    if not raw:
+        Title.objects.filter(genre=instance).touch()
+
+
+@receiver(pre_delete, sender=Genre)
+def unlink_deleted_genre(sender, instance, **kwargs):
+    """Удаляет связи жанра одним запросом без сигналов.
+
+    Произведения уже отмечены здесь, а кэш сбрасывает удаление жанра.
+    """
+
+    Title.objects.filter(genre=instance).touch()
+    GenresTitle.objects.filter(genre=instance)._raw_delete(instance._state.db)
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def touch_category_titles(sender, instance, raw=False, **kwargs):
+    """Категория входит в представление произведения."""
+
+    if not raw:
+        Title.objects.filter(category=instance).touch()
+
+
+@receiver(post_save, sender=GenresTitle)
+@receiver(post_delete, sender=GenresTitle)
+def touch_linked_title(sender, instance, raw=False, **kwargs):
+    if not raw:
+        Title.objects.filter(pk=instance.title_id).touch()
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def touch_titles_on_genre_change(sender, instance, action, reverse,
+                                 pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        Title.objects.filter(pk=instance.pk).touch()
+    elif pk_set:
+        Title.objects.filter(pk__in=pk_set).touch()
+    else:
+        Title.objects.filter(genre=instance).touch()
+
+
+@receiver(post_migrate)
+def restore_search_index(sender, using, **kwargs):
+    """Восстанавливает триггеры поиска, потерянные при ALTER TABLE."""
+
+    if sender.name != 'reviews':
+        return
+    connection = connections[using]
+    if SEARCH_MIGRATION in MigrationRecorder(connection).applied_migrations():
+        install_search_index(connection)
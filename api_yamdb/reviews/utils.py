@@ -0,0 +1,24 @@
+"""Общие помощники загрузки данных в обход API."""
+from contextlib import contextmanager
+
+
+@contextmanager
+def keep_timestamps(models):
+    """Не дает auto_now/auto_now_add затереть заданные даты.
+
+    Нужен импорту и генератору данных, которые переносят даты как есть.
+    """
+
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield fields
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
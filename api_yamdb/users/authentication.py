@@ -0,0 +1,80 @@
+"""JWT-аутентификация с проверкой версии токена.
+
+Для читающих запросов пользователь собирается из подписанных claims
+токена, из таблицы пользователей читается только версия токена.
+Пишущим запросам нужен настоящий экземпляр User (автор отзыва,
+комментария), поэтому для них строка пользователя загружается целиком.
+"""
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+
+from api.metrics import AUTH_FAILURES
+from users.tokens import get_token_version
+
+
+class RoleTokenUser(TokenUser):
+    """Пользователь из claims токена с теми же проверками роли, что у User."""
+
+    @cached_property
+    def role(self):
+        return self.token.get('role', 'user')
+
+    @property
+    def is_moderator(self):
+        return self.role == 'moderator'
+
+    @property
+    def is_admin(self):
+        return self.role == 'admin' or self.is_superuser
+
+    @property
+    def is_vip(self):
+        return self.is_moderator or self.is_admin
+
+
+class UserJWTAuthentication(JWTAuthentication):
+    """Загружает пользователя из базы и сверяет версию токена."""
+
+    stateless_methods = ()
+
+    def authenticate(self, request):
+        self.stateless = request.method in self.stateless_methods
+        try:
+            return super().authenticate(request)
+        except AuthenticationFailed as error:
+            # simplejwt кладет код ошибки в словарь detail
+            reason = (
+                error.detail.get('code', 'invalid')
+                if isinstance(error.detail, dict) else error.get_codes()
+            )
+            AUTH_FAILURES.labels(str(reason)).inc()
+            raise
+
+    def get_user(self, validated_token):
+        # токены, выпущенные до появления claims роли, проверяем по базе
+        if self.stateless and 'role' in validated_token:
+            user = RoleTokenUser(validated_token)
+            version = get_token_version(user.pk)
+            if version is None:
+                raise AuthenticationFailed(
+                    _('User not found'), code='user_not_found'
+                )
+        else:
+            user = super().get_user(validated_token)
+            version = user.token_version
+        if validated_token.get('ver', 0) != version:
+            raise AuthenticationFailed(
+                'Токен отозван.', code='token_revoked'
+            )
+        return user
+
+
+class StatelessJWTAuthentication(UserJWTAuthentication):
+    """Для безопасных методов обходится без запроса к базе."""
+
+    stateless_methods = SAFE_METHODS
@@ -0,0 +1,67 @@
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand, CommandError
+
+from users.outbox import MAX_ATTEMPTS, deliver_batch
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди outbox пачками с повторами.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Сколько писем отправлять за одну транзакцию.'
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=MAX_ATTEMPTS,
+            help='После стольких неудач письмо больше не отправляется.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Пауза в секундах, когда очередь пуста.'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Разобрать очередь и завершиться.'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size должен быть положительным.')
+        # одно SMTP-соединение на все пачки, а не на каждое письмо
+        mail_connection = get_connection()
+        total_sent = total_failed = 0
+        try:
+            while True:
+                sent, failed = deliver_batch(
+                    mail_connection, batch_size, options['max_attempts']
+                )
+                total_sent += sent
+                total_failed += failed
+                if sent or failed:
+                    self.stdout.write(
+                        f'Отправлено: {sent}, с ошибкой: {failed}'
+                    )
+                if sent + failed < batch_size:
+                    if options['once']:
+                        break
+                    # соединение не держим открытым, пока очередь пуста
+                    mail_connection.close()
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            mail_connection.close()
+        self.stdout.write(self.style.SUCCESS(
+            f'Всего отправлено: {total_sent}, с ошибкой: {total_failed}'
+        ))
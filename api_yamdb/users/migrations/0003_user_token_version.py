@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_user_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='token_version',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Увеличивается, чтобы отозвать выданные токены.', verbose_name='Версия токенов'),
+        ),
+    ]
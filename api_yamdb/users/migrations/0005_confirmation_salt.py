@@ -0,0 +1,33 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:15
+
+from django.db import migrations, models
+import users.models
+
+
+def fill_salts(apps, schema_editor):
+    # default вычисляется один раз на все существующие строки
+    User = apps.get_model('users', 'User')
+    for user in User.objects.only('pk').iterator():
+        User.objects.filter(pk=user.pk).update(
+            confirmation_salt=users.models.make_confirmation_salt()
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_outboxemail'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='user',
+            name='confirmation_code',
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='confirmation_salt',
+            field=models.CharField(default=users.models.make_confirmation_salt, editable=False, help_text='Смена соли делает выданные коды недействительными.', max_length=32, verbose_name='Соль кода подтверждения'),
+        ),
+        migrations.RunPython(fill_salts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def clear_sent_bodies(apps, schema_editor):
+    """Стирает коды подтверждения из уже отправленных писем."""
+
+    OutboxEmail = apps.get_model('users', 'OutboxEmail')
+    OutboxEmail.objects.filter(sent_at__isnull=False).update(body='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_confirmation_salt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxemail',
+            name='confirmation_for',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Код подтверждения для'),
+        ),
+        migrations.RunPython(clear_sent_bodies, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.utils import timezone
+from django.utils.crypto import get_random_string
 from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.core.exceptions import ValidationError
@@ -11,6 +13,10 @@ ROLE = (
 )
 
 
+def make_confirmation_salt():
+    return get_random_string(32)
+
+
 def validate_notme(value):
     """Username /me/ зарезервирован, для роутинга users/ во вьюсете."""
     if value == 'me':
@@ -23,6 +29,10 @@ def validate_notme(value):
 class User(AbstractUser):
     """Переопределяем модель User."""
 
+    # поля, зашитые в claims токена (users/tokens.py): их изменение
+    # отзывает выданные токены
+    TOKEN_CLAIM_FIELDS = ('username', 'role', 'is_superuser', 'is_active')
+
     username_validator = UnicodeUsernameValidator()
     username = models.CharField(
         verbose_name=_('username'),
@@ -62,12 +72,23 @@ class User(AbstractUser):
         blank=True,
         help_text='Введите информацию о себе.'
     )
-    confirmation_code = models.CharField(
-        verbose_name='Код для получения токена',
-        max_length=200,
-        blank=True,
-        null=True,
-        help_text='Никому не сообщайте этот код, даже администратору.'
+    confirmation_salt = models.CharField(
+        verbose_name='Соль кода подтверждения',
+        max_length=32,
+        default=make_confirmation_salt,
+        editable=False,
+        help_text='Смена соли делает выданные коды недействительными.'
+    )
+    token_version = models.PositiveIntegerField(
+        verbose_name='Версия токенов',
+        default=0,
+        editable=False,
+        help_text='Увеличивается, чтобы отозвать выданные токены.'
+    )
+    # имя автора входит в ответы отзывов и комментариев (api/conditional.py)
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True
     )
 
     class Meta:
@@ -95,3 +116,96 @@ class User(AbstractUser):
 
     def __str__(self):
         return self.username
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        user = super().from_db(db, field_names, values)
+        user._saved_claims = user.get_token_claims()
+        return user
+
+    def get_token_claims(self):
+        deferred = self.get_deferred_fields()
+        return {
+            name: getattr(self, name) for name in self.TOKEN_CLAIM_FIELDS
+            if name not in deferred
+        }
+
+    def save(self, *args, **kwargs):
+        if (
+            not self._state.adding
+            and not kwargs.get('force_insert')
+            and kwargs.get('update_fields') is None
+        ):
+            # версию меняет только revoke_tokens: устаревший экземпляр
+            # не должен откатить ее при сохранении
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name != 'token_version'
+                and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+        claims = self.get_token_claims()
+        saved = getattr(self, '_saved_claims', claims)
+        if any(
+            claims[name] != value for name, value in saved.items()
+            if name in claims
+        ):
+            from users.tokens import revoke_tokens
+
+            revoke_tokens(self)
+        self._saved_claims = claims
+
+
+class OutboxEmail(models.Model):
+    """Письмо, ожидающее отправки воркером run_outbox."""
+
+    recipient = models.EmailField(verbose_name='Получатель')
+    subject = models.CharField(verbose_name='Тема', max_length=255)
+    body = models.TextField(verbose_name='Текст')
+    # код подтверждения не хранится: он подставляется в текст на месте
+    # {confirmation_code} при отправке (users/outbox.py)
+    confirmation_for = models.ForeignKey(
+        User,
+        verbose_name='Код подтверждения для',
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='+'
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Дата создания',
+        auto_now_add=True
+    )
+    send_after = models.DateTimeField(
+        verbose_name='Отправить не раньше',
+        default=timezone.now
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попыток отправки',
+        default=0
+    )
+    sent_at = models.DateTimeField(
+        verbose_name='Дата отправки',
+        blank=True,
+        null=True
+    )
+    last_error = models.TextField(
+        verbose_name='Последняя ошибка',
+        blank=True
+    )
+
+    class Meta:
+        ordering = ['send_after', 'id']
+        indexes = [
+            models.Index(
+                fields=['sent_at', 'send_after'],
+                name='users_outbox_pending_idx'
+            ),
+        ]
+        verbose_name = 'Письмо в очереди'
+        verbose_name_plural = 'Очередь писем'
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
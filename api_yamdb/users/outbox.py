@@ -0,0 +1,106 @@
+"""Очередь исходящих писем в базе данных (transactional outbox).
+
+Письмо записывается в ту же транзакцию, что и изменение, ради которого
+оно отправляется, а доставкой занимается отдельный процесс run_outbox.
+Так запрос не ждет почтовый сервер, а письмо не теряется при откате.
+
+Коды подтверждения в очереди не хранятся: письмо ссылается на
+пользователя, а код собирается из его id и соли в момент отправки.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import transaction
+from django.utils import timezone
+
+from users.models import OutboxEmail
+from users.tokens import make_confirmation_code
+
+MAX_ATTEMPTS = 8
+BACKOFF_BASE = 30
+BACKOFF_MAX = 3600
+
+
+def enqueue_email(recipient, subject, body, confirmation_for=None):
+    """Ставит письмо в очередь.
+
+    Если передан confirmation_for, {confirmation_code} в body заменяется
+    кодом подтверждения этого пользователя при отправке.
+    """
+
+    return OutboxEmail.objects.create(
+        recipient=recipient,
+        subject=subject,
+        body=body,
+        confirmation_for=confirmation_for
+    )
+
+
+def render_body(email):
+    if email.confirmation_for is None:
+        return email.body
+    return email.body.format(
+        confirmation_code=make_confirmation_code(email.confirmation_for)
+    )
+
+
+def get_backoff(attempts):
+    """Пауза перед следующей попыткой: 30 с, 60 с, 120 с ... до часа."""
+
+    return timedelta(
+        seconds=min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+    )
+
+
+def pending_emails(max_attempts=MAX_ATTEMPTS):
+    return OutboxEmail.objects.filter(
+        sent_at__isnull=True,
+        send_after__lte=timezone.now(),
+        attempts__lt=max_attempts
+    )
+
+
+def deliver_batch(mail_connection, batch_size, max_attempts=MAX_ATTEMPTS):
+    """Отправляет одну пачку писем, возвращает (отправлено, с ошибкой).
+
+    Строки блокируются до конца транзакции, а skip_locked позволяет
+    запускать несколько воркеров одновременно.
+    """
+
+    sent = failed = 0
+    with transaction.atomic():
+        emails = list(
+            pending_emails(max_attempts).select_related(
+                'confirmation_for'
+            ).select_for_update(skip_locked=True, of=('self',))[:batch_size]
+        )
+        for email in emails:
+            message = EmailMessage(
+                email.subject,
+                render_body(email),
+                settings.DEFAULT_FROM_EMAIL,
+                [email.recipient],
+                connection=mail_connection
+            )
+            email.attempts += 1
+            try:
+                # open() ничего не делает, если соединение уже открыто
+                mail_connection.open()
+                message.send()
+            except Exception as error:
+                email.last_error = repr(error)
+                email.send_after = timezone.now() + get_backoff(
+                    email.attempts
+                )
+                email.save(
+                    update_fields=['attempts', 'last_error', 'send_after']
+                )
+                failed += 1
+                # соединение могло оборваться: откроется заново
+                mail_connection.close()
+            else:
+                email.sent_at = timezone.now()
+                email.save(update_fields=['attempts', 'sent_at'])
+                sent += 1
+    return sent, failed
@@ -5,6 +5,7 @@ from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 
 from users.models import User
+from users.tokens import check_confirmation_code
 
 
 class SignupSerialiser(serializers.ModelSerializer):
@@ -62,7 +63,7 @@ class GetUserSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = User
-        fields = User.USERNAME_FIELD
+        fields = (User.USERNAME_FIELD,)
 
 
 class TokenCreateSerialiser(serializers.Serializer):
@@ -82,11 +83,16 @@ class TokenCreateSerialiser(serializers.Serializer):
     }
 
     def validate(self, attrs):
-        """Валидируем введеный код."""
+        """Валидируем введеный код.
+
+        Найденный пользователь сохраняется в attrs['user'], чтобы вью не
+        читала его из базы повторно.
+        """
 
         username = attrs.get('username')
         confirmation_code = attrs.get('confirmation_code')
         user = get_object_or_404(User, username=username)
-        if user.confirmation_code != confirmation_code:
+        if not check_confirmation_code(user, confirmation_code):
             self.fail('invalid_conf_code')
+        attrs['user'] = user
         return attrs
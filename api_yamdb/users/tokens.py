@@ -0,0 +1,73 @@
+"""Access-токены с ролью пользователя и коды подтверждения."""
+import time
+
+from django.conf import settings
+from django.db.models import F
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.utils.http import base36_to_int, int_to_base36
+
+from rest_framework_simplejwt.tokens import AccessToken
+
+CONFIRMATION_CODE_SALT = 'users.tokens.confirmation_code'
+
+
+class RoleAccessToken(AccessToken):
+    """Токен, по которому права проверяются без загрузки строки users_user."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['username'] = user.username
+        token['role'] = user.role
+        token['is_superuser'] = user.is_superuser
+        token['ver'] = user.token_version
+        return token
+
+
+def get_token_version(user_id):
+    """Текущая версия токенов пользователя или None, если его нет."""
+
+    from users.models import User
+
+    # один столбец по первичному ключу: отзыв виден всем процессам сразу
+    return User.objects.filter(pk=user_id).values_list(
+        'token_version', flat=True
+    ).first()
+
+
+def revoke_tokens(user):
+    """Делает недействительными все выданные пользователю токены.
+
+    Вызывается из User.save() при смене полей, зашитых в claims.
+    """
+
+    type(user).objects.filter(pk=user.pk).update(
+        token_version=F('token_version') + 1
+    )
+
+
+def make_confirmation_code(user, timestamp=None):
+    """Код подтверждения: метка времени и HMAC от id, email и соли.
+
+    Код нигде не хранится, поэтому регистрация обходится одним INSERT.
+    """
+
+    if timestamp is None:
+        timestamp = int(time.time())
+    digest = salted_hmac(
+        CONFIRMATION_CODE_SALT,
+        f'{user.pk}|{user.email}|{user.confirmation_salt}|{timestamp}'
+    ).hexdigest()[::2]
+    return f'{int_to_base36(timestamp)}-{digest}'
+
+
+def check_confirmation_code(user, code):
+    try:
+        timestamp = base36_to_int(code.split('-', 1)[0])
+    except ValueError:
+        return False
+    if time.time() - timestamp > settings.CONFIRMATION_CODE_TIMEOUT:
+        return False
+    return constant_time_compare(
+        make_confirmation_code(user, timestamp), code
+    )
@@ -1,15 +1,17 @@
-from django.contrib.auth.tokens import default_token_generator
-from django.shortcuts import get_object_or_404
+from django.db import transaction
 
 from rest_framework import viewsets, status, permissions, mixins, generics
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
 
 from django_filters.rest_framework import DjangoFilterBackend
 
 from reviews.models import User
+from api.metrics import AUTH_FAILURES
 from api.permissions import OnlyAdmin, OnlyAuthorOrVIPRole
+from users.authentication import UserJWTAuthentication
+from users.outbox import enqueue_email
+from users.tokens import RoleAccessToken
 from users.serializers import (
     SignupSerialiser,
     CreateUserSerialiser,
@@ -44,10 +46,15 @@ class SignupViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):
         )
 
     def perform_create(self, serializer):
-        user = serializer.save()
-        confirmation_code = default_token_generator.make_token(user)
-        user.email_user('Your confirmation_code: ', f'{confirmation_code}')
-        user = serializer.save(confirmation_code=confirmation_code)
+        # письмо уходит в очередь в той же транзакции, что и пользователь
+        with transaction.atomic():
+            user = serializer.save()
+            enqueue_email(
+                user.email,
+                'Your confirmation_code: ',
+                '{confirmation_code}',
+                confirmation_for=user
+            )
 
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -56,6 +63,8 @@ class UserViewSet(viewsets.ModelViewSet):
     serializer_class = CreateUserSerialiser
     queryset = User.objects.all()
     lookup_field = User.USERNAME_FIELD
+    # /me/ сериализует request.user, поэтому нужен экземпляр из базы
+    authentication_classes = [UserJWTAuthentication]
     permission_classes = [OnlyAdmin]
     filter_backends = (DjangoFilterBackend,)
     filterset_fields = ('username',)
@@ -122,15 +131,9 @@ class CreateTokenView(generics.CreateAPIView):
     def post(self, request, *args, **kwargs):
         serializer = TokenCreateSerialiser(data=request.data)
         if serializer.is_valid():
-            confirmation_code = serializer.validated_data.get(
-                'confirmation_code'
-            )
-            user = get_object_or_404(
-                User, username=serializer.validated_data.get('username')
+            token = RoleAccessToken.for_user(serializer.validated_data['user'])
+            return Response(
+                data={'token': str(token)}, status=status.HTTP_200_OK
             )
-            if user.confirmation_code == confirmation_code:
-                token = RefreshToken.for_user(user).access_token
-                return Response(
-                    data={'token': str(token)}, status=status.HTTP_200_OK
-                )
+        AUTH_FAILURES.labels('invalid_confirmation_code').inc()
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)